@@ -1,8 +1,63 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.http import StreamingHttpResponse
+
+from blog.categories import get_categories
+from blog.exporting import (
+    export_for_model,
+    export_queryset,
+    streaming_export_response,
+)
 from blog.models import User, Category, Post, Comment, ContactMessage
 
 
+def _export(queryset, file_format: str) -> StreamingHttpResponse:
+    name = export_for_model(queryset.model)
+
+    return streaming_export_response(
+        name, export_queryset(name, queryset), file_format
+    )
+
+
+@admin.action(
+    description="Export selected %(verbose_name_plural)s as CSV",
+    permissions=["view"],
+)
+def export_csv(modeladmin, request, queryset) -> StreamingHttpResponse:
+    return _export(queryset, "csv")
+
+
+@admin.action(
+    description="Export selected %(verbose_name_plural)s as NDJSON",
+    permissions=["view"],
+)
+def export_ndjson(
+    modeladmin, request, queryset
+) -> StreamingHttpResponse:
+    return _export(queryset, "ndjson")
+
+
+class CategoryListFilter(admin.SimpleListFilter):
+    """Filter by category, the choices come from the category registry"""
+
+    title = "category"
+    parameter_name = "category"
+    # Lookup of the categories from the model of the admin
+    lookup = "categories"
+
+    def lookups(self, request, model_admin) -> list[tuple]:
+        return [(category.pk, category.name) for category in get_categories()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup: self.value()})
+        return queryset
+
+
+class PostCategoryListFilter(CategoryListFilter):
+    lookup = "post__categories"
+
+
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     add_fieldsets = UserAdmin.add_fieldsets + (
@@ -19,18 +74,21 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ["title", "created_at", "author"]
-    list_filter = ["categories"]
+    list_filter = [CategoryListFilter, "created_at"]
     search_fields = ["title"]
+    actions = [export_csv, export_ndjson]
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ["text", "post", "created_at", "author"]
     search_fields = ["text"]
-    list_filter = ["created_at"]
+    list_filter = ["created_at", PostCategoryListFilter]
+    actions = [export_csv, export_ndjson]
 
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ["name", "subject", "email", "created_at"]
     list_filter = ["created_at"]
+    actions = [export_csv, export_ndjson]
@@ -0,0 +1,123 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.views import View
+
+from blog.forms import CommentForm
+from blog.models import Comment, Post
+from blog.pagination import CursorPaginator
+from blog import writebehind
+
+# The lazy request.user can not be loaded from async code before
+# Django 5.0 (request.auser())
+aget_user = sync_to_async(get_user)
+
+
+def comment_data(request: HttpRequest, comment: Comment, user) -> dict:
+    """
+    JSON of a comment, with its markup for the comments section
+
+    :param request: request
+    :param comment: Comment with its author
+    :param user: current user
+    :return: dict
+    """
+    return {
+        "id": comment.pk,
+        "text": comment.text,
+        "author": str(comment.author),
+        "created_at": comment.created_at.isoformat(),
+        "can_delete": comment.author_id == user.pk,
+        "html": render_to_string(
+            "includes/comment.html",
+            {"comment": comment, "user": user},
+            request=request,
+        ),
+    }
+
+
+def error(message: str, status: int) -> JsonResponse:
+    return JsonResponse({"error": message}, status=status)
+
+
+class CommentListAPIView(View):
+    """
+    Comments of a post as JSON, served by async handlers
+
+    GET returns a page of the comments and the cursors of the
+    neighbour pages, POST adds a comment of the signed in user, or
+    queues it with a 202 in write-behind mode.
+    The detail page uses it to update its comments section in place
+    instead of rebuilding the page.
+    """
+
+    paginate_by = 4
+
+    async def get(self, request: HttpRequest, pk: int) -> JsonResponse:
+        user = await aget_user(request)
+        paginator = CursorPaginator(
+            Comment.objects.filter(post_id=pk).select_related("author"),
+            self.paginate_by,
+        )
+        page = await paginator.aget_page(request.GET.get("cursor"))
+        if not page and not await Post.objects.filter(pk=pk).aexists():
+            return error("Post not found", 404)
+
+        return JsonResponse({
+            "comments": [
+                comment_data(request, comment, user) for comment in page
+            ],
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        })
+
+    async def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return error("Sign in to leave a comment", 403)
+        if not await Post.objects.filter(pk=pk).aexists():
+            return error("Post not found", 404)
+
+        form = CommentForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        if writebehind.is_enabled():
+            try:
+                await sync_to_async(writebehind.enqueue_comment)(
+                    pk, user, form.cleaned_data["text"],
+                    form.cleaned_data["token"],
+                )
+            except writebehind.QueueFull:
+                response = error("Too many comments, retry shortly", 503)
+                response["Retry-After"] = str(writebehind.RETRY_AFTER)
+                return response
+
+            return JsonResponse({
+                "queued": True,
+                "message": "Thanks! Your comment will appear in a moment.",
+            }, status=202)
+
+        comment = await Comment.objects.acreate(
+            text=form.cleaned_data["text"], post_id=pk, author=user
+        )
+
+        return JsonResponse(comment_data(request, comment, user), status=201)
+
+
+class CommentAPIView(View):
+    """Delete a comment of the signed in user"""
+
+    async def delete(self, request: HttpRequest, pk: int) -> HttpResponse:
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return error("Sign in to delete a comment", 403)
+
+        deleted, _ = await Comment.objects.filter(
+            pk=pk, author=user
+        ).adelete()
+        if not deleted:
+            return error("Comment not found", 404)
+
+        return HttpResponse(status=204)
@@ -0,0 +1,333 @@
+import gzip
+import mimetypes
+import re
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+)
+from django.template import engines
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Strings and comments are matched together, so a quote inside
+# a comment or a comment marker inside a string is left alone
+_STRING_OR_COMMENT = re.compile(
+    r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*!.*?\*/)|/\*.*?\*/", re.S
+)
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_NAME = re.compile(r"[A-Za-z_][\w-]*")
+_SELECTOR_NAME = re.compile(r"[.#](-?[_a-zA-Z][\w-]*)")
+_NESTED = re.compile(r"\([^()]*\)|\[[^\[\]]*\]")
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.\w+$")
+
+# At-rules holding rules, the other ones (@font-face, @keyframes)
+# are kept as they are
+_GROUPING_RULES = ("media", "supports", "layer", "container")
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".map")
+
+# Encodings in the order of preference, with the suffix of the file
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _protect(css: str) -> tuple[str, list[str]]:
+    """Drop the comments but the /*! licenses, swap strings for markers"""
+    protected = []
+
+    def replace(match) -> str:
+        if match.group(1) is None:
+            return ""
+        protected.append(match.group(1))
+        return f"\x00{len(protected) - 1}\x00"
+
+    return _STRING_OR_COMMENT.sub(replace, css), protected
+
+
+def _restore(css: str, protected: list[str]) -> str:
+    return _PLACEHOLDER.sub(lambda match: protected[int(match[1])], css)
+
+
+def _split_blocks(css: str) -> list[tuple[str, Optional[str]]]:
+    """
+    Top level statements and blocks of a stylesheet
+
+    :param css: stylesheet without strings and comments
+    :return: list of (prelude, body), body is None for statements
+    """
+    blocks = []
+    position = 0
+    while True:
+        brace = css.find("{", position)
+        semicolon = css.find(";", position)
+        if semicolon != -1 and (brace == -1 or semicolon < brace):
+            blocks.append((css[position:semicolon + 1].strip(), None))
+            position = semicolon + 1
+            continue
+        if brace == -1:
+            break
+
+        depth = 0
+        end = brace
+        while end < len(css):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+                if not depth:
+                    break
+            end += 1
+        blocks.append((css[position:brace].strip(), css[brace + 1:end]))
+        position = end + 1
+
+    return blocks
+
+
+def _split_selectors(prelude: str) -> list[str]:
+    selectors = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(prelude):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and not depth:
+            selectors.append(prelude[start:index].strip())
+            start = index + 1
+    selectors.append(prelude[start:].strip())
+
+    return selectors
+
+
+def _selector_is_used(selector: str, is_used: Callable) -> bool:
+    """
+    A selector is used when all its classes and ids are
+
+    Arguments of pseudo classes (:not(.a), :is(.a, .b)) and attribute
+    selectors are ignored, so such selectors are kept
+    """
+    if "\\" in selector:
+        return True
+
+    previous = None
+    while previous != selector:
+        previous, selector = selector, _NESTED.sub("", selector)
+
+    return all(is_used(name) for name in _SELECTOR_NAME.findall(selector))
+
+
+def _purge_blocks(css: str, is_used: Callable) -> str:
+    kept = []
+    for prelude, body in _split_blocks(css):
+        if body is None:
+            kept.append(prelude)
+        elif _PLACEHOLDER.sub("", prelude).lstrip().startswith("@"):
+            at_rule = _PLACEHOLDER.sub("", prelude).lstrip()
+            name = re.split(r"[\s(]", at_rule[1:], 1)[0].lower()
+            if name in _GROUPING_RULES:
+                body = _purge_blocks(body, is_used)
+                if body.strip():
+                    kept.append(f"{prelude}{{{body}}}")
+            else:
+                kept.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = [
+                selector
+                for selector in _split_selectors(prelude)
+                if _selector_is_used(selector, is_used)
+            ]
+            if selectors:
+                kept.append(f"{','.join(selectors)}{{{body}}}")
+
+    return "\n".join(kept)
+
+
+def purge_css(css: str, used: set, safelist: Iterable[str] = ()) -> str:
+    """
+    Remove the rules whose selectors use classes or ids not found in used
+
+    :param css: stylesheet
+    :param used: names found in the templates and scripts
+    :param safelist: glob patterns of names added at runtime
+    :return: stylesheet
+    """
+    safelist = tuple(safelist)
+    known = {}
+
+    def is_used(name: str) -> bool:
+        if name not in known:
+            known[name] = name in used or any(
+                fnmatchcase(name, pattern) for pattern in safelist
+            )
+        return known[name]
+
+    css, protected = _protect(css)
+
+    return _restore(_purge_blocks(css, is_used), protected)
+
+
+def minify_css(css: str) -> str:
+    """Strip comments (but /*! licenses) and the optional whitespace"""
+    css, protected = _protect(css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r" ?([{};,>]) ?", r"\1", css)
+    css = re.sub(r": ", ":", css)
+    css = css.replace(";}", "}").strip()
+
+    return _restore(css, protected)
+
+
+def used_names(paths: Iterable[Path]) -> set:
+    """Every word of the sources which may be a class or an id"""
+    names = set()
+    for path in paths:
+        names.update(_NAME.findall(path.read_text(errors="ignore")))
+
+    return names
+
+
+def selector_sources() -> list[Path]:
+    """
+    Files which may reference the CSS classes
+
+    The templates of the project and of the installed apps (crispy
+    forms renders most of the form markup), the project scripts and
+    the Python modules of the blog app, forms set widget classes
+    """
+    directories = [
+        Path(directory)
+        for engine in engines.all()
+        for directory in engine.template_dirs
+    ]
+    sources = [
+        path
+        for directory in directories
+        for path in directory.rglob("*.html")
+    ]
+    for directory in settings.STATICFILES_DIRS:
+        sources.extend(Path(directory).rglob("*.js"))
+    sources.extend(Path(__file__).resolve().parent.glob("*.py"))
+
+    return sources
+
+
+def compress_file(path: Path) -> dict:
+    """
+    Write the .gz and (with brotli installed) .br siblings of the file
+
+    :param path: file to compress
+    :return: dict, encoding: bytes, only smaller files are kept
+    """
+    content = path.read_bytes()
+    compressed = {"gzip": gzip.compress(content, 9, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(content, quality=11)
+
+    sizes = {}
+    for encoding, suffix in ENCODINGS:
+        if encoding in compressed and len(compressed[encoding]) < len(
+            content
+        ):
+            path.with_name(path.name + suffix).write_bytes(
+                compressed[encoding]
+            )
+            sizes[encoding] = len(compressed[encoding])
+
+    return sizes
+
+
+def accepted_encodings(header: str) -> dict:
+    """
+    Parse an Accept-Encoding header
+
+    :param header: e.g. "gzip;q=0.5, br, *;q=0"
+    :return: dict, lowercase coding: q value, malformed values count as 0
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+                if not 0 <= quality <= 1:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+
+    return accepted
+
+
+def serve(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Serve a collected static file in the best encoding the client accepts
+
+    Files with a content hash in their name never change, so they are
+    cached by browsers and proxies for a year without revalidation
+    """
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Static file not found")
+    if not fullpath.is_file():
+        raise Http404("Static file not found")
+
+    # The coding with the highest q value wins, ENCODINGS breaks the
+    # ties and q=0 means not acceptable
+    accepted = accepted_encodings(
+        request.headers.get("Accept-Encoding", "")
+    )
+    chosen, encoding, best = fullpath, None, 0.0
+    for name, suffix in ENCODINGS:
+        quality = accepted.get(name, accepted.get("*", 0.0))
+        candidate = fullpath.with_name(fullpath.name + suffix)
+        if quality > best and candidate.is_file():
+            chosen, encoding, best = candidate, name, quality
+
+    stat = chosen.stat()
+    if not was_modified_since(
+        request.headers.get("If-Modified-Since"), stat.st_mtime
+    ):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(fullpath.name)
+        response = FileResponse(
+            open(chosen, "rb"),
+            content_type=content_type or "application/octet-stream",
+        )
+        response.headers["Last-Modified"] = http_date(stat.st_mtime)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if _HASHED_NAME.search(fullpath.name):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+
+    return response
@@ -0,0 +1,181 @@
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.views import View
+
+from blog import views
+from blog.caching import (
+    CATEGORIES_TAG,
+    POPULAR_TAG,
+    POST_LIST_TAG,
+    add_cache_tags,
+    cache_response,
+    comments_tag,
+    post_tag,
+)
+from blog.categories import categories_of, with_category_ids
+from blog.forms import CommentForm, ContactForm, PostFilterForm, PostSearchForm
+from blog.models import Comment, Post
+from blog.pagination import CursorPaginator
+from blog.search import search_posts
+
+# Async variants of the main pages, served by the ASGI entry point (see
+# AsyncViewsMiddleware) while WSGI keeps the sync views of blog.views.
+# They read the posts and the comments with the async ORM, the template,
+# its tags and the lazy request.user may still query the database and
+# run in the thread of the request, so do the form submissions.
+arender = sync_to_async(render)
+
+
+@cache_response
+async def index(request) -> HttpResponse:
+    """
+    Async variant of blog.views.index
+
+    The page of posts is read with the async ORM, the category choice
+    is validated in a thread as it may load the category registry
+
+    :param request: request
+    :return: HttpResponse
+    """
+    post_list = Post.objects.select_related("author").order_by("-created_at")
+    filter_form = PostFilterForm()
+    search_form = PostSearchForm()
+    search_term = ""
+
+    if request.method == "GET":
+        filter_form = PostFilterForm(request.GET)
+        search_form = PostSearchForm(request.GET)
+
+        if await sync_to_async(filter_form.is_valid)():
+            category = filter_form.cleaned_data["category"]
+            if category:
+                post_list = post_list.filter(categories=category)
+
+        if search_form.is_valid():
+            search_term = search_form.cleaned_data["search_term"]
+            if search_term:
+                post_list = search_posts(post_list, search_term)
+
+    if search_term:
+        # Ranked results can not be keyed on the creation date
+        paginator = Paginator(post_list, 4)
+        page_obj = await sync_to_async(paginator.get_page)(
+            request.GET.get("page")
+        )
+        page_obj.object_list = [post async for post in page_obj.object_list]
+    else:
+        paginator = CursorPaginator(post_list, 4)
+        page_obj = await paginator.aget_page(request.GET.get("cursor"))
+
+    if search_term and not paginator.count:
+        messages.error(request, "No results found")
+
+    add_cache_tags(request, POST_LIST_TAG, CATEGORIES_TAG, POPULAR_TAG)
+    for post in page_obj:
+        add_cache_tags(request, post_tag(post.pk), comments_tag(post.pk))
+
+    context = {
+        "page_obj": page_obj,
+        "filter_form": filter_form,
+        "search_form": search_form,
+    }
+
+    return await arender(request, "blog/index.html", context=context)
+
+
+@cache_response
+async def about(request) -> HttpResponse:
+    """Async variant of blog.views.about"""
+    return await arender(request, "blog/about.html")
+
+
+async def contact(request) -> HttpResponse:
+    """
+    Async variant of blog.views.contact
+
+    The submitted form is processed by the sync view
+
+    :param request: request
+    :return: HttpResponse
+    """
+    if request.method == "POST":
+        return await sync_to_async(views.contact)(request)
+
+    return await arender(request, "blog/contact.html", {"form": ContactForm()})
+
+
+class PostDetailView(View):
+    """
+    Async variant of blog.views.PostDetailView
+
+    The post with the ids of its categories and the page of comments are
+    read with the async ORM, the comments are posted to the sync view
+    """
+
+    queryset = with_category_ids(Post.objects.select_related("author"))
+    template_name = "blog/post_detail.html"
+    paginate_comments_by = 4
+
+    @classmethod
+    def as_view(cls, **initkwargs) -> Callable:
+        """
+        Cache the anonymous pages
+
+        method_decorator() can not wrap async handlers before Django 5.0,
+        the whole view is wrapped instead, POST requests bypass the cache
+        """
+        return cache_response(super().as_view(**initkwargs))
+
+    async def get_object(self) -> Post:
+        try:
+            return await self.queryset.aget(pk=self.kwargs.get("pk"))
+        except Post.DoesNotExist:
+            raise Http404("No post found")
+
+    async def get_context_data(self, **kwargs) -> dict:
+        """
+        Context of blog.views.PostDetailView, read with the async ORM
+
+        :param kwargs: **kwargs
+        :return: dict
+        """
+        comments = Comment.objects.filter(post=self.object).select_related(
+            "author"
+        )
+        paginator = CursorPaginator(comments, self.paginate_comments_by)
+        page_obj = await paginator.aget_page(self.request.GET.get("cursor"))
+
+        context = {
+            "view": self,
+            "object": self.object,
+            "post": self.object,
+            "categories": await sync_to_async(categories_of)(self.object),
+            "comment_form": CommentForm(),
+            "comments": page_obj,
+        }
+        context.update(kwargs)
+        add_cache_tags(
+            self.request,
+            post_tag(self.object.pk),
+            comments_tag(self.object.pk),
+            CATEGORIES_TAG,
+        )
+
+        return context
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        self.object = await self.get_object()
+        context = await self.get_context_data()
+
+        return await arender(request, self.template_name, context)
+
+    async def post(self, request, *args, **kwargs) -> HttpResponse:
+        """Add a comment with the sync view"""
+        return await sync_to_async(views.PostDetailView.as_view())(
+            request, *args, **kwargs
+        )
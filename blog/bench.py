@@ -0,0 +1,195 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from typing import Callable
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of the already collected samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Latency summary of the samples
+
+    :param samples: durations in seconds
+    :return: dict with the statistics in milliseconds
+    """
+    return {
+        "runs": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def measure(func: Callable[[], object], repeat: int = 20) -> dict:
+    """
+    Call the function several times and summarize the durations
+
+    :param func: function without arguments
+    :param repeat: number of calls
+    :return: dict with the statistics in milliseconds
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+
+    return summarize(samples)
+
+
+def format_stats(label: str, stats: dict) -> str:
+    """One line report of the summary"""
+    return (
+        f"{label:<32} mean {stats['mean_ms']:8.2f} ms"
+        f"  p50 {stats['p50_ms']:8.2f} ms"
+        f"  p95 {stats['p95_ms']:8.2f} ms"
+        f"  p99 {stats['p99_ms']:8.2f} ms"
+    )
+
+
+def _split_path(path: str) -> tuple[str, str]:
+    path, _, query = path.partition("?")
+    return path, query
+
+
+def call_wsgi(
+    application, method: str, path: str, body: bytes, headers: dict
+) -> int:
+    """
+    Send a request straight to a WSGI application
+
+    :param application: WSGI callable
+    :param method: HTTP method
+    :param path: path with the query string
+    :param body: request body
+    :param headers: lower case header names and their values
+    :return: status code, the body is read to the end
+    """
+    path_info, query = _split_path(path)
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": headers.get("host", "localhost"),
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in headers.items():
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        else:
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+    status = []
+    result = application(
+        environ, lambda line, *args: status.append(int(line.split()[0]))
+    )
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+    return status[0]
+
+
+async def call_asgi(
+    application, method: str, path: str, body: bytes, headers: dict
+) -> int:
+    """
+    Send a request straight to an ASGI application
+
+    Same arguments as call_wsgi()
+
+    :return: status code, the body is read to the end
+    """
+    path_info, query = _split_path(path)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path_info,
+        "raw_path": path_info.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (name.encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (headers.get("host", "localhost"), 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive() -> dict:
+        if messages:
+            return messages.pop()
+        # The client never disconnects before the response is sent
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await application(scope, receive, send)
+
+    return status[0]
+
+
+async def call_http(
+    address: tuple, method: str, path: str, body: bytes, headers: dict
+) -> int:
+    """
+    Send a request to an HTTP server over a connection of its own
+
+    Same arguments as call_wsgi(), the application is the (host, port)
+    address of the server
+
+    :return: status code, 0 when the connection failed, the body is
+        read to the end
+    """
+    try:
+        reader, writer = await asyncio.open_connection(*address)
+    except OSError:
+        return 0
+
+    lines = [f"{method} {path} HTTP/1.1"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines += [f"content-length: {len(body)}", "connection: close", "", ""]
+    try:
+        writer.write("\r\n".join(lines).encode("latin-1") + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        while await reader.read(65536):
+            pass
+    except OSError:
+        return 0
+    finally:
+        writer.close()
+
+    parts = status_line.split()
+    return int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
@@ -0,0 +1,375 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Local tiers shared by the threads of a process, keyed by the location
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+# Striped locks of get_or_set() by location: Django builds a backend
+# instance per thread, the threads must still wait for each other
+_key_locks = {}
+
+KEY_LOCK_STRIPES = 64
+
+
+class LocalTier:
+    """
+    In-process LRU of pickled values bounded by their total size
+
+    Every entry also has a local deadline, after which it has to be
+    read again from the shared tier, so writes of the other processes
+    become visible within the local timeout
+    """
+
+    def __init__(self, max_bytes: int, local_timeout: float) -> None:
+        self.max_bytes = max_bytes
+        self.local_timeout = local_timeout
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Lookups of the shared tier after a local miss, by the process
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            pickled, expires, deadline = entry
+            if deadline <= now or (expires is not None and expires <= now):
+                self._pop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pickled
+
+    def set(self, key: str, pickled: bytes, expires: Optional[float]) -> None:
+        with self._lock:
+            self._pop(key)
+            if len(pickled) > self.max_bytes // 8:
+                # A few huge values would flush the whole tier
+                return
+
+            deadline = time.time() + self.local_timeout
+            self._entries[key] = (pickled, expires, deadline)
+            self.size += len(pickled)
+            while self.size > self.max_bytes:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def count_shared(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.shared_hits += hits
+            self.shared_misses += misses
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+
+class TieredCache(BaseCache):
+    """
+    Two tier cache backend without an external server
+
+    Reads are served by a per-process LRU tier bounded in bytes and fall
+    back to a SQLite database in WAL mode shared by all the workers of
+    the host. Writes go to both tiers, so the process that wrote a value
+    reads it back at once and the other ones within LOCAL_TIMEOUT.
+
+    LOCATION is the path of the SQLite file, OPTIONS accept
+    LOCAL_MAX_BYTES, LOCAL_TIMEOUT, LOCK_TIMEOUT and CULL_EVERY
+    in addition to MAX_ENTRIES and CULL_FREQUENCY of every backend.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params) -> None:
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.path = Path(location)
+        self.lock_timeout = options.get("LOCK_TIMEOUT", 30)
+        self.cull_every = options.get("CULL_EVERY", 500)
+        self._writes = 0
+        self._connection = None
+        self._connection_pid = None
+
+        with _local_tiers_lock:
+            self.local = _local_tiers.setdefault(
+                str(self.path),
+                LocalTier(
+                    options.get("LOCAL_MAX_BYTES", 16 * 1024 * 1024),
+                    options.get("LOCAL_TIMEOUT", 2),
+                ),
+            )
+            self._key_locks = _key_locks.setdefault(
+                str(self.path),
+                [threading.Lock() for _ in range(KEY_LOCK_STRIPES)],
+            )
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        # A connection inherited through fork() must not be reused
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_expires "
+                "ON cache_entries (expires)"
+            )
+            self._connection = connection
+            self._connection_pid = os.getpid()
+
+        return self._connection
+
+    def _dumps(self, value) -> bytes:
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _loads(pickled: bytes):
+        return pickle.loads(pickled)
+
+    def _shared_get(self, key: str) -> tuple[Optional[bytes], Optional[float]]:
+        row = self.db.execute(
+            "SELECT value, expires FROM cache_entries "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+
+        return row if row else (None, None)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = self.local.get(key)
+        if pickled is None:
+            pickled, expires = self._shared_get(key)
+            self.local.count_shared(pickled is not None, pickled is None)
+            if pickled is None:
+                return default
+            self.local.set(key, pickled, expires)
+
+        return self._loads(pickled)
+
+    def get_many(self, keys, version=None) -> dict:
+        full_keys = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys
+        }
+        found = {}
+        missing = []
+        for full_key, key in full_keys.items():
+            pickled = self.local.get(full_key)
+            if pickled is None:
+                missing.append(full_key)
+            else:
+                found[key] = self._loads(pickled)
+
+        if missing:
+            placeholders = ", ".join("?" * len(missing))
+            rows = self.db.execute(
+                "SELECT key, value, expires FROM cache_entries "
+                f"WHERE key IN ({placeholders}) "
+                "AND (expires IS NULL OR expires > ?)",
+                (*missing, time.time()),
+            )
+            shared = 0
+            for full_key, pickled, expires in rows:
+                self.local.set(full_key, pickled, expires)
+                found[full_keys[full_key]] = self._loads(pickled)
+                shared += 1
+            self.local.count_shared(shared, len(missing) - shared)
+
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        key = self.make_and_validate_key(key, version=version)
+        pickled = self._dumps(value)
+        expires = self.get_backend_timeout(timeout)
+        self.db.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires) "
+            "VALUES (?, ?, ?)",
+            (key, pickled, expires),
+        )
+        self.local.set(key, pickled, expires)
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        pickled = self._dumps(value)
+        expires = self.get_backend_timeout(timeout)
+        # An expired row is replaced, a live one is left untouched
+        cursor = self.db.execute(
+            "INSERT INTO cache_entries (key, value, expires) "
+            "VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires = excluded.expires "
+            "WHERE cache_entries.expires IS NOT NULL "
+            "AND cache_entries.expires <= ?",
+            (key, pickled, expires, time.time()),
+        )
+        if not cursor.rowcount:
+            return False
+
+        self.local.set(key, pickled, expires)
+        self._maybe_cull()
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        cursor = self.db.execute(
+            "UPDATE cache_entries SET expires = ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (expires, key, time.time()),
+        )
+        self.local.delete(key)
+
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        """Atomic across processes, the row is updated under a write lock"""
+        key = self.make_and_validate_key(key, version=version)
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            pickled, expires = self._shared_get(key)
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key)
+
+            new_value = self._loads(pickled) + delta
+            pickled = self._dumps(new_value)
+            db.execute(
+                "UPDATE cache_entries SET value = ? WHERE key = ?",
+                (pickled, key),
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        self.local.set(key, pickled, expires)
+
+        return new_value
+
+    def delete(self, key, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        self.local.delete(key)
+        cursor = self.db.execute(
+            "DELETE FROM cache_entries WHERE key = ?", (key,)
+        )
+
+        return bool(cursor.rowcount)
+
+    def has_key(self, key, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        if self.local.get(key) is not None:
+            return True
+
+        return self._shared_get(key)[0] is not None
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.db.execute("DELETE FROM cache_entries")
+
+    def get_or_set(
+        self, key, default, timeout=DEFAULT_TIMEOUT, version=None
+    ):
+        """
+        Compute a missing value only once across threads and processes
+
+        The threads of the process queue on a striped lock, the processes
+        on a lock entry in the shared tier. A caller which did not get the
+        lock waits for the value up to LOCK_TIMEOUT and only then computes
+        it by itself.
+        """
+        value = self.get(key, self._missing_key, version=version)
+        if value is not self._missing_key:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        with self._key_locks[hash(full_key) % len(self._key_locks)]:
+            value = self.get(key, self._missing_key, version=version)
+            if value is not self._missing_key:
+                return value
+
+            lock_key = f"{key}:compute-lock"
+            if self.add(lock_key, os.getpid(), self.lock_timeout, version):
+                try:
+                    value = default()
+                    self.set(key, value, timeout, version=version)
+                finally:
+                    self.delete(lock_key, version=version)
+                return value
+
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                pickled, expires = self._shared_get(full_key)
+                if pickled is not None:
+                    self.local.set(full_key, pickled, expires)
+                    return self._loads(pickled)
+
+            value = default()
+            self.set(key, value, timeout, version=version)
+            return value
+
+    def _maybe_cull(self) -> None:
+        self._writes += 1
+        if self._writes % self.cull_every:
+            return
+
+        db = self.db
+        db.execute(
+            "DELETE FROM cache_entries WHERE expires <= ?", (time.time(),)
+        )
+        (count,) = db.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        if count > self._max_entries:
+            db.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries "
+                "ORDER BY expires IS NULL, expires LIMIT ?)",
+                (count // self._cull_frequency,),
+            )
+
+    def stats(self) -> dict:
+        """Hit and miss counters of the tiers, by this process"""
+        return {
+            "local_hits": self.local.hits,
+            "local_misses": self.local.misses,
+            "local_bytes": self.local.size,
+            "shared_hits": self.local.shared_hits,
+            "shared_misses": self.local.shared_misses,
+        }
@@ -0,0 +1,305 @@
+import hashlib
+import time
+from functools import partial, wraps
+from typing import Callable, Iterable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+
+from blog.metrics import get_recorder, get_store
+from blog.routers import replica_read, synced_at
+
+# Dependency tags of the cached responses
+POST_LIST_TAG = "posts"
+CATEGORIES_TAG = "categories"
+POPULAR_TAG = "popular"
+
+# Only these query params change the page, any other param bypasses
+# the cache so that a crafted query string can not flood it
+CACHEABLE_PARAMS = ("page", "cursor", "category", "search_term")
+
+# Counter of the lookups by view and result, see blog.metrics
+RESPONSE_CACHE_METRIC = "blog_response_cache_total"
+
+RESPONSE_KEY = "response:{digest}"
+TAG_KEY = "tag:{tag}"
+INVALIDATED_KEY = "tag:{tag}:invalidated_at"
+STATS_EVENTS = ("hit", "miss", "bypass")
+
+
+def post_tag(pk: int) -> str:
+    return f"post:{pk}"
+
+
+def comments_tag(post_pk: int) -> str:
+    return f"comments:{post_pk}"
+
+
+def add_cache_tags(request: HttpRequest, *tags: str) -> None:
+    """Declare what the response of the request depends on"""
+    if not hasattr(request, "response_cache_tags"):
+        request.response_cache_tags = set()
+    request.response_cache_tags.update(tags)
+
+
+def get_tag_versions(tags: Iterable[str]) -> dict:
+    """
+    Current versions of the tags
+
+    A tag seen for the first time starts at the current time instead
+    of zero, so a version lost by the cache never matches an old entry
+    """
+    keys = {TAG_KEY.format(tag=tag): tag for tag in tags}
+    stored = cache.get_many(keys)
+
+    versions = {}
+    for key, tag in keys.items():
+        if key not in stored:
+            cache.add(key, time.time_ns(), timeout=None)
+            stored[key] = cache.get(key)
+        versions[tag] = stored[key]
+
+    return versions
+
+
+def invalidate_tags(*tags: str) -> None:
+    """
+    Invalidate every response depending on any of the tags
+
+    Nothing is deleted, bumping the version of a tag makes all the
+    entries stored with the previous version stale. Inside a
+    transaction the versions are bumped once it commits, a page
+    rendered in between still reads the previous rows.
+    """
+    transaction.on_commit(partial(_bump_tags, tags))
+
+
+def _bump_tags(tags: Iterable[str]) -> None:
+    # The time first: a render reading the new versions sees it, see
+    # store_response()
+    cache.set_many(
+        {INVALIDATED_KEY.format(tag=tag): time.time() for tag in tags},
+        timeout=getattr(settings, "RESPONSE_CACHE_TIMEOUT", 600),
+    )
+    for tag in tags:
+        key = TAG_KEY.format(tag=tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def last_invalidated(tags: Iterable[str]) -> float:
+    """Time of the last invalidation of the tags, 0 when unknown"""
+    keys = [INVALIDATED_KEY.format(tag=tag) for tag in tags]
+
+    return max(cache.get_many(keys).values(), default=0)
+
+
+def is_replica_stale(tags: Iterable[str]) -> bool:
+    """
+    Whether the replica read by the request may miss a change of a tag
+
+    A response rendered from a replica synced before the last
+    invalidation of one of its tags would be stored with the new
+    version of the tag and served until it expires
+    """
+    replica = replica_read()
+    if replica is None:
+        return False
+
+    return last_invalidated(tags) >= synced_at([replica]).get(replica, 0)
+
+
+def response_key(request: HttpRequest) -> str:
+    """Cache key of the path and the normalized query params"""
+    params = sorted(
+        (name, value)
+        for name in CACHEABLE_PARAMS
+        for value in request.GET.getlist(name)
+        if value
+    )
+    raw = f"{request.path}?{params!r}"
+
+    return RESPONSE_KEY.format(digest=hashlib.md5(raw.encode()).hexdigest())
+
+
+def is_cacheable_request(request: HttpRequest) -> bool:
+    return (
+        request.method in ("GET", "HEAD")
+        and set(request.GET).issubset(CACHEABLE_PARAMS)
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def is_cacheable_response(
+    request: HttpRequest, response: HttpResponse
+) -> bool:
+    """
+    Only the generic anonymous pages are stored
+
+    Responses with flash messages, cookies or a CSRF token
+    belong to a single visitor
+    """
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        and not len(messages.get_messages(request))
+    )
+
+
+def cache_response(view_func: Callable) -> Callable:
+    """
+    Cache the anonymous responses of the view until a tag is invalidated
+
+    The view declares its dependencies with add_cache_tags(), the
+    versions of the tags are stored with the response and compared on
+    every read, an entry with an outdated version is a miss. A response
+    is not stored when one of its tags was invalidated since the view
+    started, its rows may predate the change. Async views get an async
+    wrapper, the cache and the session are read in a thread.
+
+    :param view_func: view function or method
+    :return: wrapped view
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs) -> HttpResponse:
+            key, cached = await sync_to_async(lookup_response)(request)
+            if cached or not key:
+                return cached or await view_func(request, *args, **kwargs)
+
+            started = time.time()
+            response = await view_func(request, *args, **kwargs)
+            await sync_to_async(store_after_render)(
+                key, request, response, started
+            )
+
+            return response
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs) -> HttpResponse:
+        key, cached = lookup_response(request)
+        if cached or not key:
+            return cached or view_func(request, *args, **kwargs)
+
+        started = time.time()
+        response = view_func(request, *args, **kwargs)
+        store_after_render(key, request, response, started)
+
+        return response
+
+    return wrapper
+
+
+def lookup_response(request: HttpRequest) -> tuple:
+    """
+    Cache key of the request and its fresh cached response
+
+    :param request: request
+    :return: tuple, key or None when the request is not cacheable,
+        HttpResponse or None on a miss
+    """
+    if not is_cacheable_request(request):
+        record_event(request, "bypass")
+        return None, None
+
+    key = response_key(request)
+    entry = cache.get(key)
+    if entry and entry["tags"] == get_tag_versions(entry["tags"]):
+        record_event(request, "hit")
+        response = HttpResponse(entry["content"], status=entry["status"])
+        for header, value in entry["headers"].items():
+            response[header] = value
+        return key, response
+
+    record_event(request, "miss")
+    return key, None
+
+
+def store_after_render(
+    key: str, request: HttpRequest, response: HttpResponse, started: float
+) -> None:
+    if hasattr(response, "render") and callable(response.render):
+        # The CSRF token and the messages are used during the render
+        response.add_post_render_callback(
+            lambda rendered: store_response(key, request, rendered, started)
+        )
+    else:
+        store_response(key, request, response, started)
+
+
+def store_response(
+    key: str, request: HttpRequest, response: HttpResponse, started: float
+) -> None:
+    """
+    Store the response with the versions of its tags
+
+    :param key: cache key of the request
+    :param request: request
+    :param response: rendered response
+    :param started: time the view started, the rows it read are at
+        least as old
+    """
+    if not is_cacheable_response(request, response):
+        return
+
+    tags = getattr(request, "response_cache_tags", set())
+    versions = get_tag_versions(tags)
+    # Read after the versions: when they are already bumped, the time
+    # of the invalidation is set too and the response is dropped
+    replica = replica_read()
+    if replica is not None:
+        started = min(started, synced_at([replica]).get(replica, 0))
+    if last_invalidated(tags) >= started:
+        return
+    cache.set(
+        key,
+        {
+            "tags": versions,
+            "content": response.content,
+            "status": response.status_code,
+            "headers": {"Content-Type": response["Content-Type"]},
+        },
+        timeout=getattr(settings, "RESPONSE_CACHE_TIMEOUT", 600),
+    )
+
+
+def record_event(request: HttpRequest, event: str) -> None:
+    # Counted in memory with the metrics of the view by MetricsMiddleware,
+    # a write to the shared cache would take its lock on every request
+    request.response_cache = event
+
+
+def response_cache_stats() -> dict:
+    """
+    Hit, miss and bypass counters of all the workers
+
+    They are added to the metrics store by the flushes of the workers,
+    the counters of this process are flushed first
+
+    :return: dict with the counters and the hit ratio
+    """
+    get_recorder().flush()
+    stats = dict.fromkeys(STATS_EVENTS, 0)
+    for (metric, labels, _), value in get_store().read().items():
+        if metric == RESPONSE_CACHE_METRIC:
+            stats[dict(labels)["result"]] += int(value)
+    lookups = stats["hit"] + stats["miss"]
+    stats["hit_ratio"] = stats["hit"] / lookups if lookups else 0.0
+
+    return stats
+
+
+def reset_response_cache_stats() -> None:
+    get_recorder().flush()
+    get_store().delete(RESPONSE_CACHE_METRIC)
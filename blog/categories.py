@@ -0,0 +1,109 @@
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Aggregate, CharField, QuerySet
+
+from blog.caching import CATEGORIES_TAG, get_tag_versions
+from blog.models import Category
+
+REGISTRY_KEY = "categories:registry"
+
+# Registry of the process: (version of the categories tag, categories,
+# categories by primary key)
+_local = {}
+
+
+def _load(version: int) -> list[tuple]:
+    """Rows of the registry from the shared cache, or the database"""
+    shared = cache.get(REGISTRY_KEY)
+    if shared is not None and shared["version"] == version:
+        return shared["rows"]
+
+    # Kept until the next change of a category, the rows of a replica
+    # lagging behind would stay in the cache until then
+    rows = list(
+        Category.objects.using(DEFAULT_DB_ALIAS)
+        .order_by("name")
+        .values_list("pk", "name")
+    )
+    cache.set(REGISTRY_KEY, {"version": version, "rows": rows}, timeout=None)
+
+    return rows
+
+
+def _registry() -> tuple:
+    # The version is read before the rows, a change made meanwhile
+    # bumps it again and the next call reloads them
+    version = get_tag_versions([CATEGORIES_TAG])[CATEGORIES_TAG]
+    registry = _local.get("registry")
+    if registry is not None and registry[0] == version:
+        return registry
+
+    categories = [Category(pk=pk, name=name) for pk, name in _load(version)]
+    registry = (
+        version,
+        categories,
+        {category.pk: category for category in categories},
+    )
+    _local["registry"] = registry
+
+    return registry
+
+
+def get_categories() -> list[Category]:
+    """
+    All the categories by name, without a query in steady state
+
+    The list is kept by every process and in the shared cache, both
+    are checked against the version of the categories cache tag, which
+    the signals bump when a category is saved or deleted. Treat the
+    categories as read-only, they are shared by the threads.
+
+    :return: list of Category
+    """
+    return _registry()[1]
+
+
+def categories_version() -> int:
+    """Version of the registry, of the fragments listing the categories"""
+    return _registry()[0]
+
+
+def get_category(pk) -> Optional[Category]:
+    """
+    Category of the primary key, None when it does not exist
+
+    :param pk: primary key, as int or str
+    :return: Category or None
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+
+    return _registry()[2].get(pk)
+
+
+class GroupConcat(Aggregate):
+    function = "GROUP_CONCAT"
+    output_field = CharField()
+
+
+def with_category_ids(queryset: QuerySet) -> QuerySet:
+    """
+    Posts with the ids of their categories joined in the same query
+
+    Read them with categories_of() instead of prefetching the
+    categories with a second query
+    """
+    return queryset.annotate(category_ids=GroupConcat("categories__id"))
+
+
+def categories_of(post) -> list[Category]:
+    """Categories of a post of with_category_ids(), by name"""
+    if not post.category_ids:
+        return []
+    pks = {int(pk) for pk in post.category_ids.split(",")}
+
+    return [category for category in get_categories() if category.pk in pks]
@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models import Count
+
+from blog.models import Comment, Post
+
+
+def reconcile_comment_counts(batch_size: int = 1000) -> int:
+    """
+    Repair the stored comment counters that drifted from the real count
+
+    Counters drift when comments are inserted or deleted bypassing the
+    model signals, e.g. with bulk_create() or raw SQL. Posts are walked
+    in primary key order and every batch is fixed in its own transaction,
+    so the table is never locked for the whole run.
+
+    :param batch_size: number of posts checked per batch
+    :return: number of repaired posts
+    """
+    repaired = 0
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "comments_count")[:batch_size]
+            )
+            if not posts:
+                return repaired
+
+            last_pk = posts[-1].pk
+            actual = dict(
+                Comment.objects.filter(post__in=posts)
+                .order_by()
+                .values_list("post")
+                .annotate(total=Count("pk"))
+            )
+            drifted = []
+            for post in posts:
+                count = actual.get(post.pk, 0)
+                if post.comments_count != count:
+                    post.comments_count = count
+                    drifted.append(post)
+
+            Post.objects.bulk_update(drifted, ["comments_count"])
+            repaired += len(drifted)
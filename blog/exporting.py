@@ -0,0 +1,235 @@
+import csv
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional
+
+from django.db.models import Model, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from blog.models import Category, Comment, ContactMessage, Post
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Export: model, columns as header: lookup of values_list(), the lookup
+# of the creation date and the lookup of the categories, None when the
+# rows have no category
+Export = namedtuple(
+    "Export", ["model", "columns", "date_lookup", "category_lookup"]
+)
+
+EXPORTS = {
+    "posts": Export(
+        Post,
+        {
+            "id": "pk",
+            "title": "title",
+            "author": "author__username",
+            "created_at": "created_at",
+            "comments_count": "comments_count",
+            "content": "content",
+        },
+        "created_at",
+        "categories",
+    ),
+    "comments": Export(
+        Comment,
+        {
+            "id": "pk",
+            "post_id": "post_id",
+            "post": "post__title",
+            "author": "author__username",
+            "created_at": "created_at",
+            "text": "text",
+        },
+        "created_at",
+        "post__categories",
+    ),
+    "contact_messages": Export(
+        ContactMessage,
+        {
+            "id": "pk",
+            "name": "name",
+            "email": "email",
+            "subject": "subject",
+            "created_at": "created_at",
+            "message": "message",
+        },
+        "created_at",
+        None,
+    ),
+}
+
+CHUNK_SIZE = 2000
+
+
+def export_for_model(model: type[Model]) -> str:
+    """Name of the export of the model"""
+    for name, export in EXPORTS.items():
+        if export.model is model:
+            return name
+
+    raise LookupError(f"{model._meta.label} can not be exported")
+
+
+def export_queryset(
+    name: str,
+    queryset: Optional[QuerySet] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    category: Optional[Category] = None,
+) -> QuerySet:
+    """
+    Rows of the export as tuples of the columns, in primary key order
+
+    :param name: key of EXPORTS
+    :param queryset: optional queryset of the model to start from
+    :param since: only the rows created on this day or later
+    :param until: only the rows created on this day or earlier
+    :param category: only the posts of the category, or their comments
+    :return: QuerySet
+    """
+    export = EXPORTS[name]
+    if queryset is None:
+        queryset = export.model.objects.all()
+
+    if since:
+        queryset = queryset.filter(**{
+            f"{export.date_lookup}__date__gte": since
+        })
+    if until:
+        queryset = queryset.filter(**{
+            f"{export.date_lookup}__date__lte": until
+        })
+    if category:
+        if not export.category_lookup:
+            raise ValueError(f"The {name} have no category")
+        queryset = queryset.filter(**{export.category_lookup: category})
+
+    return queryset.order_by("pk").values_list(*export.columns.values())
+
+
+def iter_rows(
+    name: str, queryset: QuerySet, chunk_size: int = CHUNK_SIZE
+) -> Iterator[dict]:
+    """
+    Rows of export_queryset() as dicts, fetched chunk by chunk
+
+    The database cursor is read chunk_size rows at a time and the posts
+    get the names of their categories with one query per chunk, so the
+    memory used does not depend on the number of rows
+    """
+    export = EXPORTS[name]
+    headers = list(export.columns)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if export.model is not Post:
+        for row in rows:
+            yield dict(zip(headers, row))
+        return
+
+    chunk = []
+    for row in rows:
+        chunk.append(dict(zip(headers, row)))
+        if len(chunk) == chunk_size:
+            yield from _with_categories(chunk)
+            chunk = []
+    yield from _with_categories(chunk)
+
+
+def _with_categories(posts: list[dict]) -> list[dict]:
+    names = {}
+    for post_id, name in Post.categories.through.objects.filter(
+        post_id__in=[post["id"] for post in posts]
+    ).order_by("category__name").values_list("post_id", "category__name"):
+        names.setdefault(post_id, []).append(name)
+
+    for post in posts:
+        post["categories"] = names.get(post["id"], [])
+
+    return posts
+
+
+class _Echo:
+    """File-like object of csv.writer() returning the written line"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def render_csv(rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    headers = None
+    for row in rows:
+        if headers is None:
+            headers = list(row)
+            yield writer.writerow(headers)
+        yield writer.writerow(
+            "|".join(value) if isinstance(value, list) else _serialize(value)
+            for value in row.values()
+        )
+
+
+def render_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(
+            {key: _serialize(value) for key, value in row.items()},
+            ensure_ascii=False,
+        ) + "\n"
+
+
+RENDERERS = {
+    "csv": render_csv,
+    "ndjson": render_ndjson,
+}
+
+
+def render(
+    name: str,
+    queryset: QuerySet,
+    file_format: str,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Lines of the export in the format
+
+    :param name: key of EXPORTS
+    :param queryset: rows of export_queryset()
+    :param file_format: key of FORMATS
+    :param chunk_size: rows fetched from the database at once
+    :return: iterator of str
+    """
+    return RENDERERS[file_format](iter_rows(name, queryset, chunk_size))
+
+
+def streaming_export_response(
+    name: str, queryset: QuerySet, file_format: str
+) -> StreamingHttpResponse:
+    """
+    Response sending the export as it is read from the database
+
+    :param name: key of EXPORTS
+    :param queryset: rows of export_queryset()
+    :param file_format: key of FORMATS
+    :return: StreamingHttpResponse
+    """
+    extension = "csv" if file_format == "csv" else "jsonl"
+    filename = f"{name}-{timezone.localdate().isoformat()}.{extension}"
+    response = StreamingHttpResponse(
+        render(name, queryset, file_format),
+        content_type=f"{FORMATS[file_format]}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return response
@@ -1,13 +1,63 @@
+from typing import Optional
+from uuid import uuid4
+
 from ckeditor.widgets import CKEditorWidget
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
-from blog.models import Category, User, Post, ContactMessage
+from blog.categories import get_categories, get_category
+from blog.models import (
+    WRITE_TOKEN_LENGTH,
+    Category,
+    User,
+    Post,
+    ContactMessage,
+)
+
+
+class CategoryChoiceField(forms.ChoiceField):
+    """
+    Choice of a category read from the registry of blog.categories
+
+    Like a ModelChoiceField the cleaned value is a Category, but neither
+    the choices nor the validation run a query
+    """
+
+    def __init__(self, empty_label: str = "---------", **kwargs) -> None:
+        self.empty_label = empty_label
+        super().__init__(choices=self.category_choices, **kwargs)
+
+    def category_choices(self) -> list[tuple]:
+        return [("", self.empty_label)] + [
+            (category.pk, category.name) for category in get_categories()
+        ]
+
+    def prepare_value(self, value):
+        if isinstance(value, Category):
+            return value.pk
+        return value
+
+    def to_python(self, value) -> Optional[Category]:
+        value = self.prepare_value(value)
+        if value in self.empty_values:
+            return None
+
+        category = get_category(value)
+        if category is None:
+            raise forms.ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return category
+
+    def validate(self, value) -> None:
+        # to_python() already checked the choice
+        forms.Field.validate(self, value)
 
 
 class PostFilterForm(forms.Form):
-    category = forms.ModelChoiceField(
-        queryset=Category.objects.all(),
+    category = CategoryChoiceField(
         empty_label="All",
         label="",
         required=False,
@@ -24,6 +74,27 @@ class PostSearchForm(forms.Form):
     )
 
 
+def new_write_token() -> str:
+    return uuid4().hex
+
+
+class WriteTokenField(forms.CharField):
+    """
+    Hidden random token of a submission
+
+    A submission posted twice keeps its token, the write-behind queue
+    stores it only once
+    """
+
+    widget = forms.HiddenInput
+
+    def __init__(self, **kwargs) -> None:
+        kwargs.setdefault("max_length", WRITE_TOKEN_LENGTH)
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("initial", new_write_token)
+        super().__init__(**kwargs)
+
+
 class CommentForm(forms.Form):
     text = forms.CharField(
         max_length=255,
@@ -32,6 +103,7 @@ class CommentForm(forms.Form):
             attrs={"placeholder": "Join the discussion and leave a comment!"}
         ),
     )
+    token = WriteTokenField()
 
 
 class SignUpForm(UserCreationForm):
@@ -62,6 +134,7 @@ class ContactForm(forms.ModelForm):
         label=False,
         widget=forms.Textarea(attrs={"placeholder": "Write your message..."}),
     )
+    token = WriteTokenField()
 
     class Meta:
         model = ContactMessage
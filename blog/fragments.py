@@ -0,0 +1,45 @@
+from typing import Callable, Optional
+
+from django.template.loader import render_to_string
+
+from blog.forms import PostFilterForm
+from blog.models import Post
+
+# Templates of the fragments of a post, see the {% cache %} tags
+POST_FRAGMENTS = ("includes/post_card.html", "includes/post_body.html")
+
+SIDEBAR_FRAGMENTS = (
+    "includes/categories_widget.html",
+    "includes/popular_posts.html",
+)
+
+
+def warm_fragments(
+    posts: int = 100, log: Optional[Callable[[str], None]] = None
+) -> int:
+    """
+    Render the cached fragments of the newest posts and of the sidebar
+
+    After a deploy or a cache flush the first visitors of every page
+    would render them, the {% cache %} tags of the templates store them
+    under the same keys as a request would
+
+    :param posts: number of the newest posts to render
+    :param log: optional function receiving the progress
+    :return: number of rendered fragments
+    """
+    log = log or (lambda message: None)
+    rendered = 0
+    newest = Post.objects.order_by("-created_at", "-id")[:posts].iterator()
+    for number, post in enumerate(newest, start=1):
+        for template_name in POST_FRAGMENTS:
+            render_to_string(template_name, {"post": post})
+            rendered += 1
+        if number % 100 == 0:
+            log(f"Posts: {number}")
+
+    for template_name in SIDEBAR_FRAGMENTS:
+        render_to_string(template_name, {"filter_form": PostFilterForm()})
+        rendered += 1
+
+    return rendered
@@ -0,0 +1,202 @@
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from blog.caching import invalidate_tags, post_tag
+
+try:
+    # Registers the AVIF encoder on Pillow versions without native support
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# Renditions of Post.image used by the templates. Every rendition is
+# a crop to the aspect ratio of its largest width, rendered at every
+# width in every supported format, sizes is the attribute of <img>
+RENDITIONS = {
+    "card": {
+        "widths": (350, 700, 1050),
+        "aspect_ratio": (2, 1),
+        "sizes": "(min-width: 992px) 700px, 100vw",
+    },
+    "detail": {
+        "widths": (400, 800, 1200),
+        "aspect_ratio": (2, 1),
+        "sizes": "(min-width: 992px) 800px, 100vw",
+    },
+}
+
+# Most efficient first, the order of the <source> elements
+FORMATS = {
+    "avif": {"mime": "image/avif", "options": {"quality": 60}},
+    "webp": {"mime": "image/webp", "options": {"quality": 80, "method": 4}},
+    "jpeg": {
+        "mime": "image/jpeg",
+        "options": {"quality": 82, "optimize": True, "progressive": True},
+    },
+}
+
+RENDITIONS_DIR = "post_images/renditions"
+
+_pool: Optional[Executor] = None
+
+
+def available_formats() -> list[str]:
+    """Formats the installed Pillow can encode, JPEG is always there"""
+    # Pillow is imported on first use, the pages only read the
+    # manifests of the renditions
+    from PIL import Image
+
+    Image.init()
+
+    return [name for name in FORMATS if name.upper() in Image.SAVE]
+
+
+def rendition_size(label: str, width: int) -> tuple[int, int]:
+    ratio_width, ratio_height = RENDITIONS[label]["aspect_ratio"]
+
+    return width, round(width * ratio_height / ratio_width)
+
+
+def rendition_name(image_name: str, label: str, width: int, fmt: str) -> str:
+    """
+    Deterministic storage name of a rendition
+
+    The same source image, size and format always give the same name,
+    so already generated files are reused instead of rendered again
+    """
+    width, height = rendition_size(label, width)
+    digest = hashlib.sha1(image_name.encode()).hexdigest()[:10]
+
+    return (
+        f"{RENDITIONS_DIR}/{Path(image_name).stem}"
+        f"-{digest}-{width}x{height}.{fmt}"
+    )
+
+
+def render_rendition(source: str, outputs: list[tuple]) -> None:
+    """
+    Decode the source once and write every width and format of a label
+
+    Nothing but the pixels is written, EXIF (including GPS
+    coordinates) and other metadata of the upload are dropped
+
+    :param source: path of the original image
+    :param outputs: list of (size, format, destination path)
+    :return: None
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    largest = max(size for size, _, _ in outputs)
+    image = ImageOps.fit(image, largest, Image.LANCZOS)
+
+    for size, fmt, destination in outputs:
+        resized = image if size == largest else image.resize(
+            size, Image.LANCZOS
+        )
+        Path(destination).parent.mkdir(parents=True, exist_ok=True)
+        resized.save(destination, fmt.upper(), **FORMATS[fmt]["options"])
+
+
+def _executor() -> Optional[Executor]:
+    global _pool
+
+    workers = getattr(settings, "IMAGE_RENDITION_WORKERS", 2)
+    if not workers:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+
+    return _pool
+
+
+def _widths(label: str, source_width: int) -> list[int]:
+    """Widths of the label without upscaling, at least the smallest one"""
+    widths = RENDITIONS[label]["widths"]
+
+    return [width for width in widths if width <= source_width] or [
+        min(widths)
+    ]
+
+
+def generate_renditions(post) -> dict:
+    """
+    Render every rendition of the post image and store the manifest
+
+    Decoding and resizing run in a process pool when the post is saved,
+    so rendering a page only has to look the URLs up in the manifest.
+    The manifest maps a label to the fallback JPEG and the srcset
+    candidates of every format: {"src": name, "sources": {fmt: [[w, name]]}}
+
+    :param post: Post
+    :return: manifest
+    """
+    manifest = {}
+    if post.image:
+        storage = post.image.storage
+        formats = available_formats()
+        jobs = []
+        for label in RENDITIONS:
+            widths = _widths(label, post.image.width)
+            sources = {fmt: [] for fmt in formats}
+            outputs = []
+            for width in widths:
+                for fmt in formats:
+                    name = rendition_name(post.image.name, label, width, fmt)
+                    sources[fmt].append([width, name])
+                    if not storage.exists(name):
+                        outputs.append((
+                            rendition_size(label, width),
+                            fmt,
+                            storage.path(name),
+                        ))
+            manifest[label] = {
+                "src": sources["jpeg"][-1][1],
+                "sources": sources,
+            }
+            if outputs:
+                jobs.append((post.image.path, outputs))
+
+        pool = _executor()
+        if pool is None:
+            for job in jobs:
+                render_rendition(*job)
+        else:
+            futures = [pool.submit(render_rendition, *job) for job in jobs]
+            for future in futures:
+                future.result()
+
+    if manifest != post.renditions:
+        post.renditions = manifest
+        post.updated_at = timezone.now()
+        type(post).objects.filter(pk=post.pk).update(
+            renditions=manifest, updated_at=post.updated_at
+        )
+        invalidate_tags(post_tag(post.pk))
+
+    return manifest
+
+
+def rendition_savings(post) -> dict:
+    """
+    Bytes of the original image and of the largest rendition per format
+
+    :param post: Post with generated renditions
+    :return: dict, "original": bytes and label: {format: bytes}
+    """
+    storage = post.image.storage
+    report = {"original": post.image.size}
+    for label, rendition in post.renditions.items():
+        report[label] = {
+            fmt: storage.size(candidates[-1][1])
+            for fmt, candidates in rendition["sources"].items()
+        }
+
+    return report
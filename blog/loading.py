@@ -0,0 +1,247 @@
+import json
+import time
+from contextlib import ExitStack, contextmanager
+from typing import IO, Callable, Iterable, Iterator, Optional
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+
+from blog.caching import CATEGORIES_TAG, POST_LIST_TAG, invalidate_tags
+from blog.counters import reconcile_comment_counts
+from blog.dates import historical_dates
+from blog.models import PostSearchTerm
+from blog.popular import refresh_popular_posts
+from blog.search import rebuild_index
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_records(stream: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """
+    Objects of a JSON array or of NDJSON, read incrementally
+
+    Accepts both the json and the jsonl formats of dumpdata, only
+    the current object and one chunk of the file are held in memory
+
+    :param stream: text file
+    :param chunk_size: characters read at once
+    :return: iterator of dicts
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    while True:
+        # Skip the separators of the array and of the lines
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+
+        if position < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                position = end
+                yield record
+                continue
+        elif eof:
+            return
+
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+@contextmanager
+def deferred_indexes(models: Iterable) -> Iterator[None]:
+    """
+    Drop the secondary indexes of the tables and create them afterwards
+
+    Building an index once over the loaded rows is much faster than
+    updating it on every insert. Unique indexes are kept, they enforce
+    the constraints. Only SQLite keeps the SQL of its indexes, with
+    other databases the indexes are left alone.
+    """
+    if connection.vendor != "sqlite" or not models:
+        yield
+        return
+
+    tables = _tables(models)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%' "
+            "AND tbl_name IN (%s)" % ", ".join(["%s"] * len(tables)),
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+class BulkLoader:
+    """
+    Insert deserialized fixture objects with bulk_create() in batches
+
+    Consecutive objects of a model are buffered, a full buffer or the
+    next model flushes it in one transaction: the rows, then the rows
+    of the many to many tables. Existing primary keys are updated like
+    loaddata does, so loading a file twice is harmless. Model signals
+    are not sent, load() rebuilds what they would have maintained.
+    """
+
+    def __init__(
+        self, batch_size: int = 5000, log: Optional[Callable] = None
+    ) -> None:
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+        self._model = None
+        self._buffer = []
+
+    def add(self, deserialized) -> None:
+        model = type(deserialized.object)
+        if model is not self._model or len(self._buffer) >= self.batch_size:
+            self.flush()
+            self._model = model
+        self._buffer.append(deserialized)
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        model = self._model
+        objects = [deserialized.object for deserialized in self._buffer]
+        fields = [
+            field.name
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=[model._meta.pk.name],
+                update_fields=fields,
+            )
+            self._insert_m2m(model, self._buffer)
+
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(objects)
+        self.log(f"{label}: {self.counts[label]}")
+        self._buffer = []
+
+    @staticmethod
+    def _insert_m2m(model, buffer: list) -> None:
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name() + "_id"
+            target = field.m2m_reverse_field_name() + "_id"
+            loaded = [
+                deserialized
+                for deserialized in buffer
+                if field.name in deserialized.m2m_data
+            ]
+            if not loaded:
+                continue
+
+            # The relations of the file replace the existing ones
+            through.objects.filter(**{
+                f"{source}__in": [item.object.pk for item in loaded]
+            }).delete()
+            through.objects.bulk_create(
+                (
+                    through(**{source: item.object.pk, target: pk})
+                    for item in loaded
+                    for pk in item.m2m_data[field.name]
+                ),
+                ignore_conflicts=True,
+            )
+
+
+def load(
+    streams: Iterable[IO[str]],
+    batch_size: int = 5000,
+    defer_indexes: bool = True,
+    log: Optional[Callable] = None,
+) -> dict:
+    """
+    Stream fixture files into the database
+
+    The created_at of the records are kept. Foreign keys are checked
+    once at the end, like loaddata does, so the objects of a file may
+    reference rows of a later batch or file. Then the comment counters,
+    the search index, the cached pages and the popular posts are brought
+    up to date.
+
+    :param streams: text files in the json or jsonl format of dumpdata
+    :param batch_size: objects per INSERT and per transaction
+    :param defer_indexes: build the secondary indexes after the load
+    :param log: optional callable receiving progress messages
+    :return: dict, model label: number of loaded objects
+    """
+    log = log or (lambda message: None)
+    loader = BulkLoader(batch_size, log)
+    models = list(apps.get_app_config("blog").get_models())
+    started = time.monotonic()
+
+    with ExitStack() as stack:
+        stack.enter_context(connection.constraint_checks_disabled())
+        stack.enter_context(historical_dates())
+        if defer_indexes:
+            stack.enter_context(deferred_indexes(models))
+        for stream in streams:
+            for deserialized in Deserializer(iter_records(stream)):
+                loader.add(deserialized)
+        loader.flush()
+
+    loaded = [apps.get_model(label) for label in loader.counts]
+    connection.check_constraints(table_names=_tables(loaded))
+    _reset_sequences(loaded)
+    log(f"Rows inserted in {time.monotonic() - started:.1f} s")
+
+    if {"blog.Post", "blog.Comment"} & set(loader.counts):
+        log("Reconciling the comment counters")
+        reconcile_comment_counts()
+    if "blog.Post" in loader.counts:
+        log("Rebuilding the search index")
+        index = [PostSearchTerm] if defer_indexes else []
+        with deferred_indexes(index):
+            rebuild_index()
+    invalidate_tags(POST_LIST_TAG, CATEGORIES_TAG)
+    refresh_popular_posts()
+
+    return loader.counts
+
+
+def _tables(models: Iterable) -> list[str]:
+    """Tables of the models and of their many to many fields"""
+    tables = []
+    for model in models:
+        tables.append(model._meta.db_table)
+        tables.extend(
+            field.remote_field.through._meta.db_table
+            for field in model._meta.many_to_many
+        )
+
+    return tables
+
+
+def _reset_sequences(models: list) -> None:
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+class LocalDatabase:
+    """
+    SQLite file in WAL mode shared by the processes of the host
+
+    Base of the stores kept next to the site rather than in its
+    database. Every thread gets its own connection in autocommit mode,
+    one inherited from a forked parent is not reused. The SCHEMA
+    statements run on every new connection.
+    """
+
+    SCHEMA: tuple[str, ...] = ()
+
+    # Seconds a connection waits for the write lock of another process
+    TIMEOUT = 30
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=self.TIMEOUT, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+
+def get_shared(database_class: type, path: Path, *args) -> LocalDatabase:
+    """
+    Instance of the class for the file, shared by the threads of the
+    process
+
+    :param database_class: LocalDatabase subclass
+    :param path: SQLite file
+    :param args: other arguments of the class, used by the first call
+    :return: LocalDatabase
+    """
+    key = (database_class, str(path))
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = database_class(str(path), *args)
+
+        return _instances[key]
@@ -0,0 +1,91 @@
+import tempfile
+from pathlib import Path
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+
+from blog.bench import format_stats, measure
+from blog.cache_backends import TieredCache
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the tiered cache backend with the file based one "
+        "on a typical response sized value"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--keys",
+            type=int,
+            default=1000,
+            help="Number of distinct keys",
+        )
+        parser.add_argument(
+            "--value-size",
+            type=int,
+            default=20000,
+            help="Size of every value in bytes",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs of every operation",
+        )
+
+    def handle(self, *args, **options) -> None:
+        value = {"content": b"x" * options["value_size"], "status": 200}
+        keys = [f"response:{number}" for number in range(options["keys"])]
+
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                "FileBasedCache": FileBasedCache(
+                    str(Path(directory) / "files"),
+                    {"OPTIONS": {"MAX_ENTRIES": len(keys) * 2}},
+                ),
+                "TieredCache": TieredCache(
+                    str(Path(directory) / "cache.sqlite3"),
+                    {"OPTIONS": {"MAX_ENTRIES": len(keys) * 2}},
+                ),
+            }
+
+            for name, backend in backends.items():
+                self.stdout.write(f"\n{name}, {len(keys)} keys per run")
+                self.stdout.write(format_stats(
+                    "set",
+                    measure(
+                        lambda: [backend.set(key, value) for key in keys],
+                        options["repeat"],
+                    ),
+                ))
+                self.stdout.write(format_stats(
+                    "get",
+                    measure(
+                        lambda: [backend.get(key) for key in keys],
+                        options["repeat"],
+                    ),
+                ))
+                self.stdout.write(format_stats(
+                    "get_many of 10",
+                    measure(
+                        lambda: [
+                            backend.get_many(keys[start:start + 10])
+                            for start in range(0, len(keys), 10)
+                        ],
+                        options["repeat"],
+                    ),
+                ))
+                self.stdout.write(format_stats(
+                    "incr",
+                    measure(
+                        lambda: self.increment(backend, len(keys)),
+                        options["repeat"],
+                    ),
+                ))
+
+    @staticmethod
+    def increment(backend, times: int) -> None:
+        backend.add("counter", 0)
+        for _ in range(times):
+            backend.incr("counter")
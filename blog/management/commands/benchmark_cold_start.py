@@ -0,0 +1,141 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from blog.bench import format_stats, summarize
+from blog.management.commands import benchmark_views
+from blog.management.commands.benchmark_views import Request
+from blog.models import Post
+from blog.template_warmup import get_manifest_path
+
+# Run in a new interpreter: boots the WSGI application, then sends the
+# requests of argv[1] one after the other and prints the durations
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from personal_blog.wsgi import application
+booted = time.perf_counter() - started
+from blog.bench import call_wsgi
+requests = []
+for method, path, headers in json.loads(sys.argv[1]):
+    started = time.perf_counter()
+    status = call_wsgi(application, method, path, b"", headers)
+    requests.append((time.perf_counter() - started, status))
+print(json.dumps({"boot": booted, "requests": requests}))
+"""
+
+# Name and environment of the measured worker configurations
+CONFIGURATIONS = (
+    ("cold", {"TEMPLATE_WARMUP": "0"}),
+    ("warmup", {"TEMPLATE_WARMUP": "1", "TEMPLATE_MANIFEST_PATH": ""}),
+    ("manifest", {"TEMPLATE_WARMUP": "1"}),
+)
+
+
+class Command(benchmark_views.Command):
+    help = (
+        "Measure the boot time and the first responses of freshly "
+        "spawned WSGI workers, without warmup, with it, and with the "
+        "template manifest of build_template_manifest"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=10,
+            help="Workers spawned per configuration",
+        )
+        parser.add_argument(
+            "--output", help="Save the results to this JSON file"
+        )
+
+    def handle(self, *args, **options) -> None:
+        if not Post.objects.exists():
+            raise CommandError("No posts, run seed_benchmark first")
+
+        self.user, _ = get_user_model().objects.get_or_create(
+            username="benchmark_user"
+        )
+        self.csrf_token = get_random_string(32)
+        self.session_cookie = self.login()
+        busiest = Post.objects.order_by("-comments_count").first()
+        pages = {
+            "index": reverse("blog:index"),
+            "post_detail": reverse(
+                "blog:post-detail", kwargs={"pk": busiest.pk}
+            ),
+            "about": reverse("blog:about"),
+            "contact": reverse("blog:contact"),
+            "login": reverse("login"),
+        }
+        # Signed in, so that the pages are rendered, not served from
+        # the response cache
+        calls = [
+            ("GET", path, self.headers(Request("GET", path, None), "user"))
+            for path in pages.values()
+        ]
+
+        manifest = get_manifest_path()
+        results = {}
+        for name, environment in CONFIGURATIONS:
+            if name == "manifest" and not (manifest and manifest.exists()):
+                self.stdout.write(
+                    "\nmanifest: skipped, run build_template_manifest"
+                )
+                continue
+
+            runs = [
+                self.spawn(calls, environment) for _ in range(options["runs"])
+            ]
+            results[name] = {
+                "boot": summarize([run["boot"] for run in runs]),
+                "first_byte": summarize(
+                    [run["boot"] + run["requests"][0][0] for run in runs]
+                ),
+            }
+            for number, page in enumerate(pages):
+                results[name][page] = summarize(
+                    [run["requests"][number][0] for run in runs]
+                )
+            errors = sum(
+                1
+                for run in runs
+                for _, status in run["requests"]
+                if status >= 400
+            )
+
+            self.stdout.write(f"\n{name}" + (
+                f" ({errors} errors)" if errors else ""
+            ))
+            for label, stats in results[name].items():
+                self.stdout.write(format_stats(label, stats))
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(
+                {"runs": options["runs"], "results": results}, indent=2
+            ))
+            self.stdout.write(f"\nSaved to {options['output']}")
+
+    @staticmethod
+    def spawn(calls: list, environment: dict) -> dict:
+        """Boot a new worker process and send it the requests"""
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD, json.dumps(calls)],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **environment},
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            raise CommandError(completed.stderr)
+
+        return json.loads(completed.stdout.splitlines()[-1])
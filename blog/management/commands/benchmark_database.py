@@ -0,0 +1,177 @@
+import json
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from blog.bench import format_stats, summarize
+from blog.management.commands import benchmark_views
+from blog.models import Comment, Post
+
+KINDS = ("read", "write")
+
+
+class Command(benchmark_views.Command):
+    help = (
+        "Measure the database under concurrent comment writes mixed with "
+        "index reads through the WSGI application, run it once per "
+        "DATABASE_PROFILE to compare them"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Measured requests, reads and writes",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=16,
+            help="Worker threads of the WSGI server",
+        )
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.2,
+            help="Share of the requests adding a comment",
+        )
+        parser.add_argument(
+            "--output", help="Save the results to this JSON file"
+        )
+        parser.add_argument(
+            "--baseline",
+            help="Compare with a saved JSON file, e.g. of another profile",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if not Post.objects.exists():
+            raise CommandError("No posts, run seed_benchmark first")
+        if not 0 <= options["write_ratio"] <= 1:
+            raise CommandError("--write-ratio must be between 0 and 1")
+
+        from personal_blog.wsgi import application
+
+        self.user, _ = get_user_model().objects.get_or_create(
+            username="benchmark_user"
+        )
+        self.csrf_token = get_random_string(32)
+        self.session_cookie = self.login()
+        posts = list(
+            Post.objects.order_by("-comments_count").values_list(
+                "pk", flat=True
+            )[:50]
+        )
+        marker = f"Mixed benchmark {get_random_string(8)}"
+
+        kinds = []
+        calls = []
+        written = 0.0
+        for number in range(options["requests"]):
+            # Spread the writes evenly between the reads
+            written += options["write_ratio"]
+            if written >= 1:
+                written -= 1
+                kinds.append("write")
+                request = benchmark_views.Request(
+                    "POST",
+                    reverse(
+                        "blog:post-detail",
+                        kwargs={"pk": posts[number % len(posts)]},
+                    ),
+                    {"text": f"{marker} {number}"},
+                )
+            else:
+                kinds.append("read")
+                request = benchmark_views.Request(
+                    "GET", reverse("blog:index"), None
+                )
+            calls.append((
+                request.method,
+                request.path,
+                urlencode(request.data or {}).encode(),
+                self.headers(request, "user"),
+            ))
+
+        try:
+            outcomes, elapsed = self.run_wsgi(
+                application,
+                calls,
+                options["threads"],
+                0,
+                options["threads"],
+            )
+        finally:
+            Comment.objects.filter(text__startswith=marker).delete()
+
+        results = {"throughput_rps": len(outcomes) / elapsed}
+        self.stdout.write(f"\n{self.profile()}")
+        for kind in KINDS:
+            selected = [
+                outcome
+                for outcome, outcome_kind in zip(outcomes, kinds)
+                if outcome_kind == kind
+            ]
+            if not selected:
+                continue
+            stats = summarize([duration for duration, _, _ in selected])
+            stats["errors"] = sum(
+                1 for _, status, _ in selected if status >= 400
+            )
+            results[kind] = stats
+            self.stdout.write(
+                f"{format_stats(kind, stats)}  {stats['errors']} errors"
+            )
+        self.stdout.write(f"{results['throughput_rps']:.1f} req/s")
+
+        report = {
+            "meta": {"profile": self.profile(), **self.meta(options)},
+            "results": results,
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"\nSaved to {options['output']}")
+        if options["baseline"]:
+            self.compare_profiles(results, options["baseline"])
+
+    @staticmethod
+    def profile() -> str:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+
+        return (
+            f"{connection.settings_dict['ENGINE']}, journal "
+            f"{journal_mode}, CONN_MAX_AGE "
+            f"{connection.settings_dict['CONN_MAX_AGE']}"
+        )
+
+    @staticmethod
+    def meta(options) -> dict:
+        return {
+            "posts": Post.objects.count(),
+            "requests": options["requests"],
+            "threads": options["threads"],
+            "write_ratio": options["write_ratio"],
+        }
+
+    def compare_profiles(self, results: dict, path: str) -> None:
+        baseline = json.loads(Path(path).read_text())
+        self.stdout.write(f"\nCompared with {baseline['meta']['profile']}")
+        previous = baseline["results"]
+        self.stdout.write(
+            f"throughput {previous['throughput_rps']:8.1f} -> "
+            f"{results['throughput_rps']:8.1f} req/s"
+        )
+        for kind in KINDS:
+            if kind in results and kind in previous:
+                self.stdout.write(
+                    f"{kind:<5} p95 {previous[kind]['p95_ms']:8.2f} -> "
+                    f"{results[kind]['p95_ms']:8.2f} ms, errors "
+                    f"{previous[kind]['errors']} -> {results[kind]['errors']}"
+                )
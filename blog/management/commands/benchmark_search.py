@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from blog.bench import format_stats, measure
+from blog.models import Post
+from blog.search import rebuild_index, search_posts
+from blog.seeding import TextGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the latency of the search index with the icontains scan, "
+        "the synthetic posts are rolled back after the run"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=10000,
+            help="Number of synthetic posts created for the run",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of runs of every query",
+        )
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Search query, can be passed several times",
+        )
+
+    def handle(self, *args, **options) -> None:
+        queries = options["queries"] or ["python", "summer food", "garden"]
+
+        with transaction.atomic():
+            self.seed(options["posts"])
+            self.stdout.write(f"Posts in the database: {Post.objects.count()}")
+
+            for query in queries:
+                self.stdout.write(f"\nQuery: {query!r}")
+                self.stdout.write(format_stats(
+                    "icontains scan",
+                    measure(
+                        lambda: self.first_page(self.icontains(query)),
+                        options["repeat"],
+                    ),
+                ))
+                self.stdout.write(format_stats(
+                    "search index",
+                    measure(
+                        lambda: self.first_page(
+                            search_posts(Post.objects.all(), query)
+                        ),
+                        options["repeat"],
+                    ),
+                ))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count: int) -> None:
+        author, _ = get_user_model().objects.get_or_create(
+            username="benchmark_author"
+        )
+        text = TextGenerator(count)
+        posts = (
+            Post(
+                title=text.title(),
+                content=text.content(),
+                author=author,
+            )
+            for _ in range(count)
+        )
+        Post.objects.bulk_create(posts, batch_size=500)
+        rebuild_index()
+
+    @staticmethod
+    def icontains(query: str):
+        return Post.objects.filter(
+            Q(title__icontains=query) | Q(content__icontains=query)
+        )
+
+    @staticmethod
+    def first_page(queryset) -> None:
+        """Same work as the paginator of the index view"""
+        queryset.count()
+        list(queryset[:4])
@@ -0,0 +1,169 @@
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from blog.bench import call_http
+from blog.management.commands.benchmark_views import (
+    INTERFACES,
+    Command as BenchmarkViewsCommand,
+)
+
+# Server of each entry point and the module it is run with
+SERVERS = {"wsgi": "gunicorn", "asgi": "uvicorn"}
+
+STARTUP_TIMEOUT = 60
+
+
+class Command(BenchmarkViewsCommand):
+    help = (
+        "Measure the scenarios of benchmark_views over HTTP, WSGI served "
+        "by gunicorn with threads and ASGI by uvicorn, each started in a "
+        "process of its own with the settings of this one"
+    )
+
+    def add_arguments(self, parser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes of each server",
+        )
+
+    def handle(self, *args, **options) -> None:
+        interfaces = options["interfaces"] or INTERFACES
+        missing = [
+            SERVERS[interface]
+            for interface in interfaces
+            if find_spec(SERVERS[interface]) is None
+        ]
+        if missing:
+            raise CommandError(
+                f"Install {' and '.join(missing)} to run the servers"
+            )
+        if options["wsgi_threads"] is None:
+            # One thread per connection would not be a server sizing
+            options["wsgi_threads"] = min(options["concurrency"], 32)
+
+        with ExitStack() as self.servers:
+            super().handle(*args, **options)
+
+    def load_applications(self, options) -> dict:
+        """Address of the server of every measured entry point"""
+        return {
+            interface: self.start_server(interface, options)
+            for interface in options["interfaces"] or INTERFACES
+        }
+
+    def start_server(self, interface: str, options) -> tuple:
+        """
+        Start the server of the entry point, stopped with the command
+
+        :param interface: wsgi or asgi
+        :param options: options of the command
+        :return: (host, port) once it accepts connections
+        """
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            address = probe.getsockname()
+        host, port = address
+        if interface == "wsgi":
+            command = [
+                "gunicorn",
+                "personal_blog.wsgi:application",
+                f"--bind={host}:{port}",
+                "--worker-class=gthread",
+                f"--threads={options['wsgi_threads']}",
+                f"--workers={options['workers']}",
+                "--backlog=2048",
+                "--log-level=warning",
+            ]
+        else:
+            command = [
+                "uvicorn",
+                "personal_blog.asgi:application",
+                f"--host={host}",
+                f"--port={port}",
+                f"--workers={options['workers']}",
+                "--backlog=2048",
+                "--no-access-log",
+                "--log-level=warning",
+            ]
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", *command],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+        )
+        self.servers.callback(self.stop_server, server)
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{command[0]} exited on startup")
+            try:
+                socket.create_connection(address, timeout=1).close()
+                return address
+            except OSError:
+                time.sleep(0.2)
+
+        raise CommandError(f"{command[0]} did not start in time")
+
+    @staticmethod
+    def stop_server(server: subprocess.Popen) -> None:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+    @staticmethod
+    def run_http(address: tuple, calls, concurrency: int, warmup: int):
+        """
+        Every request in flight opens a connection of its own, they are
+        all sent from the event loop of this process. The queries run in
+        the server, they are not counted.
+        """
+        async def send(call, semaphore) -> tuple:
+            async with semaphore:
+                started = time.perf_counter()
+                status = await call_http(address, *call)
+                return time.perf_counter() - started, status, None
+
+        async def send_all(batch) -> list:
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(send(call, semaphore) for call in batch)
+            )
+
+        asyncio.run(send_all(calls[:warmup]))
+        started = time.perf_counter()
+        outcomes = asyncio.run(send_all(calls[warmup:]))
+
+        return outcomes, time.perf_counter() - started
+
+    def run_wsgi(
+        self, address, calls, concurrency: int, warmup: int, threads: int
+    ):
+        return self.run_http(address, calls, concurrency, warmup)
+
+    def run_asgi(self, address, calls, concurrency: int, warmup: int):
+        return self.run_http(address, calls, concurrency, warmup)
+
+    def meta(self, options) -> dict:
+        meta = super().meta(options)
+        meta["servers"] = {
+            interface: SERVERS[interface]
+            for interface in options["interfaces"] or INTERFACES
+        }
+        meta["workers"] = options["workers"]
+
+        return meta
@@ -0,0 +1,395 @@
+import asyncio
+import json
+import platform
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from urllib.parse import urlencode
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from blog.bench import call_asgi, call_wsgi, format_stats, summarize
+from blog.models import Category, Comment, Post
+from blog.pagination import NEXT, CursorPaginator
+from blog.queries import QueryInspector
+
+Request = namedtuple("Request", ["method", "path", "data"])
+
+# Scenario: name, whether anonymous visitors are measured too, and a
+# function building the request number i
+Scenario = namedtuple("Scenario", ["name", "anonymous", "request"])
+
+INTERFACES = ("wsgi", "asgi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency, throughput and queries per request of the "
+        "blog pages through the WSGI and ASGI applications, seed the "
+        "database with seed_benchmark first"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per scenario",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Requests per scenario sent before measuring",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Requests in flight at the same time",
+        )
+        parser.add_argument(
+            "--wsgi-threads",
+            type=int,
+            help="Worker threads of the WSGI server, requests over it wait "
+            "for a free one, as many as --concurrency by default",
+        )
+        parser.add_argument(
+            "--interface",
+            action="append",
+            choices=INTERFACES,
+            dest="interfaces",
+            help="Entry point to measure, both by default",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run the scenarios with this name",
+        )
+        parser.add_argument(
+            "--output", help="Save the results to this JSON file"
+        )
+        parser.add_argument(
+            "--baseline",
+            help="Compare the p95 latencies with a saved JSON file",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if not Post.objects.exists():
+            raise CommandError("No posts, run seed_benchmark first")
+
+        self.applications = self.load_applications(options)
+        self.user, _ = get_user_model().objects.get_or_create(
+            username="benchmark_user"
+        )
+        self.csrf_token = get_random_string(32)
+        self.session_cookie = self.login()
+
+        scenarios = [
+            scenario
+            for scenario in self.scenarios()
+            if not options["scenarios"]
+            or scenario.name in options["scenarios"]
+        ]
+        results = {}
+        for interface in options["interfaces"] or INTERFACES:
+            results[interface] = {}
+            self.stdout.write(f"\n{interface.upper()}")
+            for scenario in scenarios:
+                audiences = (
+                    ("anonymous", "user") if scenario.anonymous else ("user",)
+                )
+                for audience in audiences:
+                    label = f"{scenario.name} [{audience}]"
+                    stats = self.run_scenario(
+                        interface, scenario, audience, options
+                    )
+                    results[interface][label] = stats
+                    queries = stats["queries_per_request"]
+                    self.stdout.write(
+                        f"{format_stats(label, stats)}"
+                        f"  {stats['throughput_rps']:8.1f} req/s"
+                        + (
+                            f"  {queries:5.1f} queries"
+                            if queries is not None else ""
+                        )
+                        + (
+                            f"  {stats['errors']} errors"
+                            if stats["errors"] else ""
+                        )
+                    )
+
+        report = {"meta": self.meta(options), "results": results}
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"\nSaved to {options['output']}")
+        if options["baseline"]:
+            self.compare(results, options["baseline"])
+
+    def load_applications(self, options) -> dict:
+        """The WSGI and ASGI applications, called in this process"""
+        from personal_blog.asgi import application as asgi_application
+        from personal_blog.wsgi import application as wsgi_application
+
+        return {"wsgi": wsgi_application, "asgi": asgi_application}
+
+    def scenarios(self) -> list[Scenario]:
+        posts = Post.objects.all()
+        busiest = posts.order_by("-comments_count").first()
+        category = Category.objects.order_by("pk").first()
+        detail_url = reverse("blog:post-detail", kwargs={"pk": busiest.pk})
+        index_url = reverse("blog:index")
+
+        def get(path: str):
+            return lambda number: Request("GET", path, None)
+
+        scenarios = [
+            Scenario("index", True, get(index_url)),
+            Scenario(
+                "index_deep",
+                True,
+                get(f"{index_url}?cursor={self.deep_cursor(posts, 5000)}"),
+            ),
+            Scenario(
+                "index_search", True, get(f"{index_url}?search_term=python")
+            ),
+            Scenario(
+                "index_search_deep",
+                True,
+                get(f"{index_url}?search_term=python&page=50"),
+            ),
+            Scenario("post_detail", True, get(detail_url)),
+            Scenario(
+                "post_detail_deep_comments",
+                True,
+                get(
+                    f"{detail_url}?cursor="
+                    f"{self.deep_cursor(busiest.comments.all(), 1000)}"
+                ),
+            ),
+            Scenario(
+                "comment_create",
+                False,
+                lambda number: Request(
+                    "POST", detail_url, {"text": f"Benchmark {number}"}
+                ),
+            ),
+            Scenario("comment_delete", False, self.delete_request),
+        ]
+        if category:
+            scenarios.insert(1, Scenario(
+                "index_category",
+                True,
+                get(f"{index_url}?category={category.pk}"),
+            ))
+
+        return scenarios
+
+    def delete_request(self, number: int) -> Request:
+        """Delete the comments left by the comment_create scenario"""
+        if number == 0:
+            self.created_comments = list(
+                Comment.objects.filter(author=self.user)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+        if not self.created_comments:
+            return None
+        pk = self.created_comments.pop()
+
+        return Request(
+            "POST", reverse("blog:comment-delete", kwargs={"pk": pk}), {}
+        )
+
+    @staticmethod
+    def deep_cursor(queryset, depth: int) -> str:
+        """Cursor of the page starting after `depth` rows, or the last one"""
+        paginator = CursorPaginator(queryset, 1)
+        ordered = paginator.ordered()
+        row = ordered[depth:depth + 1].first() or ordered.last()
+
+        return paginator.encode_cursor(NEXT, row) if row else ""
+
+    def login(self) -> str:
+        """Session of the benchmark user, as if it signed in"""
+        engine = import_module(settings.SESSION_ENGINE)
+        session = engine.SessionStore()
+        session[SESSION_KEY] = str(self.user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        session.save()
+
+        return session.session_key
+
+    def headers(self, request: Request, audience: str) -> dict:
+        host = settings.ALLOWED_HOSTS[0].lstrip(".")
+        headers = {"host": "localhost" if host in ("", "*") else host}
+        if audience == "user":
+            headers["cookie"] = (
+                f"{settings.SESSION_COOKIE_NAME}={self.session_cookie}; "
+                f"{settings.CSRF_COOKIE_NAME}={self.csrf_token}"
+            )
+            headers["x-csrftoken"] = self.csrf_token
+        if request.method == "POST":
+            headers["content-type"] = "application/x-www-form-urlencoded"
+
+        return headers
+
+    def run_scenario(
+        self, interface: str, scenario: Scenario, audience: str, options
+    ) -> dict:
+        application = self.applications[interface]
+        warmup = [] if not scenario.anonymous else [
+            scenario.request(number) for number in range(options["warmup"])
+        ]
+        requests = [
+            scenario.request(number) for number in range(options["requests"])
+        ]
+        requests = [request for request in requests if request is not None]
+        calls = [
+            (
+                request.method,
+                request.path,
+                urlencode(request.data or {}).encode(),
+                self.headers(request, audience),
+            )
+            for request in warmup + requests
+        ]
+        if interface == "wsgi":
+            outcomes, elapsed = self.run_wsgi(
+                application,
+                calls,
+                options["concurrency"],
+                len(warmup),
+                options["wsgi_threads"] or options["concurrency"],
+            )
+        else:
+            outcomes, elapsed = self.run_asgi(
+                application, calls, options["concurrency"], len(warmup)
+            )
+
+        durations = [duration for duration, _, _ in outcomes]
+        stats = summarize(durations) if durations else summarize([0.0])
+        stats["throughput_rps"] = len(outcomes) / elapsed if elapsed else 0.0
+        # None when the queries run in another process
+        counts = [queries for _, _, queries in outcomes]
+        stats["queries_per_request"] = (
+            None if None in counts
+            else sum(counts) / len(counts) if counts else 0.0
+        )
+        # 0 is a failed connection to a server
+        stats["errors"] = sum(
+            1 for _, status, _ in outcomes if not 0 < status < 400
+        )
+
+        return stats
+
+    @staticmethod
+    def run_wsgi(
+        application, calls, concurrency: int, warmup: int, threads: int
+    ):
+        """
+        Every request in flight gets a client thread, like a connection,
+        and waits for one of the worker threads of the server
+        """
+        workers = threading.BoundedSemaphore(threads)
+
+        def send(call) -> tuple:
+            with QueryInspector() as inspector:
+                started = time.perf_counter()
+                with workers:
+                    status = call_wsgi(application, *call)
+                duration = time.perf_counter() - started
+
+            return duration, status, inspector.count
+
+        for call in calls[:warmup]:
+            send(call)
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            outcomes = [send(call) for call in calls[warmup:]]
+        else:
+            with ThreadPoolExecutor(concurrency) as pool:
+                outcomes = list(pool.map(send, calls[warmup:]))
+
+        return outcomes, time.perf_counter() - started
+
+    @staticmethod
+    def run_asgi(application, calls, concurrency: int, warmup: int):
+        """
+        All the requests in flight share the event loop, the inspector
+        follows the connections opened by the threads of the handler
+        """
+        async def send(call, semaphore) -> tuple:
+            async with semaphore:
+                started = time.perf_counter()
+                status = await call_asgi(application, *call)
+                return time.perf_counter() - started, status
+
+        async def send_all(batch) -> list:
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(send(call, semaphore) for call in batch)
+            )
+
+        async_to_sync(send_all)(calls[:warmup])
+        with QueryInspector() as inspector:
+            started = time.perf_counter()
+            outcomes = async_to_sync(send_all)(calls[warmup:])
+            elapsed = time.perf_counter() - started
+
+        queries = inspector.count / len(outcomes) if outcomes else 0
+        return [
+            (duration, status, queries) for duration, status in outcomes
+        ], elapsed
+
+    @staticmethod
+    def meta(options) -> dict:
+        return {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "posts": Post.objects.count(),
+            "comments": Comment.objects.count(),
+            "categories": Category.objects.count(),
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "wsgi_threads": options["wsgi_threads"] or options["concurrency"],
+        }
+
+    def compare(self, results: dict, path: str) -> None:
+        baseline = json.loads(Path(path).read_text())["results"]
+        self.stdout.write(f"\np95 compared with {path}")
+        for interface, scenarios in results.items():
+            for label, stats in scenarios.items():
+                previous = baseline.get(interface, {}).get(label)
+                if not previous:
+                    continue
+                change = (
+                    stats["p95_ms"] / previous["p95_ms"] - 1
+                    if previous["p95_ms"] else 0.0
+                )
+                line = (
+                    f"{interface} {label:<40} {previous['p95_ms']:8.2f} -> "
+                    f"{stats['p95_ms']:8.2f} ms ({change:+.0%})"
+                )
+                self.stdout.write(
+                    self.style.ERROR(line) if change > 0.1 else line
+                )
@@ -0,0 +1,113 @@
+import statistics
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.profiling import (
+    PROFILE_SUFFIX,
+    get_profile_dir,
+    read_profile,
+    render_flamegraph,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the profiles of PROFILER_DIR into a flamegraph per view, "
+        "as SVG and in the collapsed format"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--view",
+            action="append",
+            dest="views",
+            help="Only merge the profiles of this URL name",
+        )
+        parser.add_argument(
+            "--trigger",
+            choices=["sample", "slow"],
+            help="Only merge the sampled or the slow requests",
+        )
+        parser.add_argument(
+            "--output",
+            help="Directory of the flamegraphs, PROFILER_DIR/flamegraphs "
+            "by default",
+        )
+        parser.add_argument(
+            "--slowest",
+            type=int,
+            default=3,
+            help="Slowest requests listed by view, with their query",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the merged profiles",
+        )
+
+    def handle(self, *args, **options) -> None:
+        directory = get_profile_dir()
+        output = Path(options["output"] or directory / "flamegraphs")
+
+        merged = defaultdict(Counter)
+        requests = defaultdict(list)
+        merged_paths = []
+        for path in sorted(directory.glob(f"*{PROFILE_SUFFIX}")):
+            tags, stacks = read_profile(path)
+            view = tags.get("view", "unresolved")
+            if options["views"] and view not in options["views"]:
+                continue
+            if options["trigger"] and tags.get("trigger") != options[
+                "trigger"
+            ]:
+                continue
+            merged[view].update(stacks)
+            requests[view].append(tags)
+            merged_paths.append(path)
+
+        if not merged:
+            raise CommandError(f"No profile to merge in {directory}")
+
+        output.mkdir(parents=True, exist_ok=True)
+        for view, stacks in sorted(merged.items()):
+            name = view.replace(":", ".")
+            samples = sum(stacks.values())
+            durations = [
+                float(tags["duration_ms"])
+                for tags in requests[view]
+                if "duration_ms" in tags
+            ]
+            title = (
+                f"{view}: {len(requests[view])} requests, {samples} samples"
+            )
+            (output / f"{name}.svg").write_text(
+                render_flamegraph(stacks, title)
+            )
+            (output / f"{name}{PROFILE_SUFFIX}").write_text("".join(
+                f"{stack} {count}\n"
+                for stack, count in stacks.most_common()
+            ))
+
+            self.stdout.write(
+                f"{title}, median "
+                f"{statistics.median(durations or [0]):.1f} ms "
+                f"-> {output / name}.svg"
+            )
+            slowest = sorted(
+                requests[view],
+                key=lambda tags: float(tags.get("duration_ms", 0)),
+                reverse=True,
+            )
+            for tags in slowest[:options["slowest"]]:
+                query = tags.get("query")
+                self.stdout.write(
+                    f"  {tags.get('duration_ms')} ms {tags.get('path', '')}"
+                    f"{'?' + query if query else ''}"
+                )
+
+        if options["clear"]:
+            for path in merged_paths:
+                path.unlink()
+            self.stdout.write(f"Deleted {len(merged_paths)} profiles")
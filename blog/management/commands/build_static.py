@@ -0,0 +1,37 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Collect the static files with hashed names, purged and minified "
+        "CSS and precompressed copies, then report the bytes saved"
+    )
+
+    def handle(self, *args, **options) -> None:
+        call_command("collectstatic", interactive=False, verbosity=0)
+        report = staticfiles_storage.report
+
+        totals = {"original": 0, "optimized": 0, "gzip": 0, "br": 0}
+        for name in sorted(report):
+            entry = report[name]
+            for key in totals:
+                totals[key] += entry.get(key, entry["optimized"])
+            if options["verbosity"] > 1:
+                self.stdout.write(self.format_entry(name, entry))
+
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                self.format_entry(f"{len(report)} files", totals)
+            )
+            self.stdout.write(self.style.SUCCESS("Static files are built"))
+
+    @staticmethod
+    def format_entry(name: str, entry: dict) -> str:
+        sizes = ", ".join(
+            f"{key} {entry[key] / 1024:.1f} KiB"
+            for key in ("original", "optimized", "gzip", "br")
+            if key in entry
+        )
+        return f"{name}: {sizes}"
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.template_warmup import build_manifest, get_manifest_path
+
+
+class Command(BaseCommand):
+    help = (
+        "List the templates used to render the pages in the "
+        "TEMPLATE_MANIFEST_PATH file, new workers compile them at boot"
+    )
+
+    def handle(self, *args, **options) -> None:
+        path = get_manifest_path()
+        if path is None:
+            raise CommandError("TEMPLATE_MANIFEST_PATH is not set")
+
+        manifest = build_manifest(path)
+        listed = sum(len(names) for names in manifest.values())
+        self.stdout.write(
+            self.style.SUCCESS(f"Listed {listed} templates in {path}")
+        )
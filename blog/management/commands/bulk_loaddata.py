@@ -0,0 +1,57 @@
+import sys
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.loading import load
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream large fixtures in the json or jsonl format of dumpdata "
+        "into the database with bulk inserts, '-' reads stdin"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("fixtures", nargs="+")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Objects per INSERT and per transaction",
+        )
+        parser.add_argument(
+            "--keep-indexes",
+            action="store_true",
+            help="Update the indexes on every insert instead of "
+            "building them after the load",
+        )
+
+    def handle(self, *args, **options) -> None:
+        started = time.monotonic()
+        with ExitStack() as stack:
+            try:
+                streams = [
+                    sys.stdin if path == "-" else stack.enter_context(
+                        open(path, encoding="utf-8")
+                    )
+                    for path in options["fixtures"]
+                ]
+            except OSError as error:
+                raise CommandError(error)
+
+            counts = load(
+                streams,
+                batch_size=options["batch_size"],
+                defer_indexes=not options["keep_indexes"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+            )
+
+        summary = ", ".join(
+            f"{count} {label}" for label, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {summary or 'nothing'} "
+            f"in {time.monotonic() - started:.1f} s"
+        ))
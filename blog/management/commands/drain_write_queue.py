@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import writebehind
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert the comments and contact messages of the write-behind "
+        "queue in batches, until it is empty or forever with --interval"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Writes inserted per transaction",
+        )
+        parser.add_argument(
+            "--lease",
+            type=float,
+            default=60,
+            help="Seconds before the writes of a dead worker are retried",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep draining, polling the empty queue every interval",
+        )
+        parser.add_argument(
+            "--requeue-dead",
+            action="store_true",
+            help="Queue the writes moved to dead_writes again first",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["requeue_dead"]:
+            requeued = writebehind.get_queue().requeue_dead()
+            self.stdout.write(f"Requeued {requeued} dead writes")
+        total = 0
+        while True:
+            drained = writebehind.drain(
+                options["batch_size"], options["lease"]
+            )
+            total += drained
+            if drained:
+                continue
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(f"Drained {total} writes")
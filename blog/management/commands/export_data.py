@@ -0,0 +1,94 @@
+from contextlib import ExitStack
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from blog.exporting import (
+    CHUNK_SIZE,
+    EXPORTS,
+    FORMATS,
+    export_queryset,
+    render,
+)
+from blog.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the posts, comments or contact messages to a CSV or "
+        "NDJSON file, the rows are read from the database in chunks"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("export", choices=EXPORTS)
+        parser.add_argument(
+            "--format", choices=FORMATS, default="csv", dest="file_format"
+        )
+        parser.add_argument(
+            "--output", help="File to write, standard output by default"
+        )
+        parser.add_argument(
+            "--since", type=self.date, help="First day, YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "--until", type=self.date, help="Last day, YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "--category",
+            help="Name or id of the category of the posts",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Rows fetched from the database at once",
+        )
+
+    @staticmethod
+    def date(value: str):
+        day = parse_date(value)
+        if not day:
+            raise ValueError(value)
+        return day
+
+    def handle(self, *args, **options) -> None:
+        category = None
+        if options["category"]:
+            lookup = (
+                {"pk": options["category"]}
+                if options["category"].isdigit()
+                else {"name": options["category"]}
+            )
+            category = Category.objects.filter(**lookup).first()
+            if not category:
+                raise CommandError(
+                    f"Unknown category {options['category']}"
+                )
+
+        try:
+            queryset = export_queryset(
+                options["export"],
+                since=options["since"],
+                until=options["until"],
+                category=category,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        with ExitStack() as stack:
+            if options["output"]:
+                output = stack.enter_context(open(
+                    options["output"], "w", encoding="utf-8", newline=""
+                ))
+                write = output.write
+            else:
+                write = partial(self.stdout.write, ending="")
+
+            for line in render(
+                options["export"],
+                queryset,
+                options["file_format"],
+                options["chunk_size"],
+            ):
+                write(line)
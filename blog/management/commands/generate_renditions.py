@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import generate_renditions, rendition_savings
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the missing image renditions of the posts and report "
+        "the size of every format against the original image"
+    )
+
+    def handle(self, *args, **options) -> None:
+        posts = Post.objects.exclude(image="").only(
+            "pk", "image", "renditions"
+        )
+        count = 0
+        for post in posts.iterator():
+            generate_renditions(post)
+            count += 1
+            if options["verbosity"] > 0:
+                self.report(post)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Renditions of {count} posts are ready")
+        )
+
+    def report(self, post) -> None:
+        savings = rendition_savings(post)
+        original = savings.pop("original")
+        self.stdout.write(f"{post.image.name}: {original / 1024:.1f} KiB")
+        for label, sizes in savings.items():
+            formats = ", ".join(
+                f"{fmt} {size / 1024:.1f} KiB "
+                f"({size * 100 / original:.0f}% of the original)"
+                for fmt, size in sizes.items()
+            )
+            self.stdout.write(f"  {label}: {formats}")
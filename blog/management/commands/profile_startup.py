@@ -0,0 +1,162 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ENTRY_POINTS = {
+    "wsgi": "personal_blog.wsgi",
+    "asgi": "personal_blog.asgi",
+}
+
+# Run in a new interpreter, prints the wall and CPU seconds taken by the
+# import of the entry point. With -X importtime every import is
+# reported on stderr
+CHILD = """
+import sys, time
+started, cpu = time.perf_counter(), time.process_time()
+__import__(sys.argv[1])
+print(time.perf_counter() - started, time.process_time() - cpu)
+"""
+
+
+def parse_importtime(output: str) -> list[tuple[str, int, int]]:
+    """
+    Imports reported by -X importtime
+
+    :param output: stderr of the interpreter
+    :return: list of (module, self microseconds, cumulative microseconds)
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            imports.append(
+                (module.strip(), int(own), int(cumulative))
+            )
+
+    return imports
+
+
+def group_of(module: str, app_modules: list[str]) -> str:
+    """
+    Installed app of the module, or its top-level package
+
+    :param app_modules: names of the app packages, longest first
+    """
+    for name in app_modules:
+        if module == name or module.startswith(name + "."):
+            return name
+
+    return module.split(".")[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile the boot of the WSGI or ASGI entry point in new "
+        "interpreters: wall time, then import time by app and by module"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--entry",
+            choices=ENTRY_POINTS,
+            default="wsgi",
+            help="Entry point to import",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Boots timed, without the overhead of -X importtime",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Apps and modules listed",
+        )
+        parser.add_argument(
+            "--output", help="Save the results to this JSON file"
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1")
+
+        boots = [self.boot(options["entry"]) for _ in range(options["runs"])]
+        walls = [wall for wall, _, _ in boots]
+        cpus = [cpu for _, cpu, _ in boots]
+        imports = parse_importtime(
+            self.boot(options["entry"], importtime=True)[2]
+        )
+        total = sum(own for _, own, _ in imports)
+
+        app_modules = sorted(
+            (config.name for config in apps.get_app_configs()),
+            key=len,
+            reverse=True,
+        )
+        by_app = Counter()
+        for module, own, _ in imports:
+            by_app[group_of(module, app_modules)] += own
+        by_module = sorted(imports, key=lambda row: row[1], reverse=True)
+
+        self.stdout.write(
+            f"{ENTRY_POINTS[options['entry']]}: boot median "
+            f"{statistics.median(walls) * 1000:.1f} ms, "
+            f"CPU {statistics.median(cpus) * 1000:.1f} ms, "
+            f"{len(imports)} modules imported in {total / 1000:.1f} ms "
+            f"with -X importtime"
+        )
+        self.stdout.write("\nImport time by app or package")
+        for name, own in by_app.most_common(options["top"]):
+            self.stdout.write(
+                f"{name:<40} {own / 1000:8.1f} ms {own / total:6.1%}"
+            )
+        self.stdout.write("\nSlowest modules, own time (with imports)")
+        for module, own, cumulative in by_module[:options["top"]]:
+            self.stdout.write(
+                f"{module:<40} {own / 1000:8.1f} ms"
+                f" ({cumulative / 1000:.1f} ms)"
+            )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps({
+                "entry": options["entry"],
+                "boot_ms": [wall * 1000 for wall in walls],
+                "cpu_ms": [cpu * 1000 for cpu in cpus],
+                "import_ms": total / 1000,
+                "apps_ms": {
+                    name: own / 1000 for name, own in by_app.most_common()
+                },
+            }, indent=2))
+            self.stdout.write(f"\nSaved to {options['output']}")
+
+    @staticmethod
+    def boot(
+        entry: str, importtime: bool = False
+    ) -> tuple[float, float, str]:
+        """Wall and CPU seconds to import the entry point, and the stderr"""
+        options = ["-X", "importtime"] if importtime else []
+        completed = subprocess.run(
+            [sys.executable, *options, "-c", CHILD, ENTRY_POINTS[entry]],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            raise CommandError(completed.stderr[-2000:])
+
+        wall, cpu = completed.stdout.splitlines()[-1].split()
+
+        return float(wall), float(cpu), completed.stderr
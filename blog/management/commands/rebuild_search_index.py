@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the posts"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of posts indexed per insert",
+        )
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            indexed = rebuild_index(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {indexed} posts")
+        )
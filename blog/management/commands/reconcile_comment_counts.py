@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = "Repair the stored comment counters of the posts"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of posts checked per transaction",
+        )
+
+    def handle(self, *args, **options) -> None:
+        repaired = reconcile_comment_counts(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired {repaired} comment counters")
+        )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.popular import refresh_popular_posts
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached snapshots of the popular posts widget"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep refreshing every N seconds instead of running once",
+        )
+
+    def handle(self, *args, **options) -> None:
+        while True:
+            refresh_popular_posts()
+            self.stdout.write(self.style.SUCCESS("Popular posts refreshed"))
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.replication import replicate
+from blog.routers import get_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary database into the files of DATABASE_REPLICAS, "
+        "once or every --interval seconds"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep replicating every N seconds instead of running once",
+        )
+
+    def handle(self, *args, **options) -> None:
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError("No replica, set DATABASE_REPLICAS")
+
+        while True:
+            for alias in replicas:
+                try:
+                    duration = replicate(alias)
+                except ValueError as error:
+                    raise CommandError(error)
+                self.stdout.write(f"{alias} synced in {duration:.2f}s")
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
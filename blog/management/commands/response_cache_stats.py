@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from blog.caching import reset_response_cache_stats, response_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the hit and miss counters of the response cache, counted "
+        "with the metrics of the requests (METRICS)"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after showing them",
+        )
+
+    def handle(self, *args, **options) -> None:
+        stats = response_cache_stats()
+        self.stdout.write(
+            f"hits: {stats['hit']}\n"
+            f"misses: {stats['miss']}\n"
+            f"bypasses: {stats['bypass']}\n"
+            f"hit ratio: {stats['hit_ratio']:.1%}"
+        )
+
+        if options["reset"]:
+            reset_response_cache_stats()
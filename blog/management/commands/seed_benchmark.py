@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Post
+from blog.seeding import seed_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with generated users, categories, posts and "
+        "comments for the benchmarks, e.g. with DATABASE_NAME=bench.sqlite3"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--comments", type=int, default=5000000)
+        parser.add_argument("--categories", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows per INSERT and per transaction",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="The same seed generates the same data",
+        )
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            help="Add the rows to a database which already has posts",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if Post.objects.exists() and not options["append"]:
+            raise CommandError(
+                "The database already has posts, seed a dedicated "
+                "benchmark database or pass --append"
+            )
+
+        counts = seed_database(
+            posts=options["posts"],
+            comments=options["comments"],
+            categories=options["categories"],
+            users=options["users"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            log=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+
+        summary = ", ".join(
+            f"{count} {name}" for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Inserted {summary}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from blog.fragments import warm_fragments
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the cached fragments of the newest posts and of the "
+        "sidebar widgets, e.g. after a deploy"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=100,
+            help="Number of the newest posts to render",
+        )
+
+    def handle(self, *args, **options) -> None:
+        rendered = warm_fragments(options["posts"], log=self.stdout.write)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rendered {rendered} fragments")
+        )
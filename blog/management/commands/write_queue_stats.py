@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog.writebehind import get_queue
+
+
+class Command(BaseCommand):
+    help = "Show the depth, the drain lag and the counters of the write queue"
+
+    def handle(self, *args, **options) -> None:
+        stats = get_queue().stats()
+        self.stdout.write(
+            f"depth: {stats['depth']} / {stats['max_depth']}\n"
+            f"drain lag: {stats['lag_seconds']:.1f}s\n"
+            f"enqueued: {stats['enqueued']}\n"
+            f"duplicates: {stats['duplicates']}\n"
+            f"rejected: {stats['rejected']}\n"
+            f"drained: {stats['drained']}\n"
+            f"dropped: {stats['dropped']}\n"
+            f"dead: {stats['dead_writes']}"
+        )
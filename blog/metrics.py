@@ -0,0 +1,369 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blog.local_db import LocalDatabase, get_shared
+
+# Upper bounds of the buckets, in seconds and in queries
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89)
+
+# Name: (help, buckets)
+HISTOGRAMS = {
+    "blog_request_duration_seconds": (
+        "Time spent handling the request, middleware and render included",
+        LATENCY_BUCKETS,
+    ),
+    "blog_template_render_seconds": (
+        "Time spent rendering the templates of the request",
+        LATENCY_BUCKETS,
+    ),
+    "blog_db_duration_seconds": (
+        "Time spent in the database by the request",
+        LATENCY_BUCKETS,
+    ),
+    "blog_db_queries": (
+        "Database queries run by the request",
+        QUERY_BUCKETS,
+    ),
+}
+
+# Name: help
+COUNTERS = {
+    "blog_requests_total": "Requests by view and status class",
+    "blog_response_cache_total": (
+        "Lookups of the response cache by view and result"
+    ),
+    "blog_cache_lookups_total": (
+        "Lookups of the default cache by tier and result"
+    ),
+}
+
+# Counters of the TieredCache backend of the process, by tier and result
+CACHE_STATS = {
+    "local_hits": ("local", "hit"),
+    "local_misses": ("local", "miss"),
+    "shared_hits": ("shared", "hit"),
+    "shared_misses": ("shared", "miss"),
+}
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "METRICS", False)
+
+
+class MetricsStore(LocalDatabase):
+    """
+    Metrics of all the worker processes in a SQLite file in WAL mode
+
+    Every process adds what it recorded since its last flush to the
+    rows of the file, in one transaction. Histogram buckets are
+    stored as they are counted, not cumulated.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS metric_values ("
+        "metric TEXT NOT NULL, labels TEXT NOT NULL, "
+        "key TEXT NOT NULL, value REAL NOT NULL, "
+        "PRIMARY KEY (metric, labels, key)) WITHOUT ROWID",
+    )
+
+    # Flushed by the requests, which must not wait long on another
+    # process: a flush failing on the lock is retried by the next one
+    TIMEOUT = 1
+
+    def add(self, values: dict) -> None:
+        """
+        :param values: dict, (metric, labels, key): amount to add
+        """
+        if not values:
+            return
+
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "INSERT INTO metric_values (metric, labels, key, value) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (metric, labels, key) "
+                "DO UPDATE SET value = value + excluded.value",
+                [
+                    (metric, json.dumps(labels), key, value)
+                    for (metric, labels, key), value in values.items()
+                ],
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def read(self) -> dict:
+        """
+        :return: dict, (metric, labels, key): value
+        """
+        return {
+            (metric, tuple(map(tuple, json.loads(labels))), key): value
+            for metric, labels, key, value in self.db.execute(
+                "SELECT metric, labels, key, value FROM metric_values"
+            )
+        }
+
+    def clear(self) -> None:
+        self.db.execute("DELETE FROM metric_values")
+
+    def delete(self, metric: str) -> None:
+        """Reset every series of the metric"""
+        self.db.execute(
+            "DELETE FROM metric_values WHERE metric = ?", (metric,)
+        )
+
+
+class Recorder:
+    """
+    Metrics recorded by the process since its last flush
+
+    Recording only updates a dict, the store is written at most every
+    METRICS_FLUSH_INTERVAL seconds, when the process exits and before
+    the metrics are served
+    """
+
+    def __init__(self) -> None:
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._cache_stats = {}
+
+    def observe(self, metric: str, labels: tuple, value: float) -> None:
+        """Count the value in its bucket of the histogram"""
+        buckets = HISTOGRAMS[metric][1]
+        bucket = f"bucket:{bisect_left(buckets, value)}"
+        with self._lock:
+            self._values[metric, labels, bucket] += 1
+            self._values[metric, labels, "sum"] += value
+            self._values[metric, labels, "count"] += 1
+
+    def increment(self, metric: str, labels: tuple, amount=1) -> None:
+        with self._lock:
+            self._values[metric, labels, "value"] += amount
+
+    def is_due(self) -> bool:
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+        return time.monotonic() - self._flushed_at >= interval
+
+    def flush(self) -> None:
+        """Add the metrics of the process to the store"""
+        self._record_cache_stats()
+        with self._lock:
+            values, self._values = self._values, defaultdict(float)
+            self._flushed_at = time.monotonic()
+        try:
+            get_store().add(values)
+        except (sqlite3.Error, OSError):
+            # Kept for the next flush
+            with self._lock:
+                for key, value in values.items():
+                    self._values[key] += value
+            raise
+
+    def _record_cache_stats(self) -> None:
+        stats = getattr(cache, "stats", None)
+        if stats is None:
+            return
+
+        stats = stats()
+        for name, (tier, result) in CACHE_STATS.items():
+            if name not in stats:
+                continue
+            delta = stats[name] - self._cache_stats.get(name, 0)
+            self._cache_stats[name] = stats[name]
+            if delta:
+                self.increment(
+                    "blog_cache_lookups_total",
+                    (("tier", tier), ("result", result)),
+                    delta,
+                )
+
+
+_recorder = Recorder()
+
+
+def get_recorder() -> Recorder:
+    return _recorder
+
+
+def get_store() -> MetricsStore:
+    """Store of METRICS_PATH shared by the threads of the process"""
+    return get_shared(MetricsStore, getattr(
+        settings,
+        "METRICS_PATH",
+        Path(settings.BASE_DIR) / "cache" / "metrics.sqlite3",
+    ))
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if is_enabled():
+        try:
+            _recorder.flush()
+        except Exception:
+            pass
+
+
+class RequestMetrics:
+    """Timings of one request that the query inspector does not cover"""
+
+    def __init__(self) -> None:
+        self.template_time = 0.0
+        self.rendering = False
+
+
+# Metrics of the current request, shared with its sync_to_async threads
+_current = ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def collecting() -> Iterator[RequestMetrics]:
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def template_timer() -> Iterator[None]:
+    """
+    Add the time of the block to the render time of the request
+
+    A template rendered while another one renders (render_to_string()
+    in a template tag) is already part of its time
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.rendering:
+        yield
+        return
+
+    metrics.rendering = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_time += time.perf_counter() - started
+        metrics.rendering = False
+
+
+def record_request(
+    view_name: Optional[str],
+    status: int,
+    duration: float,
+    inspector,
+    metrics: RequestMetrics,
+    response_cache: Optional[str] = None,
+) -> None:
+    """
+    :param view_name: URL name of the view, None when none matched
+    :param status: status code of the response
+    :param duration: seconds spent handling the request
+    :param inspector: QueryInspector of the request
+    :param metrics: RequestMetrics of the request
+    :param response_cache: hit, miss or bypass, see lookup_response()
+    """
+    # Paths that match no view share one label, scans of random URLs
+    # must not create series
+    labels = (("view", view_name or "unresolved"),)
+    recorder = get_recorder()
+    recorder.observe("blog_request_duration_seconds", labels, duration)
+    recorder.observe(
+        "blog_template_render_seconds", labels, metrics.template_time
+    )
+    recorder.observe("blog_db_duration_seconds", labels, inspector.db_time)
+    recorder.observe("blog_db_queries", labels, inspector.count)
+    recorder.increment(
+        "blog_requests_total", labels + (("status", f"{status // 100}xx"),)
+    )
+    if response_cache:
+        recorder.increment(
+            "blog_response_cache_total",
+            labels + (("result", response_cache),),
+        )
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    # Counts stay integers however large, the sums keep their digits
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_metrics(values: dict) -> str:
+    """
+    Metrics in the Prometheus text format
+
+    :param values: dict of MetricsStore.read()
+    :return: str
+    """
+    series = defaultdict(lambda: defaultdict(dict))
+    for (metric, labels, key), value in values.items():
+        series[metric][labels][key] = value
+
+    lines = []
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, sample in sorted(series[metric].items()):
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in buckets] + ["+Inf"]
+            for index, bound in enumerate(bounds):
+                cumulative += sample.get(f"bucket:{index}", 0)
+                lines.append(
+                    f"{metric}_bucket"
+                    f"{_format_labels(labels + (('le', bound),))} "
+                    f"{_format_value(cumulative)}"
+                )
+            lines.append(
+                f"{metric}_sum{_format_labels(labels)} "
+                f"{_format_value(sample.get('sum', 0))}"
+            )
+            lines.append(
+                f"{metric}_count{_format_labels(labels)} "
+                f"{_format_value(sample.get('count', 0))}"
+            )
+
+    for metric, help_text in COUNTERS.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for labels, sample in sorted(series[metric].items()):
+            lines.append(
+                f"{metric}{_format_labels(labels)} "
+                f"{_format_value(sample['value'])}"
+            )
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,288 @@
+import asyncio
+import inspect
+import logging
+import sqlite3
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+
+from blog import metrics, profiling
+from blog.queries import QueryInspector, get_query_budget
+from blog.routers import get_replicas, routing
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency histograms of every request, see blog.metrics
+
+    The request time, the time spent rendering templates and in the
+    database and the number of queries are recorded by view name, with
+    the outcome of the response cache. First in MIDDLEWARE, so the
+    time of the other middleware is included. Enabled by METRICS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not metrics.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        with QueryInspector() as inspector, metrics.collecting() as timings:
+            response = self.get_response(request)
+        self.record(request, response, started, inspector, timings)
+
+        if metrics.get_recorder().is_due():
+            self.flush()
+
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        with QueryInspector() as inspector, metrics.collecting() as timings:
+            response = await self.get_response(request)
+        self.record(request, response, started, inspector, timings)
+
+        if metrics.get_recorder().is_due():
+            await sync_to_async(self.flush)()
+
+        return response
+
+    @staticmethod
+    def flush() -> None:
+        """
+        Add the metrics of the process to the store
+
+        The page already rendered: a store that can not be written is
+        logged and the metrics are kept for the next flush
+        """
+        try:
+            metrics.get_recorder().flush()
+        except (sqlite3.Error, OSError):
+            logger.warning("Could not flush the metrics", exc_info=True)
+
+    @staticmethod
+    def record(
+        request: HttpRequest,
+        response: HttpResponse,
+        started: float,
+        inspector: QueryInspector,
+        timings,
+    ) -> None:
+        metrics.record_request(
+            getattr(request.resolver_match, "view_name", None),
+            response.status_code,
+            time.perf_counter() - started,
+            inspector,
+            timings,
+            getattr(request, "response_cache", None),
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Sample the stacks of the slow requests, see blog.profiling
+
+    A PROFILER_SAMPLE_RATE fraction of the requests is profiled, and
+    with PROFILER_SLOW_SECONDS every request is and the ones over it
+    are kept. The profiles go to PROFILER_DIR, build_flamegraphs merges
+    them by view. Off unless one of the two settings is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not profiling.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile = profiling.start(inspect.currentframe())
+        if profile is None:
+            return self.get_response(request)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.stop(profile)
+        if profile.is_kept():
+            profiling.save(profile, request)
+
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        profile = profiling.start(
+            inspect.currentframe(), asyncio.current_task()
+        )
+        if profile is None:
+            return await self.get_response(request)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.stop(profile)
+        if profile.is_kept():
+            await sync_to_async(profiling.save)(profile, request)
+
+        return response
+
+
+class QueryInspectionMiddleware:
+    """
+    Record the queries of every request
+
+    The number of queries and the time spent in the database go to the
+    Server-Timing header (shown by the network tab of the browsers),
+    N+1 query shapes and views over their QUERY_BUDGETS entry are
+    logged as warnings. Enabled by QUERY_INSPECTION, DEBUG by default.
+    Sync and async capable, it does not force a thread hop on either
+    handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not getattr(settings, "QUERY_INSPECTION", settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+
+        return self.report(request, response, inspector)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with QueryInspector() as inspector:
+            response = await self.get_response(request)
+
+        return self.report(request, response, inspector)
+
+    @staticmethod
+    def report(
+        request: HttpRequest, response: HttpResponse, inspector
+    ) -> HttpResponse:
+        response["Server-Timing"] = (
+            f"db;dur={inspector.db_time * 1000:.1f};"
+            f'desc="{inspector.count} queries"'
+        )
+
+        view_name = getattr(request.resolver_match, "view_name", None)
+        for shape, count in inspector.n_plus_one().items():
+            logger.warning(
+                "N+1 queries in %s: %d runs of %s", view_name, count, shape
+            )
+        budget = get_query_budget(view_name)
+        if budget is not None and inspector.count > budget:
+            logger.warning(
+                "%s ran %d queries, over its budget of %d",
+                view_name,
+                inspector.count,
+                budget,
+            )
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of the request to a replica, see blog.routers
+
+    A client that wrote gets a cookie pinning its next requests to the
+    primary for REPLICA_PIN_SECONDS, longer than the replication lag,
+    so it reads its own comment. Only used with DATABASE_REPLICAS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie = getattr(settings, "REPLICA_PIN_COOKIE", "primary")
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with routing(self.cookie in request.COOKIES) as state:
+            response = self.get_response(request)
+
+        return self.pin(response, state)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with routing(self.cookie in request.COOKIES) as state:
+            response = await self.get_response(request)
+
+        return self.pin(response, state)
+
+    def pin(self, response: HttpResponse, state) -> HttpResponse:
+        if state.wrote:
+            response.set_cookie(
+                self.cookie,
+                "1",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
+
+
+class AsyncViewsMiddleware:
+    """
+    Route the requests of the ASGI handler to the async views
+
+    The main pages have async variants (blog.async_views) reading with
+    the async ORM, the requests of an async middleware chain are
+    resolved with ASGI_URLCONF and the WSGI handler keeps ROOT_URLCONF
+    and its sync views. Not used by a sync chain or without the setting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.urlconf = getattr(settings, "ASGI_URLCONF", None)
+        if not self.urlconf or not iscoroutinefunction(get_response):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        markcoroutinefunction(self)
+
+    async def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.urlconf = self.urlconf
+
+        return await self.get_response(request)
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:12
+
+import html
+import re
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+import django.db.models.deletion
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_terms(title, content):
+    """
+    Frozen copy of blog.search.build_terms, the migration must index
+    the posts the same way whatever the module becomes
+    """
+    weights = Counter()
+    for text, weight in ((title, 5), (content, 1)):
+        text = html.unescape(strip_tags(text or ""))
+        for term in TOKEN_RE.findall(text.lower()):
+            if 2 <= len(term) <= 64:
+                weights[term] += weight
+
+    return weights
+
+
+def index_existing_posts(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    PostSearchTerm = apps.get_model("blog", "PostSearchTerm")
+
+    for pk, title, content in Post.objects.values_list(
+        "pk", "title", "content"
+    ).iterator():
+        PostSearchTerm.objects.bulk_create(
+            PostSearchTerm(post_id=pk, term=term, weight=weight)
+            for term, weight in build_terms(title, content).items()
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostSearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64)),
+                ("weight", models.PositiveIntegerField(default=1)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to="blog.post",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["term", "post", "weight"], name="blog_search_term_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="postsearchterm",
+            constraint=models.UniqueConstraint(
+                fields=("post", "term"), name="unique_post_search_term"
+            ),
+        ),
+        migrations.RunPython(
+            index_existing_posts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0003_post_comments_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
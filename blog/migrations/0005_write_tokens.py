@@ -0,0 +1,26 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0004_post_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="write_token",
+            field=models.CharField(
+                blank=True, editable=False, max_length=40, null=True, unique=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="contactmessage",
+            name="write_token",
+            field=models.CharField(
+                blank=True, editable=False, max_length=40, null=True, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0005_write_tokens"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="blog_comment_post_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contactmessage",
+            index=models.Index(
+                fields=["-created_at"], name="blog_contact_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="blog_post_created_idx"
+            ),
+        ),
+        # The posts of a category, read from the index alone. The
+        # through table is created by Django, so the index is not in the
+        # migration state. The category_id index Django names with a
+        # hash is kept.
+        migrations.RunSQL(
+            'CREATE INDEX "blog_post_categories_category_post_idx" '
+            'ON "blog_post_categories" ("category_id", "post_id")',
+            'DROP INDEX "blog_post_categories_category_post_idx"',
+        ),
+    ]
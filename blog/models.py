@@ -2,6 +2,11 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+# Length of the deduplication tokens of the write-behind queue: the
+# SHA-1 hex digests stored by the models, and at most the random token
+# of the forms
+WRITE_TOKEN_LENGTH = 40
+
 
 class User(AbstractUser):
     pass
@@ -27,6 +32,9 @@ class Post(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Version of the cached fragments of the post, bumped by every save
+    # and by the renditions of its image
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -34,9 +42,24 @@ class Post(models.Model):
     )
     categories = models.ManyToManyField(Category, related_name="posts")
     image = models.ImageField(upload_to="post_images", default="", blank=True)
+    # Manifest of the pre-generated image renditions, see blog.images
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Denormalized number of comments, maintained by the signals
+    # of the Comment model and repaired by reconcile_comment_counts
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-comments_count", "-created_at"],
+                name="blog_post_most_commented_idx",
+            ),
+            # Keyset pagination of the listing, see blog.pagination
+            models.Index(
+                fields=["-created_at", "-id"], name="blog_post_created_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -54,9 +77,24 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name="comments"
     )
+    # Deduplication token of the write-behind queue, see blog.writebehind
+    write_token = models.CharField(
+        max_length=WRITE_TOKEN_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of the comments of a post
+            models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="blog_comment_post_created_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text
@@ -68,9 +106,49 @@ class ContactMessage(models.Model):
     subject = models.CharField(max_length=100)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    write_token = models.CharField(
+        max_length=WRITE_TOKEN_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at"], name="blog_contact_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class PostSearchTerm(models.Model):
+    """Posting of the inverted search index, one row per term of a post"""
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+        db_index=False,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "term"], name="unique_post_search_term"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["term", "post", "weight"],
+                name="blog_search_term_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.term
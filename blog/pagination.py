@@ -0,0 +1,184 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+from django.db.models import Model, QuerySet
+from django.utils.functional import cached_property
+
+NEXT = "n"
+PREVIOUS = "p"
+
+# Largest primary key of a 64-bit integer column
+MAX_PK = 2 ** 63 - 1
+
+
+class CursorPage(Sequence):
+    """
+    A page of the keyset paginator
+
+    Mirrors the part of django.core.paginator.Page the templates need,
+    instead of page numbers it exposes the cursors of the neighbour pages
+    """
+
+    def __init__(
+        self,
+        object_list: list,
+        paginator: "CursorPaginator",
+        next_cursor: Optional[str] = None,
+        previous_cursor: Optional[str] = None,
+    ) -> None:
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self) -> str:
+        return f"<CursorPage of {len(self)} objects>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator for querysets ordered by -created_at
+
+    The page is selected by a (created_at, id) cursor of its neighbour,
+    so every page is a single index range query of per_page + 1 rows
+    no matter how deep it is. Nothing is counted unless the count
+    property is used explicitly.
+    """
+
+    keyset = True
+
+    def __init__(self, object_list: QuerySet, per_page: int) -> None:
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    @cached_property
+    def count(self) -> int:
+        """Total number of objects, optional and not used by the pages"""
+        return self.object_list.count()
+
+    def get_page(self, cursor: Optional[str]) -> CursorPage:
+        """
+        Return the page for the cursor from the query string
+
+        A missing or malformed cursor returns the first page
+        in the same way Paginator.get_page() tolerates bad numbers
+
+        :param cursor: cursor of the next or previous page
+        :return: CursorPage
+        """
+        rows, build = self._page_query(cursor)
+
+        return build(list(rows))
+
+    async def aget_page(self, cursor: Optional[str]) -> CursorPage:
+        """get_page() of the async API views, rows are read with async for"""
+        rows, build = self._page_query(cursor)
+
+        return build([row async for row in rows])
+
+    def _page_query(self, cursor: Optional[str]) -> tuple:
+        """Query of the rows of the page and the function building it"""
+        position = self.decode_cursor(cursor)
+        if position is None:
+            return self.ordered()[:self.per_page + 1], partial(
+                self._forward_page, has_previous=False
+            )
+
+        direction, created_at, pk = position
+        if direction == NEXT:
+            return self.after(created_at, pk)[:self.per_page + 1], partial(
+                self._forward_page, has_previous=True
+            )
+
+        return (
+            self.before(created_at, pk)[:self.per_page + 1],
+            self._backward_page,
+        )
+
+    def ordered(self) -> QuerySet:
+        return self.object_list.order_by("-created_at", "-id")
+
+    def after(self, created_at: datetime, pk: int) -> QuerySet:
+        """Objects older than the cursor, newest first"""
+        return self.ordered().filter(
+            created_at__lte=created_at
+        ).exclude(created_at=created_at, id__gte=pk)
+
+    def before(self, created_at: datetime, pk: int) -> QuerySet:
+        """Objects newer than the cursor, oldest first"""
+        return self.object_list.order_by("created_at", "id").filter(
+            created_at__gte=created_at
+        ).exclude(created_at=created_at, id__lte=pk)
+
+    def _forward_page(self, rows: list, has_previous: bool) -> CursorPage:
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        return self._page(rows, has_next, has_previous and bool(rows))
+
+    def _backward_page(self, rows: list) -> CursorPage:
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+
+        return self._page(rows, bool(rows), has_previous)
+
+    def _page(
+        self, rows: list, has_next: bool, has_previous: bool
+    ) -> CursorPage:
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=(
+                self.encode_cursor(NEXT, rows[-1]) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(PREVIOUS, rows[0]) if has_previous
+                else None
+            ),
+        )
+
+    @staticmethod
+    def encode_cursor(direction: str, obj: Model) -> str:
+        data = json.dumps([direction, obj.created_at.isoformat(), obj.pk])
+
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+        if not cursor:
+            return None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, created_at, pk = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            pk = int(pk)
+            position = (direction, datetime.fromisoformat(created_at), pk)
+        except (binascii.Error, OverflowError, TypeError, ValueError):
+            return None
+
+        # Out of the range of the SQLite integers, the query would fail
+        if direction not in (NEXT, PREVIOUS) or not 0 < pk <= MAX_PK:
+            return None
+
+        return position
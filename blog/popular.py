@@ -0,0 +1,191 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.caching import POPULAR_TAG, get_tag_versions, invalidate_tags
+from blog.models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+# Popularity windows, None ranks by the comments of all time
+WINDOWS = {
+    "all": None,
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+SNAPSHOT_KEY = "popular_posts:{window}"
+REFRESH_LOCK_KEY = "popular_posts:refresh_lock"
+REFRESH_LOCK_TIMEOUT = 60
+REFRESH_PENDING_KEY = "popular_posts:refresh_pending"
+
+_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="popular-posts"
+)
+
+
+def snapshot_size() -> int:
+    return getattr(settings, "POPULAR_POSTS_COUNT", 5)
+
+
+def fresh_for() -> int:
+    return getattr(settings, "POPULAR_POSTS_FRESH_FOR", 300)
+
+
+def compute_popular_posts(window: str, count: int) -> list[dict]:
+    """
+    Rank the posts by the number of comments in the window
+
+    :param window: one of the WINDOWS keys
+    :param count: number of posts in the ranking
+    :return: list of dicts with id, title and comments
+    """
+    period = WINDOWS[window]
+    if period is None:
+        posts = Post.objects.order_by("-comments_count", "-created_at")
+        return [
+            {"id": pk, "title": title, "comments": comments}
+            for pk, title, comments in posts.values_list(
+                "pk", "title", "comments_count"
+            )[:count]
+        ]
+
+    ranking = (
+        Comment.objects.filter(created_at__gte=timezone.now() - period)
+        .order_by()
+        .values_list("post_id", "post__title")
+        .annotate(comments=Count("pk"))
+        .order_by("-comments", "-post_id")
+    )
+
+    return [
+        {"id": pk, "title": title, "comments": comments}
+        for pk, title, comments in ranking[:count]
+    ]
+
+
+def refresh_popular_posts() -> None:
+    """
+    Recompute the snapshots of every window and store them in cache
+
+    The cached pages showing the widget are invalidated
+    only when some ranking has actually changed
+    """
+    changed = False
+    for window in WINDOWS:
+        key = SNAPSHOT_KEY.format(window=window)
+        previous = cache.get(key)
+        posts = compute_popular_posts(window, snapshot_size())
+        changed = changed or previous is None or (
+            _displayed(previous["posts"]) != _displayed(posts)
+        )
+        cache.set(
+            key,
+            {"posts": posts, "computed_at": time.time()},
+            timeout=None,
+        )
+
+    if changed:
+        invalidate_tags(POPULAR_TAG)
+
+
+def _displayed(posts: list[dict]) -> list[tuple]:
+    return [(post["id"], post["title"]) for post in posts]
+
+
+def get_snapshot(window: str = "all") -> Optional[dict]:
+    """
+    Snapshot of the ranking, never computed in the request
+
+    A missing or stale snapshot schedules a background refresh and the
+    stale one (or None on a cold cache) is returned meanwhile
+
+    :param window: one of the WINDOWS keys
+    :return: dict with the posts and computed_at, or None
+    """
+    snapshot = cache.get(SNAPSHOT_KEY.format(window=window))
+    if snapshot is None:
+        schedule_refresh()
+        return None
+
+    if time.time() - snapshot["computed_at"] > fresh_for():
+        schedule_refresh()
+
+    return snapshot
+
+
+def get_popular_posts(window: str = "all", count: int = 5) -> list[dict]:
+    """
+    Read the ranking from its snapshot, see get_snapshot()
+
+    :param window: one of the WINDOWS keys
+    :param count: number of posts to return
+    :return: list of dicts with id, title and comments
+    """
+    snapshot = get_snapshot(window)
+
+    return snapshot["posts"][:count] if snapshot else []
+
+
+def ranking_version(window: str = "all") -> int:
+    """
+    Version of the rankings shown by the widget
+
+    refresh_popular_posts() bumps it only when a ranking changes, the
+    stale snapshot is refreshed like by get_snapshot()
+    """
+    get_snapshot(window)
+
+    return get_tag_versions([POPULAR_TAG])[POPULAR_TAG]
+
+
+def schedule_refresh() -> None:
+    """
+    Refresh the snapshots in a background thread
+
+    The refresh waits for the current transaction, so a new comment
+    is already visible to it, and only one refresh runs at a time. A
+    refresh requested while one runs is left pending and run once the
+    current one finishes, it might not see the new comment.
+    """
+    transaction.on_commit(_submit_refresh)
+
+
+def _submit_refresh() -> None:
+    if not cache.add(REFRESH_LOCK_KEY, True, timeout=REFRESH_LOCK_TIMEOUT):
+        cache.set(REFRESH_PENDING_KEY, True, timeout=REFRESH_LOCK_TIMEOUT)
+        # The running refresh may have released the lock before the
+        # flag was set, without seeing it
+        if not cache.add(
+            REFRESH_LOCK_KEY, True, timeout=REFRESH_LOCK_TIMEOUT
+        ):
+            return
+    _executor.submit(_refresh_in_background)
+
+
+def _refresh_in_background() -> None:
+    while True:
+        try:
+            refresh_popular_posts()
+        except Exception:
+            logger.exception("Popular posts refresh failed")
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+            connections.close_all()
+
+        if not (
+            cache.delete(REFRESH_PENDING_KEY)
+            and cache.add(
+                REFRESH_LOCK_KEY, True, timeout=REFRESH_LOCK_TIMEOUT
+            )
+        ):
+            break
@@ -0,0 +1,362 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from html import escape
+from pathlib import Path
+from typing import Optional
+
+from asgiref.sync import SyncToAsync
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".collapsed"
+
+# Size of the frames of the flamegraphs, in pixels
+FLAMEGRAPH_WIDTH = 1200
+FRAME_HEIGHT = 16
+CHAR_WIDTH = 7
+
+
+def get_sample_rate() -> float:
+    return getattr(settings, "PROFILER_SAMPLE_RATE", 0)
+
+
+def get_slow_seconds() -> float:
+    return getattr(settings, "PROFILER_SLOW_SECONDS", 0)
+
+
+def is_enabled() -> bool:
+    return get_sample_rate() > 0 or get_slow_seconds() > 0
+
+
+def get_profile_dir() -> Path:
+    return Path(getattr(
+        settings,
+        "PROFILER_DIR",
+        Path(settings.BASE_DIR) / "cache" / "profiles",
+    ))
+
+
+def frame_name(frame) -> str:
+    """Module and qualified name of the function of the frame"""
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+
+    # co_qualname is new in Python 3.11
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame, root=None) -> str:
+    """
+    Stack of the frame in the collapsed format, outermost frame first
+
+    :param frame: innermost frame
+    :param root: frame the stack starts at when it is part of it, the
+        frames of the server above it are dropped
+    :return: str, frame names joined by semicolons
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        if frame is root:
+            break
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+class Profile:
+    """
+    Stacks sampled from the threads working on one request
+
+    Under the WSGI handler that is the thread of the request. Under
+    the ASGI one it is the event loop while it runs the task of the
+    request, and the threads of its sync_to_async() calls.
+    """
+
+    def __init__(self, root, sampled: bool, task=None) -> None:
+        self.root = root
+        self.sampled = sampled
+        self.task = task
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def thread_ids(self) -> list[int]:
+        if self.task is None:
+            return [self.thread_id]
+
+        ids = []
+        if asyncio.current_task(self.task.get_loop()) is self.task:
+            ids.append(self.thread_id)
+        # Threads of the sync_to_async() calls awaited by the task,
+        # launch_map is internal to asgiref and may go away
+        launch_map = getattr(SyncToAsync, "launch_map", {})
+        for thread, task in list(launch_map.items()):
+            if task is self.task:
+                ids.append(thread.ident)
+
+        return ids
+
+    def sample(self, frames: dict) -> None:
+        """
+        :param frames: dict of sys._current_frames()
+        """
+        for thread_id in self.thread_ids():
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame, self.root)] += 1
+
+    def is_kept(self) -> bool:
+        """Sampled, or slower than PROFILER_SLOW_SECONDS"""
+        if not self.stacks:
+            return False
+        slow = get_slow_seconds()
+
+        return self.sampled or (slow > 0 and self.duration >= slow)
+
+
+class Sampler:
+    """
+    Thread sampling the stacks of the profiled requests of the process
+
+    It sleeps while no request is profiled, and is started again in a
+    forked worker.
+    """
+
+    def __init__(self) -> None:
+        self._profiles = set()
+        self._condition = threading.Condition()
+        self._pid = None
+
+    def add(self, profile: Profile) -> None:
+        with self._condition:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                ).start()
+            self._profiles.add(profile)
+            self._condition.notify()
+
+    def remove(self, profile: Profile) -> None:
+        with self._condition:
+            self._profiles.discard(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._profiles:
+                    self._condition.wait()
+            time.sleep(getattr(settings, "PROFILER_INTERVAL", 0.005))
+
+            # Under the lock, a stopped profile is no longer written to
+            with self._condition:
+                frames = sys._current_frames()
+                for profile in self._profiles:
+                    profile.sample(frames)
+                del frames
+
+
+_sampler = Sampler()
+_saved = deque()
+_saved_lock = threading.Lock()
+
+
+def start(root, task=None) -> Optional[Profile]:
+    """
+    Profile the request when it is sampled by PROFILER_SAMPLE_RATE, or
+    every request when PROFILER_SLOW_SECONDS is set, as it is only
+    known at the end whether it was slow
+
+    :param root: frame of the middleware, where the stacks start
+    :param task: asyncio task of the request under the ASGI handler
+    :return: Profile, None when the request is not profiled
+    """
+    sampled = random.random() < get_sample_rate()
+    if not sampled and get_slow_seconds() <= 0:
+        return None
+
+    profile = Profile(root, sampled, task)
+    _sampler.add(profile)
+
+    return profile
+
+
+def stop(profile: Profile) -> None:
+    _sampler.remove(profile)
+    profile.duration = time.perf_counter() - profile.started
+    # The frame of the middleware keeps its locals alive
+    profile.root = None
+
+
+def _tag(value: str) -> str:
+    return value.replace("\r", "\\r").replace("\n", "\\n")
+
+
+def _allow_save() -> bool:
+    """At most PROFILER_MAX_PER_MINUTE profiles saved by the process"""
+    limit = getattr(settings, "PROFILER_MAX_PER_MINUTE", 20)
+    now = time.monotonic()
+    with _saved_lock:
+        while _saved and now - _saved[0] > 60:
+            _saved.popleft()
+        if len(_saved) >= limit:
+            return False
+        _saved.append(now)
+
+    return True
+
+
+def save(profile: Profile, request) -> Optional[Path]:
+    """
+    Write the stacks of the request to PROFILER_DIR, tagged with its
+    URL name, path and query string
+
+    :param profile: stopped Profile of the request
+    :param request: request
+    :return: Path of the profile, None when over the rate limit or it
+        could not be written
+    """
+    view_name = getattr(request.resolver_match, "view_name", None)
+    if not _allow_save():
+        logger.info(
+            "Dropped the profile of %s, over PROFILER_MAX_PER_MINUTE",
+            view_name,
+        )
+        return None
+
+    tags = {
+        "view": view_name or "unresolved",
+        "path": request.path,
+        "query": request.META.get("QUERY_STRING", "")[:500],
+        "trigger": "sample" if profile.sampled else "slow",
+        "duration_ms": f"{profile.duration * 1000:.1f}",
+        "interval_ms": (
+            f"{getattr(settings, 'PROFILER_INTERVAL', 0.005) * 1000:g}"
+        ),
+    }
+    lines = [f"# {name}: {_tag(value)}" for name, value in tags.items()]
+    lines.extend(
+        f"{stack} {count}" for stack, count in profile.stacks.items()
+    )
+
+    directory = get_profile_dir()
+    path = directory / (
+        f"{tags['view'].replace(':', '.')}-{time.time_ns()}-{os.getpid()}"
+        f"{PROFILE_SUFFIX}"
+    )
+    # The page already rendered, a full or read-only disk must not
+    # fail it
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n")
+    except OSError:
+        logger.warning(
+            "Could not save the profile of %s", view_name, exc_info=True
+        )
+        return None
+
+    return path
+
+
+def read_profile(path: Path) -> tuple[dict, Counter]:
+    """
+    :param path: file written by save()
+    :return: tuple of the tags and the sample counts by stack
+    """
+    tags, stacks = {}, Counter()
+    for line in Path(path).read_text().splitlines():
+        if line.startswith("# "):
+            name, _, value = line[2:].partition(": ")
+            tags[name] = value
+        elif line.strip():
+            stack, _, count = line.rpartition(" ")
+            stacks[stack] += int(count)
+
+    return tags, stacks
+
+
+def _frame_color(name: str) -> str:
+    # Warm colors, the same for a function in every flamegraph
+    digest = zlib.crc32(name.encode())
+    red = 205 + digest % 50
+    green = (digest >> 8) % 230
+    blue = (digest >> 16) % 55
+
+    return f"rgb({red},{green},{blue})"
+
+
+def render_flamegraph(stacks: Counter, title: str) -> str:
+    """
+    Flamegraph of the stacks as a standalone SVG
+
+    The width of a frame is its share of the samples, its callers are
+    below it. The frames too narrow to see are left out, hovering a
+    frame shows its name and samples.
+
+    :param stacks: sample counts by collapsed stack
+    :param title: title drawn above the graph
+    :return: str
+    """
+    root = {"value": 0, "children": {}}
+    for stack, count in stacks.items():
+        node = root
+        node["value"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(
+                name, {"value": 0, "children": {}}
+            )
+            node["value"] += count
+
+    total = root["value"] or 1
+    scale = (FLAMEGRAPH_WIDTH - 20) / total
+    frames = []
+
+    def layout(name: str, node: dict, x: float, depth: int) -> None:
+        width = node["value"] * scale
+        if width < 0.5:
+            return
+        frames.append((name, node["value"], x, depth, width))
+        for child_name, child in sorted(node["children"].items()):
+            layout(child_name, child, x, depth + 1)
+            x += child["value"] * scale
+
+    layout("all", root, 10, 0)
+    depth = max(frame[3] for frame in frames) + 1
+    height = depth * FRAME_HEIGHT + 50
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{FLAMEGRAPH_WIDTH}" height="{height}" '
+        f'font-family="Verdana, sans-serif" font-size="12">',
+        '<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        f'<text x="{FLAMEGRAPH_WIDTH // 2}" y="24" text-anchor="middle" '
+        f'font-size="16">{escape(title)}</text>',
+    ]
+    for name, value, x, level, width in frames:
+        y = height - 10 - (level + 1) * FRAME_HEIGHT
+        label = ""
+        chars = int((width - 6) // CHAR_WIDTH)
+        if chars >= 3:
+            label = name if len(name) <= chars else name[:chars - 2] + ".."
+        parts.append(
+            f"<g><title>{escape(name)} ({value} samples, "
+            f"{value / total:.1%})</title>"
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" '
+            f'height="{FRAME_HEIGHT - 1}" fill="{_frame_color(name)}" '
+            f'rx="2"/>'
+            f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}">'
+            f"{escape(label)}</text></g>"
+        )
+    parts.append("</svg>")
+
+    return "\n".join(parts) + "\n"
@@ -0,0 +1,152 @@
+import re
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+Query = namedtuple("Query", ["alias", "sql", "params", "duration"])
+
+_STRING = re.compile(r"'(?:''|[^'])*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUES = re.compile(r"\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)")
+
+# Inspectors of the current context, sync_to_async() copies the context
+# to the thread running the synchronous code of an async request
+_active = ContextVar("query_inspectors", default=())
+
+
+def query_shape(sql: str) -> str:
+    """
+    SQL with the literals replaced and the IN lists collapsed
+
+    Queries of the same shape only differ in their params, the same
+    shape run over and over in one request is the N+1 pattern
+    """
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+
+    return _VALUES.sub("(...)", shape)
+
+
+def get_query_budget(view_name: Optional[str]) -> Optional[int]:
+    """Declared maximum number of queries of the view, None without one"""
+    return getattr(settings, "QUERY_BUDGETS", {}).get(view_name)
+
+
+class QueryInspector:
+    """
+    Record the queries of every database connection inside the block
+
+    The queries are recorded with connection.execute_wrapper(), so
+    unlike connection.queries it works with DEBUG turned off
+
+        with QueryInspector() as inspector:
+            response = view(request)
+        inspector.n_plus_one()
+
+    Connections are per thread. The connections opened inside the block
+    by other threads are followed too, e.g. the ones of the threads
+    running the synchronous code of async views and of the ASGI
+    handler, but only the queries run in the context of the block
+    (the one of its request) are recorded
+    """
+
+    def __init__(self, n_plus_one_threshold: Optional[int] = None) -> None:
+        self.n_plus_one_threshold = n_plus_one_threshold or getattr(
+            settings, "QUERY_N_PLUS_ONE_THRESHOLD", 3
+        )
+        self.queries = []
+        self._stack = None
+        self._token = None
+        self._attached = []
+
+    def __enter__(self) -> "QueryInspector":
+        self._token = _active.set(_active.get() + (self,))
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(self)
+            )
+        connection_created.connect(self._attach, weak=False)
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stack.close()
+        connection_created.disconnect(self._attach)
+        for connection in self._attached:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+        self._attached = []
+        _active.reset(self._token)
+
+    def _attach(self, sender, connection, **kwargs) -> None:
+        # Sent in the thread opening the connection, only the threads
+        # working for the block share its context
+        if self in _active.get() and self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+            self._attached.append(connection)
+
+    def __call__(self, execute, sql, params, many, context):
+        if self not in _active.get():
+            # A query of another request sharing the connection hook
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(Query(
+                context["connection"].alias,
+                sql,
+                params,
+                time.perf_counter() - start,
+            ))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def db_time(self) -> float:
+        """Total time spent in the database in seconds"""
+        return sum(query.duration for query in self.queries)
+
+    def duplicates(self) -> dict:
+        """
+        Identical queries run more than once
+
+        :return: dict, sql: number of runs
+        """
+        runs = Counter(
+            (query.sql, repr(query.params)) for query in self.queries
+        )
+
+        return {sql: count for (sql, _), count in runs.items() if count > 1}
+
+    def n_plus_one(self) -> dict:
+        """
+        Query shapes run at least n_plus_one_threshold times
+
+        :return: dict, shape: number of runs
+        """
+        runs = Counter(query_shape(query.sql) for query in self.queries)
+
+        return {
+            shape: count
+            for shape, count in runs.items()
+            if count >= self.n_plus_one_threshold
+        }
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "duplicates": self.duplicates(),
+            "n_plus_one": self.n_plus_one(),
+        }
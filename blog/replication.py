@@ -0,0 +1,36 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blog.routers import mark_synced
+
+
+def replicate(alias: str) -> float:
+    """
+    Copy the primary SQLite file into the file of the replica
+
+    A stand-in for the replication of a database server: the online
+    backup API copies a consistent snapshot while the primary is
+    written, the readers of the replica wait for the copy to finish.
+    The start time of the copy is recorded as the replica sync time,
+    every change committed before it is on the replica.
+
+    :param alias: alias of the replica in DATABASES
+    :return: duration of the copy in seconds
+    """
+    for name in (DEFAULT_DB_ALIAS, alias):
+        if connections[name].vendor != "sqlite":
+            raise ValueError(f"{name} is not a SQLite database")
+
+    started_at = time.time()
+    with closing(
+        sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"])
+    ) as source, closing(
+        sqlite3.connect(connections[alias].settings_dict["NAME"], timeout=30)
+    ) as target:
+        source.backup(target)
+    mark_synced(alias, started_at)
+
+    return time.time() - started_at
@@ -0,0 +1,163 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SYNCED_KEY = "replica:{alias}:synced_at"
+
+# Always read from the primary: a session created by the sign in must
+# not be missing from a replica that lags behind
+PRIMARY_APPS = {"sessions"}
+
+# Routing of the current request, sync_to_async() copies the context
+# to its threads and they share the same RoutingState object
+_state = ContextVar("database_routing", default=None)
+
+
+class RoutingState:
+    """
+    Database choices of one request
+
+    pinned: the reads go to the primary, the client wrote recently or
+    the request already wrote. replica: alias read by the request, the
+    same one for all its queries so they see one snapshot
+    """
+
+    def __init__(self, pinned: bool = False) -> None:
+        self.pinned = pinned
+        self.wrote = False
+        self._replica = None
+
+    @property
+    def replica(self) -> Optional[str]:
+        if self.pinned:
+            return None
+        if self._replica is None:
+            self._replica = choose_replica() or ""
+
+        return self._replica or None
+
+
+def get_replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def synced_at(aliases: list[str]) -> dict:
+    """Start time of the last completed sync of the replicas"""
+    keys = {SYNCED_KEY.format(alias=alias): alias for alias in aliases}
+
+    return {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+
+
+def mark_synced(alias: str, started_at: float) -> None:
+    cache.set(SYNCED_KEY.format(alias=alias), started_at, timeout=None)
+
+
+def replication_lags(aliases: list[str]) -> dict:
+    """Seconds since the start of the last sync of the synced replicas"""
+    now = time.time()
+
+    return {
+        alias: now - started_at
+        for alias, started_at in synced_at(aliases).items()
+    }
+
+
+def get_max_lag() -> float:
+    """
+    Lag over which a replica is not read
+
+    Capped at REPLICA_PIN_SECONDS: a client pinned to the primary after
+    a write must not read a replica older than its write once the pin
+    expires
+
+    :return: float
+    """
+    pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+    return min(getattr(settings, "REPLICA_MAX_LAG", pin_seconds), pin_seconds)
+
+
+def choose_replica() -> Optional[str]:
+    """
+    A replica lagging less than REPLICA_MAX_LAG, None to read the
+    primary when all of them lag more or never synced
+    """
+    max_lag = get_max_lag()
+    fresh = [
+        alias
+        for alias, lag in replication_lags(get_replicas()).items()
+        if lag <= max_lag
+    ]
+
+    return random.choice(sorted(fresh)) if fresh else None
+
+
+def replica_read() -> Optional[str]:
+    """Replica read by the current request, None for the primary"""
+    state = _state.get()
+    if state is None:
+        return None
+
+    return state._replica or None
+
+
+@contextmanager
+def routing(pinned: bool = False) -> Iterator[RoutingState]:
+    """
+    Route the reads of the block to a replica until it writes
+
+    :param pinned: read the primary, e.g. right after a write
+    """
+    state = RoutingState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary, the reads of a request to a replica
+
+    Only the requests handled by ReplicaRoutingMiddleware read from a
+    replica, commands and background threads always use the primary.
+    After a write the rest of the request reads the primary too, and
+    the middleware pins the client to the primary for
+    REPLICA_PIN_SECONDS so that it reads its own writes. Reads inside
+    a transaction of the primary stay on it.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        state = _state.get()
+        if (
+            state is None
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+
+        return state.replica or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.pinned = True
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # The replicas are copies of the primary
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints) -> bool:
+        return db not in get_replicas()
@@ -0,0 +1,140 @@
+import html
+import re
+from collections import Counter
+from typing import Iterable
+
+from django.db.models import OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.utils.html import strip_tags
+
+from blog.models import Post, PostSearchTerm
+
+# Relevance weight of a single occurrence of a term in each field,
+# a match in the title says much more about a post than one in the body
+TITLE_WEIGHT = 5
+CONTENT_WEIGHT = 1
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split the text into normalized search terms
+
+    CKEditor stores the post content as HTML, so the markup is
+    stripped and the entities are decoded before splitting
+
+    :param text: plain text or HTML
+    :return: list of lower case terms
+    """
+    text = html.unescape(strip_tags(text or ""))
+
+    return [
+        token
+        for token in TOKEN_RE.findall(text.lower())
+        if MIN_TERM_LENGTH <= len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def build_terms(title: str, content: str) -> Counter:
+    """Weighted term frequencies for a single post"""
+    weights = Counter()
+    for term in tokenize(title):
+        weights[term] += TITLE_WEIGHT
+    for term in tokenize(content):
+        weights[term] += CONTENT_WEIGHT
+
+    return weights
+
+
+def index_post(post: Post) -> None:
+    """
+    Replace the index entries of the post
+
+    The postings of a deleted post are removed by the cascade
+    of the foreign key, so only saving needs to call this function
+
+    :param post: Post
+    :return: None
+    """
+    PostSearchTerm.objects.filter(post_id=post.pk).delete()
+    PostSearchTerm.objects.bulk_create(
+        PostSearchTerm(post_id=post.pk, term=term, weight=weight)
+        for term, weight in build_terms(post.title, post.content).items()
+    )
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """
+    Rebuild the whole index from scratch
+
+    :param batch_size: number of posts processed per batch
+    :return: number of indexed posts
+    """
+    PostSearchTerm.objects.all().delete()
+    indexed = 0
+    batch = []
+    posts = Post.objects.order_by("pk").values_list("pk", "title", "content")
+
+    for pk, title, content in posts.iterator(chunk_size=batch_size):
+        batch.extend(
+            PostSearchTerm(post_id=pk, term=term, weight=weight)
+            for term, weight in build_terms(title, content).items()
+        )
+        indexed += 1
+        if indexed % batch_size == 0:
+            PostSearchTerm.objects.bulk_create(batch)
+            batch = []
+
+    PostSearchTerm.objects.bulk_create(batch)
+
+    return indexed
+
+
+def _term_lookup(term: str) -> Q:
+    """
+    Prefix match on a term that can be resolved by the term index
+
+    A range is used instead of startswith, because LIKE is not
+    able to use the index on every database backend
+    """
+    return Q(term__gte=term, term__lt=term + "\uffff")
+
+
+def search_posts(queryset: QuerySet[Post], query: str) -> QuerySet[Post]:
+    """
+    Filter the posts by the search query and order them by relevance
+
+    Every word of the query has to match a prefix of some term of the
+    post, the rank is the sum of the weights of all matching terms
+
+    :param queryset: QuerySet[Post]
+    :param query: search query entered by the user
+    :return: QuerySet[Post]
+    """
+    terms = _unique(tokenize(query))
+    if not terms:
+        return queryset.none()
+
+    search_rank = Value(0)
+    for term in terms:
+        postings = PostSearchTerm.objects.filter(_term_lookup(term))
+        queryset = queryset.filter(pk__in=postings.values("post_id"))
+        # Ranked per term so that every subquery is a range scan
+        # over the (post, term) index of a single post
+        search_rank += Subquery(
+            postings.filter(post_id=OuterRef("pk"))
+            .values("post_id")
+            .annotate(total=Sum("weight"))
+            .values("total")
+        )
+
+    return queryset.annotate(search_rank=search_rank).order_by(
+        "-search_rank", "-created_at"
+    )
+
+
+def _unique(terms: Iterable[str]) -> list[str]:
+    return list(dict.fromkeys(terms))
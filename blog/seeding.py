@@ -0,0 +1,221 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+from typing import Iterator
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from blog.caching import CATEGORIES_TAG, POST_LIST_TAG, invalidate_tags
+from blog.dates import historical_dates
+from blog.models import Category, Comment, Post
+from blog.popular import refresh_popular_posts
+from blog.search import rebuild_index
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit praesent "
+    "ultricies tempus neque sagittis cras sodales faucibus consequat "
+    "pellentesque ligula orci accumsan pretium cursus vitae lacus nam "
+    "laoreet fringilla pharetra velit nibh python django summer food "
+    "wellness travel coffee garden music history science"
+).split()
+
+# Names of fixtures/category.json, numbered once they run out
+CATEGORY_NAMES = (
+    "Fashion", "Travel", "Lifestyle", "Personal", "Music", "Fitness",
+    "Sports", "Food", "Technology", "Education", "Business",
+)
+
+# Comments of fixtures/comment.json
+COMMENT_TEXTS = (
+    "something that you say or write that expresses your opinion",
+    "I'd appreciate your comments on this issue.",
+    "Great post, thank you for sharing!",
+    "I have never thought about it this way.",
+    "Could you write more about this topic?",
+)
+
+
+class TextGenerator:
+    """
+    Deterministic text shaped like the posts of the fixtures
+
+    Words follow a Zipf-like distribution, a few common words and a
+    long tail, so the search index gets realistic posting lists
+    """
+
+    def __init__(self, seed: int = 0, vocabulary_size: int = 20000) -> None:
+        self.rng = random.Random(seed)
+        self.vocabulary = list(WORDS) + [
+            f"term{number}" for number in range(vocabulary_size)
+        ]
+        # Cumulative once, choices() would sum the weights on every call
+        self.cum_weights = list(accumulate(
+            1 / rank for rank in range(1, len(self.vocabulary) + 1)
+        ))
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choices(
+            self.vocabulary, cum_weights=self.cum_weights, k=count
+        ))
+
+    def title(self) -> str:
+        return self.words(4).capitalize()
+
+    def content(self, paragraphs: int = 5) -> str:
+        return "".join(
+            f"<p>{self.words(60)}.</p>\r\n" for _ in range(paragraphs)
+        )
+
+
+def _in_batches(objects, batch_size: int) -> Iterator[list]:
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _comment_counts(posts: int, comments: int, rng: random.Random) -> list:
+    """Zipf-like split of the comments, a few posts get most of them"""
+    weights = [1 / rank for rank in range(1, posts + 1)]
+    rng.shuffle(weights)
+    total = sum(weights)
+    counts = [int(comments * weight / total) for weight in weights]
+    for index in rng.sample(range(posts), comments - sum(counts)):
+        counts[index] += 1
+
+    return counts
+
+
+def seed_database(
+    posts: int,
+    comments: int,
+    categories: int,
+    users: int,
+    batch_size: int = 2000,
+    seed: int = 0,
+    days: int = 365,
+    log=None,
+) -> dict:
+    """
+    Insert generated users, categories, posts and comments
+
+    Rows are inserted with bulk_create() in batches, every batch in its
+    own transaction, so the model signals are bypassed: the comment
+    counters are written with the posts and the search index, the
+    cached pages and the popular posts are rebuilt once at the end
+
+    :param posts: number of posts
+    :param comments: number of comments split between the posts
+    :param categories: number of categories
+    :param users: number of users writing the comments
+    :param batch_size: rows per INSERT and per transaction
+    :param seed: seed of the generators, the same seed gives the same data
+    :param days: the posts are spread over this many past days
+    :param log: optional callable receiving progress messages
+    :return: dict with the number of inserted rows per model
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    text = TextGenerator(seed)
+    now = timezone.now()
+
+    password = make_password("Test12345")
+    user_model = get_user_model()
+    first_user = user_model.objects.count()
+    for batch in _in_batches(
+        (
+            user_model(
+                username=f"reader{first_user + number}", password=password
+            )
+            for number in range(users)
+        ),
+        batch_size,
+    ):
+        with transaction.atomic():
+            user_model.objects.bulk_create(batch, ignore_conflicts=True)
+    user_ids = list(user_model.objects.values_list("pk", flat=True))
+    log(f"Users: {len(user_ids)}")
+
+    first_category = Category.objects.count()
+    Category.objects.bulk_create(
+        [
+            Category(name=_category_name(first_category + number))
+            for number in range(categories)
+        ],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    category_ids = list(Category.objects.values_list("pk", flat=True))
+    log(f"Categories: {len(category_ids)}")
+
+    counts = _comment_counts(posts, comments, rng) if posts else []
+    step = timedelta(days=days) / max(posts, 1)
+    created = 0
+    with historical_dates():
+        for batch in _in_batches(range(posts), batch_size):
+            post_objects = [
+                Post(
+                    title=text.title(),
+                    content=text.content(),
+                    author_id=rng.choice(user_ids),
+                    created_at=now - step * (posts - number),
+                    comments_count=counts[number],
+                )
+                for number in batch
+            ]
+            with transaction.atomic():
+                Post.objects.bulk_create(post_objects)
+                Post.categories.through.objects.bulk_create(
+                    Post.categories.through(post_id=post.pk, category_id=pk)
+                    for post in post_objects
+                    for pk in rng.sample(
+                        category_ids,
+                        min(len(category_ids), rng.randint(1, 3)),
+                    )
+                )
+                Comment.objects.bulk_create(
+                    _comments(post_objects, user_ids, rng, now),
+                    batch_size=batch_size,
+                )
+            created += len(post_objects)
+            log(f"Posts: {created}/{posts}")
+
+    log("Rebuilding the search index")
+    rebuild_index()
+    invalidate_tags(POST_LIST_TAG, CATEGORIES_TAG)
+    refresh_popular_posts()
+
+    return {
+        "users": users,
+        "categories": categories,
+        "posts": posts,
+        "comments": sum(counts),
+    }
+
+
+def _category_name(number: int) -> str:
+    name = CATEGORY_NAMES[number % len(CATEGORY_NAMES)]
+    round_ = number // len(CATEGORY_NAMES)
+
+    return f"{name} {round_}" if round_ else name
+
+
+def _comments(
+    posts: list, user_ids: list, rng: random.Random, now
+) -> Iterator[Comment]:
+    for post in posts:
+        age = now - post.created_at
+        for number in range(post.comments_count):
+            yield Comment(
+                text=rng.choice(COMMENT_TEXTS),
+                post_id=post.pk,
+                author_id=rng.choice(user_ids),
+                created_at=post.created_at + age * rng.random(),
+            )
@@ -0,0 +1,128 @@
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from blog.caching import (
+    CATEGORIES_TAG,
+    POST_LIST_TAG,
+    comments_tag,
+    invalidate_tags,
+    post_tag,
+)
+from blog.images import generate_renditions
+from blog.models import Category, Comment, Post
+from blog.popular import schedule_refresh
+from blog.search import index_post
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs) -> None:
+    """Keep the search index of the saved post up to date"""
+    index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def render_post_image(
+    sender, instance, update_fields, raw, **kwargs
+) -> None:
+    """
+    Render the renditions of the image of a post saved by the views or
+    the admin alike, once committed so that decoding the image does not
+    hold the write lock of the database
+    """
+    if raw or update_fields is not None and "image" not in update_fields:
+        return
+
+    transaction.on_commit(partial(_render_renditions, instance))
+
+
+def _render_renditions(post: Post) -> None:
+    try:
+        generate_renditions(post)
+    except Exception:
+        # The post is saved already, its pages show the original image
+        logger.exception("Could not render the image of post %s", post.pk)
+        if post.renditions:
+            post.renditions = {}
+            Post.objects.filter(pk=post.pk).update(renditions={})
+            invalidate_tags(post_tag(post.pk))
+
+
+# Fields of a post that decide the searches and listings showing it
+LISTED_FIELDS = {"title", "content"}
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(
+    sender, instance, created, update_fields, **kwargs
+) -> None:
+    """
+    A new post changes the listings, so does an edit of its title or
+    content: the search index is rebuilt with them and a cached search
+    or listing that did not show the post may have to now. A save of
+    other fields only changes the pages of the post.
+    """
+    if created or update_fields is None or LISTED_FIELDS & update_fields:
+        invalidate_tags(post_tag(instance.pk), POST_LIST_TAG)
+    else:
+        invalidate_tags(post_tag(instance.pk))
+    schedule_refresh()
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs) -> None:
+    invalidate_tags(post_tag(instance.pk), POST_LIST_TAG)
+    schedule_refresh()
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def invalidate_post_categories(
+    sender, instance, action, reverse, pk_set, **kwargs
+) -> None:
+    """Category filtered listings depend on the categories of the posts"""
+    if not action.startswith("post_"):
+        return
+
+    if reverse:
+        post_pks = pk_set or []
+    else:
+        post_pks = [instance.pk]
+    invalidate_tags(POST_LIST_TAG, *(post_tag(pk) for pk in post_pks))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs) -> None:
+    invalidate_tags(CATEGORIES_TAG, POST_LIST_TAG)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs) -> None:
+    """Count the new comment in the counter of its post"""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F("comments_count") + 1
+        )
+        invalidate_tags(comments_tag(instance.post_id))
+        schedule_refresh()
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs) -> None:
+    """
+    Remove the deleted comment from the counter of its post
+
+    The signal is also sent for every comment removed by a cascade,
+    e.g. when the author of the comments is deleted
+    """
+    Post.objects.filter(pk=instance.post_id, comments_count__gt=0).update(
+        comments_count=F("comments_count") - 1
+    )
+    invalidate_tags(comments_tag(instance.post_id))
+    schedule_refresh()
@@ -0,0 +1,91 @@
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from blog.assets import (
+    COMPRESSIBLE_EXTENSIONS,
+    compress_file,
+    minify_css,
+    purge_css,
+    selector_sources,
+    used_names,
+)
+
+
+class OptimizedStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Static files build of collectstatic
+
+    The stylesheets of the project (STATIC_PURGE_CSS) are purged of the
+    selectors the templates never use and minified before they are
+    hashed, then every hashed text file gets .gz and .br siblings.
+    The bytes before and after are kept in report for build_static.
+    """
+
+    # Files not collected yet are served under their own name,
+    # the tests and the development server never run collectstatic
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.report = {}
+
+    def stored_name(self, name: str) -> str:
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        self.report = {}
+        paths = dict(paths)
+        self._optimize_css(paths)
+        yield from super().post_process(paths, dry_run, **options)
+
+        for name, hashed_name in self.hashed_files.items():
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            original_size = self.report.get(name, {}).get("original")
+            entry = {
+                "original": original_size or self.size(name),
+                "optimized": self.size(hashed_name),
+            }
+            entry.update(compress_file(Path(self.path(hashed_name))))
+            self.report[name] = entry
+
+    def _optimize_css(self, paths: dict) -> None:
+        """
+        Purge and minify the stylesheets of the project in place
+
+        The sources of the hashing are pointed to the optimized copies,
+        so the content hash is the one of the served file
+        """
+        patterns = getattr(settings, "STATIC_PURGE_CSS", [])
+        names = [
+            name
+            for name in paths
+            if any(fnmatchcase(name, pattern) for pattern in patterns)
+        ]
+        if not names:
+            return
+
+        used = used_names(selector_sources())
+        safelist = getattr(settings, "STATIC_PURGE_SAFELIST", [])
+        for name in names:
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                content = source.read()
+            css = minify_css(
+                purge_css(content.decode("utf-8"), used, safelist)
+            )
+            self.delete(name)
+            self._save(name, ContentFile(css.encode("utf-8")))
+            paths[name] = (self, name)
+            self.report[name] = {"original": len(content)}
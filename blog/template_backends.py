@@ -0,0 +1,25 @@
+from django.template.backends import django
+
+from blog.metrics import template_timer
+
+
+class Template(django.Template):
+    def render(self, context=None, request=None) -> str:
+        with template_timer():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    """
+    Django templates whose renders are timed for the request metrics
+
+    Only the renders through the backend are timed (render(),
+    TemplateResponse, render_to_string()), the {% include %} tags are
+    part of the template including them.
+    """
+
+    def from_string(self, template_code) -> Template:
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name) -> Template:
+        return Template(super().get_template(template_name).template, self)
@@ -0,0 +1,189 @@
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.forms.renderers import get_default_renderer
+from django.template import Context, Template, TemplateDoesNotExist
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def get_manifest_path() -> Optional[Path]:
+    """Manifest built by build_template_manifest, None when disabled"""
+    path = getattr(settings, "TEMPLATE_MANIFEST_PATH", None)
+
+    return Path(path) if path else None
+
+
+def get_engines() -> dict:
+    """
+    Template engines of the pages and of the form widgets
+
+    :return: dict of django.template.Engine by manifest section
+    """
+    return {
+        "templates": engines["django"].engine,
+        "form_templates": get_default_renderer().engine.engine,
+    }
+
+
+def project_templates() -> list[str]:
+    """Names of the templates in the DIRS of the template engine"""
+    names = []
+    for directory in engines["django"].engine.dirs:
+        directory = Path(directory)
+        names.extend(
+            path.relative_to(directory).as_posix()
+            for path in sorted(directory.rglob("*.html"))
+        )
+
+    return names
+
+
+def render_forms() -> None:
+    """
+    Render the forms of the pages through crispy-forms, as the
+    templates do, which loads the templates of the pack and of the
+    widgets on first use
+    """
+    from django.contrib.auth.forms import AuthenticationForm
+
+    from blog.forms import CommentForm, ContactForm, PostForm, SignUpForm
+
+    template = Template("{% load crispy_forms_filters %}{{ form|crispy }}")
+    for form_class in (
+        AuthenticationForm, SignUpForm, CommentForm, ContactForm, PostForm
+    ):
+        template.render(Context({"form": form_class()}))
+
+
+def compiled_templates(engine) -> list[str]:
+    """Names of the templates held by the cached loader of the engine"""
+    names = set()
+    for loader in engine.template_loaders:
+        if isinstance(loader, CachedLoader):
+            names.update(
+                template.origin.template_name
+                for template in loader.get_template_cache.values()
+                if isinstance(template, Template)
+            )
+
+    return sorted(names)
+
+
+def build_manifest(path: Path) -> dict:
+    """
+    Save the names of the templates a worker loads to render the pages
+
+    They are found by compiling the project templates and rendering
+    the forms from empty template caches, so the manifest also lists
+    the templates of crispy-forms, CKEditor and the form widgets,
+    which are otherwise only loaded while a page renders.
+
+    :param path: JSON file to write
+    :return: dict of template names by manifest section
+    """
+    for engine in get_engines().values():
+        for loader in engine.template_loaders:
+            if isinstance(loader, CachedLoader):
+                loader.reset()
+
+    for name in project_templates():
+        engines["django"].engine.get_template(name)
+    render_forms()
+
+    manifest = {
+        section: compiled_templates(engine)
+        for section, engine in get_engines().items()
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(
+        json.dumps({"version": MANIFEST_VERSION, **manifest}, indent=2)
+    )
+    temporary.replace(path)
+
+    return manifest
+
+
+def load_manifest() -> Optional[dict]:
+    """Sections of the manifest, None when there is no usable one"""
+    path = get_manifest_path()
+    if path is None:
+        return None
+
+    try:
+        manifest = json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning("Ignored the invalid template manifest %s", path)
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    return manifest
+
+
+def warm_templates() -> int:
+    """
+    Compile the templates of the site into the cached loaders
+
+    With a manifest every listed template is compiled, without a query
+    or a render. Without one the project templates are compiled and
+    the forms rendered. The pages themselves are never rendered: their
+    {% cache %} fragments would be stored with an empty context.
+
+    :return: number of compiled templates
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        names = project_templates()
+        for name in names:
+            engines["django"].engine.get_template(name)
+        render_forms()
+        return len(names)
+
+    compiled = 0
+    for section, engine in get_engines().items():
+        # The project templates too, one added since the build is
+        # compiled as well
+        names = manifest.get(section, [])
+        if section == "templates":
+            names = sorted(set(names) | set(project_templates()))
+        for name in names:
+            try:
+                engine.get_template(name)
+            except TemplateDoesNotExist:
+                logger.info("Template %s of the manifest is missing", name)
+            else:
+                compiled += 1
+
+    return compiled
+
+
+def warm_up() -> None:
+    """
+    Prepare a new worker before its first request
+
+    Compiles the templates and imports the URLconf with the views,
+    when TEMPLATE_WARMUP is set. A failure is logged, the first
+    requests then do the rest of the work.
+    """
+    if not getattr(settings, "TEMPLATE_WARMUP", False):
+        return
+
+    try:
+        compiled = warm_templates()
+        get_resolver().url_patterns
+    except Exception:
+        logger.exception("Worker warmup failed")
+    else:
+        logger.info("Compiled %d templates", compiled)
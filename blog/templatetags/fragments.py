@@ -0,0 +1,22 @@
+from django import template
+from django.conf import settings
+
+from blog import categories
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment_timeout():
+    """
+    Lifetime of the {% cache %} fragments
+
+    The fragments are keyed by the version of what they show, an
+    outdated one is never read again and only waits to expire
+    """
+    return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 86400)
+
+
+@register.simple_tag
+def categories_version():
+    return categories.categories_version()
@@ -1,15 +1,15 @@
 from django import template
-from django.db.models import Count
 
-from blog.models import Post
+from blog import popular
 
 register = template.Library()
 
 
 @register.simple_tag
-def get_popular_posts(count=5):
-    popular_posts = Post.objects.annotate(
-        num_comments=Count("comments")
-    ).order_by("-num_comments")[:count]
+def get_popular_posts(count=5, window="all"):
+    return popular.get_popular_posts(window=window, count=count)
 
-    return popular_posts
+
+@register.simple_tag
+def popular_posts_version(window="all"):
+    return popular.ranking_version(window)
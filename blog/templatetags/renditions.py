@@ -0,0 +1,57 @@
+from django import template
+
+from blog.images import FORMATS, RENDITIONS
+
+register = template.Library()
+
+
+def _rendition(post, label) -> dict:
+    rendition = post.renditions.get(label)
+    # Manifests written before the srcset renditions held a single name
+    return rendition if isinstance(rendition, dict) else {}
+
+
+@register.simple_tag
+def rendition_url(post, label):
+    """
+    URL of the fallback JPEG rendition of the post image
+
+    Falls back to the original image until the renditions
+    are generated, the template never resizes anything
+    """
+    rendition = _rendition(post, label)
+    if rendition:
+        return post.image.storage.url(rendition["src"])
+
+    return post.image.url if post.image else ""
+
+
+@register.inclusion_tag("includes/picture.html")
+def rendition_picture(post, label, css_class="", alt=""):
+    """
+    <picture> of the post image with a srcset of every format
+
+    The browser picks the first format it supports and the width
+    matching the layout, the JPEG <img> is the fallback
+    """
+    rendition = _rendition(post, label)
+    storage = post.image.storage
+    srcsets = {
+        fmt: ", ".join(
+            f"{storage.url(name)} {width}w" for width, name in candidates
+        )
+        for fmt, candidates in rendition.get("sources", {}).items()
+    }
+
+    return {
+        "sources": [
+            {"type": FORMATS[fmt]["mime"], "srcset": srcset}
+            for fmt, srcset in srcsets.items()
+            if fmt != "jpeg"
+        ],
+        "src": rendition_url(post, label),
+        "srcset": srcsets.get("jpeg", ""),
+        "sizes": RENDITIONS[label]["sizes"],
+        "css_class": css_class,
+        "alt": alt,
+    }
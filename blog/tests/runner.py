@@ -0,0 +1,34 @@
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from blog.metrics import get_recorder
+from blog.tests.utils import isolated_cache
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Keep the tests out of the cache and the METRICS_PATH of the
+    development server, they use a memory cache and a temporary store
+    """
+
+    def setup_test_environment(self, **kwargs) -> None:
+        super().setup_test_environment(**kwargs)
+        self.metrics_directory = tempfile.TemporaryDirectory()
+        self.metrics_path = override_settings(
+            METRICS_PATH=Path(self.metrics_directory.name) / "metrics.sqlite3"
+        )
+        self.metrics_path.enable()
+        # Own instance, isolated_cache keeps the settings it replaced
+        self.cache = override_settings(**isolated_cache.options)
+        self.cache.enable()
+
+    def teardown_test_environment(self, **kwargs) -> None:
+        self.cache.disable()
+        # Flushed now, the flush at exit would write to METRICS_PATH
+        get_recorder().flush()
+        self.metrics_path.disable()
+        self.metrics_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
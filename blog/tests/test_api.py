@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Comment, Post
+from blog.tests.utils import QueryBudgetMixin, isolated_cache
+
+
+@isolated_cache
+@mock.patch("blog.signals.schedule_refresh")
+class CommentAPITests(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            username="test_user", password="Test12345"
+        )
+        self.other = get_user_model().objects.create_user(
+            username="other_user", password="Test12345"
+        )
+        self.post = Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=self.user
+        )
+        self.url = reverse("blog:api-comments", kwargs={"pk": self.post.pk})
+
+    def test_list_is_cursor_paged(self, schedule_refresh) -> None:
+        for number in range(6):
+            Comment.objects.create(
+                text=f"Comment {number}", post=self.post, author=self.other
+            )
+
+        with self.assertQueryBudget("blog:api-comments"):
+            first = self.client.get(self.url).json()
+        second = self.client.get(
+            self.url, {"cursor": first["next_cursor"]}
+        ).json()
+
+        self.assertEqual(
+            [comment["text"] for comment in first["comments"]],
+            ["Comment 5", "Comment 4", "Comment 3", "Comment 2"],
+        )
+        self.assertEqual(len(second["comments"]), 2)
+        self.assertIsNone(second["next_cursor"])
+        self.assertFalse(first["comments"][0]["can_delete"])
+
+    def test_create_returns_the_comment_markup(self, schedule_refresh) -> None:
+        self.client.force_login(self.user)
+
+        with self.assertQueryBudget("blog:api-comments"):
+            response = self.client.post(self.url, {"text": "New comment"})
+
+        data = response.json()
+        self.post.refresh_from_db()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(data["text"], "New comment")
+        self.assertTrue(data["can_delete"])
+        self.assertIn("comment-delete-form", data["html"])
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_create_requires_a_user(self, schedule_refresh) -> None:
+        response = self.client.post(self.url, {"text": "New comment"})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_create_validates_the_form(self, schedule_refresh) -> None:
+        self.client.force_login(self.user)
+        missing = reverse("blog:api-comments", kwargs={"pk": 0})
+
+        invalid = self.client.post(self.url, {"text": ""})
+        not_found = self.client.post(missing, {"text": "New comment"})
+
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn("text", invalid.json()["errors"])
+        self.assertEqual(not_found.status_code, 404)
+
+    def test_delete_only_own_comments(self, schedule_refresh) -> None:
+        own = Comment.objects.create(
+            text="Own", post=self.post, author=self.user
+        )
+        other = Comment.objects.create(
+            text="Other", post=self.post, author=self.other
+        )
+        self.client.force_login(self.user)
+
+        with self.assertQueryBudget("blog:api-comment"):
+            deleted = self.client.delete(
+                reverse("blog:api-comment", kwargs={"pk": own.pk})
+            )
+        refused = self.client.delete(
+            reverse("blog:api-comment", kwargs={"pk": other.pk})
+        )
+
+        self.post.refresh_from_db()
+        self.assertEqual(deleted.status_code, 204)
+        self.assertEqual(refused.status_code, 404)
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_detail_page_renders_the_partial(self, schedule_refresh) -> None:
+        Comment.objects.create(text="Shown", post=self.post, author=self.user)
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("blog:post-detail", kwargs={"pk": self.post.pk})
+        )
+
+        self.assertTemplateUsed(response, "includes/comment.html")
+        self.assertContains(response, self.url)
+        self.assertContains(response, "comment-delete-form")
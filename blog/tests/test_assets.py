@@ -0,0 +1,123 @@
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from blog.assets import accepted_encodings, minify_css, purge_css
+
+STYLESHEET = """
+/*! License */
+/* A comment with a "quote */
+.used, .unused { color: red; }
+.unused > a { color: blue; }
+a:not(.unused) { content: "} .unused {"; }
+@media (min-width: 768px) {
+  .unused { margin: 0; }
+  .used { margin: 1px; }
+}
+@media print { .unused { display: none; } }
+@keyframes spin { from { opacity: 0; } to { opacity: 1; } }
+.show { display: block; }
+"""
+
+
+class CssTests(SimpleTestCase):
+    def test_accept_encoding_is_parsed(self) -> None:
+        self.assertEqual(
+            accepted_encodings("GZIP;q=0.5, br , *;q=0, deflate;q=x"),
+            {"gzip": 0.5, "br": 1.0, "*": 0.0, "deflate": 0.0},
+        )
+
+    def test_purge_keeps_used_selectors_only(self) -> None:
+        purged = purge_css(STYLESHEET, {"used"}, ["sh*"])
+
+        self.assertIn(".used{", purged.replace(" ", ""))
+        self.assertNotIn(".unused>a", purged.replace(" ", ""))
+        self.assertNotIn("@media print", purged)
+        self.assertIn("@media (min-width: 768px)", purged)
+        self.assertIn('a:not(.unused){ content: "} .unused {"; }', purged)
+        self.assertIn("@keyframes spin", purged)
+        self.assertIn(".show", purged)
+
+    def test_minify_keeps_strings_and_licenses(self) -> None:
+        minified = minify_css(STYLESHEET)
+
+        self.assertTrue(minified.startswith("/*! License */"))
+        self.assertNotIn("A comment", minified)
+        self.assertIn('a:not(.unused){content:"} .unused {"}', minified)
+        self.assertIn("@media (min-width:768px){.unused{margin:0}", minified)
+
+
+class StaticBuildTests(SimpleTestCase):
+    def setUp(self) -> None:
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        source = directory / "source"
+        (source / "css").mkdir(parents=True)
+        (source / "css" / "site.css").write_text(
+            STYLESHEET + ".used { background: url('../img/dot.png'); }" * 20
+        )
+        (source / "img").mkdir()
+        (source / "img" / "dot.png").write_bytes(b"png")
+
+        settings = override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=directory / "collected",
+            STATICFILES_FINDERS=[
+                "django.contrib.staticfiles.finders.FileSystemFinder"
+            ],
+            STATIC_PURGE_CSS=["css/*.css"],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command("build_static", verbosity=0)
+
+    def test_stylesheet_is_purged_hashed_and_compressed(self) -> None:
+        hashed = staticfiles_storage.stored_name("css/site.css")
+        path = Path(staticfiles_storage.path(hashed))
+
+        self.assertNotEqual(hashed, "css/site.css")
+        self.assertNotIn(".unused>a", path.read_text())
+        self.assertEqual(
+            gzip.decompress(path.with_name(path.name + ".gz").read_bytes()),
+            path.read_bytes(),
+        )
+        report = staticfiles_storage.report["css/site.css"]
+        self.assertLess(report["optimized"], report["original"])
+
+    def test_hashed_files_are_immutable(self) -> None:
+        url = staticfiles_storage.url("css/site.css")
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_refused_encodings_are_not_served(self) -> None:
+        url = staticfiles_storage.url("css/site.css")
+        for header, encoding in (
+            ("gzip;q=0", None),
+            ("gzip; q=0.0, identity", None),
+            ("x-gzip-test", None),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, *;q=0.5", "gzip"),
+            ("br;q=0, gzip;q=0, *", None),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+
+    def test_unhashed_files_are_revalidated(self) -> None:
+        response = self.client.get("/static/css/site.css")
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(
+            self.client.get("/static/missing.css").status_code, 404
+        )
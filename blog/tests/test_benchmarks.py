@@ -0,0 +1,126 @@
+import asyncio
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from blog.bench import call_http
+from blog.management.commands.profile_startup import (
+    group_of,
+    parse_importtime,
+)
+from blog.models import Comment, Post, PostSearchTerm
+from blog.seeding import seed_database
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class SeedingTests(TestCase):
+    def test_seeded_rows_are_consistent(self) -> None:
+        counts = seed_database(
+            posts=30, comments=200, categories=15, users=5, batch_size=7
+        )
+
+        self.assertEqual(counts["comments"], 200)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 200)
+        for post in Post.objects.all():
+            self.assertEqual(post.comments_count, post.comments.count())
+            self.assertFalse(
+                post.comments.filter(created_at__lt=post.created_at).exists()
+            )
+        self.assertTrue(PostSearchTerm.objects.exists())
+
+    def test_same_seed_gives_same_data(self) -> None:
+        seed_database(posts=5, comments=10, categories=2, users=2)
+        first = list(Post.objects.values_list("title", flat=True))
+        Post.objects.all().delete()
+        seed_database(posts=5, comments=10, categories=0, users=0)
+
+        self.assertEqual(
+            list(Post.objects.values_list("title", flat=True)), first
+        )
+
+
+@isolated_cache
+class BenchmarkViewsTests(TransactionTestCase):
+    # The background refresh would lock the tables of the in-memory
+    # database shared by the threads
+    @mock.patch("blog.signals.schedule_refresh")
+    def test_results_are_saved_as_json(self, schedule_refresh) -> None:
+        seed_database(posts=12, comments=40, categories=3, users=3)
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "results.json"
+            call_command(
+                "benchmark_views",
+                requests=2,
+                warmup=1,
+                output=str(output),
+                stdout=io.StringIO(),
+            )
+            report = json.loads(output.read_text())
+
+        self.assertEqual(report["meta"]["posts"], 12)
+        for interface in ("wsgi", "asgi"):
+            results = report["results"][interface]
+            self.assertIn("index [anonymous]", results)
+            self.assertIn("comment_create [user]", results)
+            for label, stats in results.items():
+                self.assertEqual(stats["errors"], 0, label)
+            self.assertGreater(
+                results["post_detail [user]"]["queries_per_request"], 0
+            )
+        self.assertFalse(Comment.objects.filter(text__startswith="Bench"))
+
+
+class CallHttpTests(SimpleTestCase):
+    async def test_status_is_read_over_a_connection(self) -> None:
+        received = []
+
+        async def respond(reader, writer) -> None:
+            received.append(await reader.readuntil(b"\r\n\r\n"))
+            writer.write(b"HTTP/1.1 404 Not Found\r\n\r\nbody")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(respond, "127.0.0.1", 0)
+        address = server.sockets[0].getsockname()
+        async with server:
+            status = await call_http(
+                address, "GET", "/?page=2", b"", {"host": "localhost"}
+            )
+
+        self.assertEqual(status, 404)
+        self.assertTrue(received[0].startswith(b"GET /?page=2 HTTP/1.1"))
+        self.assertIn(b"connection: close", received[0])
+        self.assertEqual(await call_http(address, "GET", "/", b"", {}), 0)
+
+
+class ProfileStartupTests(SimpleTestCase):
+    def test_importtime_report_is_parsed(self) -> None:
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     ckeditor.configs\n"
+            "import time:      1500 |       1620 |   ckeditor.widgets\n"
+            "some warning\n"
+        )
+
+        self.assertEqual(parse_importtime(output), [
+            ("ckeditor.configs", 120, 120),
+            ("ckeditor.widgets", 1500, 1620),
+        ])
+
+    def test_modules_are_grouped_by_app(self) -> None:
+        apps = ["django.contrib.admin", "ckeditor"]
+
+        self.assertEqual(
+            group_of("django.contrib.admin.sites", apps),
+            "django.contrib.admin",
+        )
+        self.assertEqual(group_of("ckeditor", apps), "ckeditor")
+        self.assertEqual(group_of("django.db.models", apps), "django")
+        self.assertEqual(group_of("ckeditor_js", apps), "ckeditor_js")
@@ -0,0 +1,124 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from blog.cache_backends import (
+    KEY_LOCK_STRIPES,
+    LocalTier,
+    TieredCache,
+    _key_locks,
+    _local_tiers,
+)
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = str(Path(directory.name) / "cache.sqlite3")
+        self.addCleanup(_local_tiers.pop, self.location, None)
+        self.addCleanup(_key_locks.pop, self.location, None)
+        self.cache = self.backend()
+
+    def backend(self, **options) -> TieredCache:
+        return TieredCache(self.location, {"OPTIONS": options})
+
+    def other_process(self) -> TieredCache:
+        """A backend that shares only the SQLite tier"""
+        backend = self.backend()
+        backend.local = LocalTier(1024 * 1024, 2)
+        backend._key_locks = [
+            threading.Lock() for _ in range(KEY_LOCK_STRIPES)
+        ]
+        return backend
+
+    def test_set_get_delete(self) -> None:
+        self.cache.set("key", {"value": 1})
+
+        self.assertEqual(self.cache.get("key"), {"value": 1})
+        self.assertTrue(self.cache.delete("key"))
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_values_are_shared_between_processes(self) -> None:
+        self.cache.set("key", "value")
+
+        self.assertEqual(self.other_process().get("key"), "value")
+
+    def test_expired_values_are_missing(self) -> None:
+        self.cache.set("key", "value", timeout=1)
+
+        with mock.patch("time.time", return_value=time.time() + 5):
+            self.assertIsNone(self.cache.get("key"))
+            self.assertTrue(self.cache.add("key", "new value"))
+
+    def test_add_keeps_live_value(self) -> None:
+        self.assertTrue(self.cache.add("key", "first"))
+        self.assertFalse(self.other_process().add("key", "second"))
+        self.assertEqual(self.cache.get("key"), "first")
+
+    def test_incr_is_atomic_across_connections(self) -> None:
+        self.cache.set("counter", 0)
+
+        def increment() -> None:
+            backend = self.other_process()
+            for _ in range(50):
+                backend.incr("counter")
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.other_process().get("counter"), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_local_tier_is_bounded_by_bytes(self) -> None:
+        tier = LocalTier(max_bytes=1000, local_timeout=10)
+        for number in range(10):
+            tier.set(f"key{number}", b"x" * 100, None)
+        tier.get("key5")
+        tier.set("key10", b"x" * 100, None)
+
+        self.assertLessEqual(tier.size, 1000)
+        self.assertIsNone(tier.get("key0"))
+        self.assertIsNotNone(tier.get("key5"))
+
+    def test_threads_share_the_key_locks(self) -> None:
+        # Django builds a backend instance per thread
+        backends = []
+        thread = threading.Thread(
+            target=lambda: backends.append(self.backend())
+        )
+        thread.start()
+        thread.join()
+
+        self.assertIs(backends[0]._key_locks, self.cache._key_locks)
+        self.assertIs(backends[0].local, self.cache.local)
+
+    def test_get_or_set_computes_once(self) -> None:
+        calls = []
+
+        def compute() -> str:
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        results = []
+
+        def read() -> None:
+            results.append(self.other_process().get_or_set("key", compute))
+
+        threads = [threading.Thread(target=read) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["value"] * 5)
+        self.assertEqual(len(calls), 1)
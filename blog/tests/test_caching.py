@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.shortcuts import render
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.caching import POST_LIST_TAG, invalidate_tags, response_cache_stats
+from blog.metrics import get_recorder, get_store
+from blog.models import Category, Comment, Post
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class ResponseCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        # The lookups are counted by the metrics of the requests
+        get_recorder().flush()
+        get_store().clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            password="Test12345",
+        )
+        self.post = Post.objects.create(
+            title="Cached title", content="Lorem ipsum", author=self.user
+        )
+        self.other_post = Post.objects.create(
+            title="Other title", content="Lorem ipsum", author=self.user
+        )
+        self.detail_url = reverse(
+            "blog:post-detail", kwargs={"pk": self.post.pk}
+        )
+        self.other_detail_url = reverse(
+            "blog:post-detail", kwargs={"pk": self.other_post.pk}
+        )
+
+    def is_hit(self, url: str, data: dict = None) -> bool:
+        """A cached response is rebuilt without the template context"""
+        return self.client.get(url, data).context is None
+
+    def test_second_anonymous_request_is_a_hit(self) -> None:
+        self.assertFalse(self.is_hit(reverse("blog:index")))
+        self.assertTrue(self.is_hit(reverse("blog:index")))
+        self.assertEqual(response_cache_stats()["hit"], 1)
+
+    def test_hits_do_not_write_to_the_shared_cache(self) -> None:
+        self.client.get(reverse("blog:index"))
+
+        with mock.patch.object(cache, "incr") as incr, mock.patch.object(
+            cache, "set"
+        ) as set_value:
+            self.assertTrue(self.is_hit(reverse("blog:index")))
+
+        incr.assert_not_called()
+        set_value.assert_not_called()
+        self.assertEqual(response_cache_stats()["hit"], 1)
+
+    def test_query_params_are_normalized(self) -> None:
+        self.client.get(reverse("blog:index"), {"category": "", "page": 1})
+
+        self.assertTrue(self.is_hit(reverse("blog:index"), {"page": 1}))
+        self.assertFalse(self.is_hit(reverse("blog:index"), {"page": 2}))
+        self.assertFalse(self.is_hit(reverse("blog:index"), {"other": 1}))
+
+    def test_authenticated_requests_bypass_cache(self) -> None:
+        self.client.login(username="test_user", password="Test12345")
+        self.client.get(reverse("blog:index"))
+
+        self.assertFalse(self.is_hit(reverse("blog:index")))
+        self.assertEqual(response_cache_stats()["bypass"], 2)
+
+    def test_comment_purges_only_pages_of_its_post(self) -> None:
+        for url in (self.detail_url, self.other_detail_url):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                text="New comment", post=self.post, author=self.user
+            )
+
+        self.assertFalse(self.is_hit(self.detail_url))
+        self.assertTrue(self.is_hit(self.other_detail_url))
+
+    def test_post_edit_purges_listing_showing_it(self) -> None:
+        self.client.get(reverse("blog:index"))
+        self.client.get(self.other_detail_url)
+
+        self.post.title = "Edited title"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+
+        response = self.client.get(reverse("blog:index"))
+        self.assertContains(response, "Edited title")
+        self.assertTrue(self.is_hit(self.other_detail_url))
+
+    def test_post_edit_purges_searches_not_showing_it(self) -> None:
+        # Only finds the other post, a search without results is not
+        # cached
+        search = {"search_term": "other"}
+        self.assertNotContains(
+            self.client.get(reverse("blog:index"), search), "Cached title"
+        )
+
+        self.post.content = "Other content"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+
+        self.assertContains(
+            self.client.get(reverse("blog:index"), search), "Cached title"
+        )
+
+    def test_category_change_purges_detail_pages(self) -> None:
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="New category")
+
+        self.assertFalse(self.is_hit(self.detail_url))
+
+    def test_tags_are_invalidated_once_the_transaction_commits(self) -> None:
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Comment.objects.create(
+                text="New comment", post=self.post, author=self.user
+            )
+        self.assertTrue(self.is_hit(self.detail_url))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self.is_hit(self.detail_url))
+
+    def test_page_rendered_during_an_invalidation_is_not_stored(self) -> None:
+        def render_during_edit(*args, **kwargs):
+            response = render(*args, **kwargs)
+            # A post saved by another request while the page rendered
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_tags(POST_LIST_TAG)
+            return response
+
+        with mock.patch("blog.views.render", render_during_edit):
+            self.client.get(reverse("blog:index"))
+
+        self.assertFalse(self.is_hit(reverse("blog:index")))
+        self.assertTrue(self.is_hit(reverse("blog:index")))
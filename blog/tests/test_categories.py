@@ -0,0 +1,105 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from blog.categories import get_categories, get_category
+from blog.forms import PostFilterForm
+from blog.models import Category, Post
+from blog.queries import QueryInspector
+from blog.routers import mark_synced, routing
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class CategoryRegistryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = get_user_model().objects.create_superuser(
+            username="admin", password="Test12345"
+        )
+        cls.python = Category.objects.create(name="Python")
+        cls.django = Category.objects.create(name="Django")
+        cls.post = Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=cls.user
+        )
+        cls.post.categories.add(cls.python)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_registry_is_read_without_queries(self) -> None:
+        get_categories()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [category.name for category in get_categories()],
+                ["Django", "Python"],
+            )
+            self.assertEqual(get_category(str(self.python.pk)), self.python)
+            self.assertIsNone(get_category("unknown"))
+
+    def test_saved_category_invalidates_the_registry(self) -> None:
+        get_categories()
+
+        self.django.name = "Flask"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.save()
+
+        self.assertEqual(get_category(self.django.pk).name, "Flask")
+
+    def test_filter_form_cleans_a_category(self) -> None:
+        get_categories()
+
+        with self.assertNumQueries(0):
+            form = PostFilterForm({"category": self.python.pk})
+            self.assertTrue(form.is_valid())
+            self.assertFalse(PostFilterForm({"category": 0}).is_valid())
+            self.assertIn("Django", str(form["category"]))
+
+        self.assertEqual(form.cleaned_data["category"], self.python)
+
+    def test_pages_do_not_query_the_categories(self) -> None:
+        get_categories()
+        urls = [
+            f"{reverse('blog:index')}?category={self.python.pk}",
+            reverse("blog:post-detail", kwargs={"pk": self.post.pk}),
+        ]
+
+        for url in urls:
+            with self.subTest(url), QueryInspector() as inspector:
+                response = self.client.get(url)
+
+            self.assertContains(response, "Python")
+            self.assertFalse([
+                query.sql
+                for query in inspector.queries
+                if 'FROM "blog_category"' in query.sql
+            ])
+
+    def test_admin_list_filter(self) -> None:
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("admin:blog_post_changelist"),
+            {"category": self.django.pk},
+        )
+
+        self.assertContains(response, "Django")
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+
+@isolated_cache
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class CategoryRegistryReplicaTests(TransactionTestCase):
+    # Outside a transaction, the reads of a request go to the replica
+    def test_registry_is_read_from_the_primary(self) -> None:
+        cache.clear()
+        category = Category.objects.create(name="Python")
+        mark_synced("replica_1", time.time())
+
+        # The replica_1 alias does not exist in the tests
+        with routing():
+            self.assertEqual(get_category(category.pk), category)
@@ -0,0 +1,49 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+class TunedSQLiteBackendTests(SimpleTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "db.sqlite3"
+        self.connection = ConnectionHandler({
+            "default": {
+                "ENGINE": "blog.db_backends",
+                "NAME": self.path,
+                "OPTIONS": {
+                    "transaction_mode": "immediate",
+                    "pragmas": {
+                        "journal_mode": "WAL",
+                        "synchronous": "NORMAL",
+                    },
+                },
+            }
+        })["default"]
+        self.addCleanup(self.connection.close)
+
+    def test_pragmas_are_set_on_new_connections(self) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_transactions_take_the_write_lock_at_begin(self) -> None:
+        self.connection.ensure_connection()
+        self.connection.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        self.addCleanup(self.connection.set_autocommit, True)
+        self.addCleanup(self.connection.rollback)
+
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(
+            sqlite3.OperationalError, "database is locked"
+        ):
+            other.execute("BEGIN IMMEDIATE")
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.exporting import export_queryset, iter_rows, render
+from blog.models import Category, Comment, ContactMessage, Post
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class ExportTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_superuser(
+            username="admin", password="Test12345"
+        )
+        self.travel = Category.objects.create(name="Travel")
+        self.food = Category.objects.create(name="Food")
+        self.posts = []
+        for number in range(5):
+            post = Post.objects.create(
+                title=f"Post {number}", content="Text", author=self.user
+            )
+            post.categories.add(self.travel if number % 2 else self.food)
+            Comment.objects.create(
+                text=f"Comment {number}", post=post, author=self.user
+            )
+            self.posts.append(post)
+        Post.objects.filter(pk=self.posts[0].pk).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+
+    def test_rows_are_read_in_chunks(self) -> None:
+        queryset = export_queryset("posts")
+        # One query per chunk for the categories, iterator() is one more
+        with self.assertNumQueries(4):
+            rows = list(iter_rows("posts", queryset, chunk_size=2))
+
+        self.assertEqual(
+            [row["id"] for row in rows], [post.pk for post in self.posts]
+        )
+        self.assertEqual(rows[1]["categories"], ["Travel"])
+        self.assertEqual(rows[1]["author"], "admin")
+
+    def test_filters(self) -> None:
+        today = timezone.localdate()
+        recent = export_queryset("posts", since=today)
+        travel = export_queryset("comments", category=self.travel)
+
+        self.assertEqual(recent.count(), 4)
+        self.assertEqual(
+            export_queryset("posts", until=today - timedelta(days=1)).count(),
+            1,
+        )
+        self.assertEqual(travel.count(), 2)
+        with self.assertRaises(ValueError):
+            export_queryset("contact_messages", category=self.travel)
+
+    def test_csv_and_ndjson(self) -> None:
+        queryset = export_queryset("comments")
+        table = list(csv.reader(io.StringIO(
+            "".join(render("comments", queryset, "csv"))
+        )))
+        lines = "".join(render("comments", queryset, "ndjson")).splitlines()
+
+        self.assertEqual(table[0][:3], ["id", "post_id", "post"])
+        self.assertEqual(len(table), 6)
+        self.assertEqual(json.loads(lines[0])["text"], "Comment 0")
+        self.assertEqual(len(lines), 5)
+
+    def test_command_writes_the_filtered_rows(self) -> None:
+        ContactMessage.objects.create(
+            name="Ann", email="ann@example.com", subject="Hi", message="Hi"
+        )
+        output = io.StringIO()
+        call_command(
+            "export_data",
+            "posts",
+            "--format=ndjson",
+            "--category=Travel",
+            f"--since={date.today() - timedelta(days=1)}",
+            stdout=output,
+        )
+        posts = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(
+            [post["title"] for post in posts], ["Post 1", "Post 3"]
+        )
+
+    def test_admin_action_streams_the_selection(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("admin:blog_comment_changelist"),
+            {
+                "action": "export_csv",
+                "_selected_action": list(
+                    Comment.objects.values_list("pk", flat=True)[:2]
+                ),
+            },
+        )
+        rows = list(csv.reader(io.StringIO(
+            b"".join(response.streaming_content).decode()
+        )))
+
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertEqual(len(rows), 3)
@@ -9,8 +9,10 @@ from blog.forms import (
     ContactForm,
 )
 from blog.models import Category
+from blog.tests.utils import isolated_cache
 
 
+@isolated_cache
 class FormTests(TestCase):
     def test_post_filter_form_with_data(self) -> None:
         category = Category.objects.create(name="FirstCategory")
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.test import TestCase
+
+from blog.dates import historical_dates
+from blog.fragments import warm_fragments
+from blog.models import Post
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class FragmentCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user", password="Test12345"
+        )
+        self.post = Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=self.user
+        )
+
+    def render_card(self) -> str:
+        post = Post.objects.get(pk=self.post.pk)
+        return render_to_string("includes/post_card.html", {"post": post})
+
+    def test_card_is_rendered_again_once_the_post_is_saved(self) -> None:
+        self.render_card()
+        # A queryset update bypasses updated_at, the cached card is kept
+        Post.objects.filter(pk=self.post.pk).update(title="Silent edit")
+
+        self.assertIn("Test title", self.render_card())
+
+        self.post.title = "New title"
+        self.post.save()
+
+        self.assertIn("New title", self.render_card())
+
+    def test_card_shows_the_new_comment_count(self) -> None:
+        self.render_card()
+        Post.objects.filter(pk=self.post.pk).update(comments_count=2)
+
+        self.assertIn("This post has 2 comments", self.render_card())
+
+    def test_warm_fragments_stores_the_fragments(self) -> None:
+        rendered = warm_fragments(posts=10)
+
+        self.assertEqual(rendered, 4)
+        self.assertIsNotNone(cache.get(make_template_fragment_key(
+            "post_body", [self.post.pk, self.post.updated_at]
+        )))
+
+    def test_historical_dates_keep_or_backfill_updated_at(self) -> None:
+        created_at = self.post.created_at.replace(year=2020)
+        with historical_dates():
+            post, = Post.objects.bulk_create([Post(
+                title="Old post",
+                content="Lorem ipsum",
+                author=self.user,
+                created_at=created_at,
+            )])
+
+        self.assertEqual(post.updated_at, created_at)
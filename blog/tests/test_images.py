@@ -0,0 +1,178 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from blog.images import (
+    RENDITIONS,
+    available_formats,
+    generate_renditions,
+    rendition_size,
+)
+from blog.models import Category, Post
+from blog.templatetags.renditions import rendition_url
+from blog.tests.utils import isolated_cache
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(
+    name: str = "photo.jpg", size: tuple[int, int] = (1600, 1200)
+) -> SimpleUploadedFile:
+    buffer = BytesIO()
+    image = Image.new("RGB", size, "teal")
+    exif = image.getexif()
+    exif[0x010F] = "Camera maker"
+    image.save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@isolated_cache
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_RENDITION_WORKERS=0)
+class RenditionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        # The committed saves would refresh the popular posts in a thread
+        patcher = mock.patch("blog.signals.schedule_refresh")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_superuser(
+            username="admin_user",
+            password="Test12345",
+        )
+
+    def test_renditions_have_the_requested_sizes(self) -> None:
+        post = Post.objects.create(
+            title="Photo", content="text", author=self.user,
+            image=image_file(),
+        )
+        manifest = generate_renditions(post)
+
+        self.assertEqual(set(manifest), set(RENDITIONS))
+        for label, rendition in manifest.items():
+            self.assertEqual(
+                set(rendition["sources"]), set(available_formats())
+            )
+            for candidates in rendition["sources"].values():
+                for width, name in candidates:
+                    path = post.image.storage.path(name)
+                    with Image.open(path) as image:
+                        self.assertEqual(
+                            image.size, rendition_size(label, width)
+                        )
+                        self.assertFalse(image.getexif())
+        post.refresh_from_db()
+        self.assertEqual(post.renditions, manifest)
+
+    def test_rendition_names_are_deterministic(self) -> None:
+        post = Post.objects.create(
+            title="Photo", content="text", author=self.user,
+            image=image_file(),
+        )
+
+        self.assertEqual(generate_renditions(post), generate_renditions(post))
+
+    def test_url_falls_back_to_original_image(self) -> None:
+        post = Post.objects.create(
+            title="Photo", content="text", author=self.user,
+            image=image_file(),
+        )
+
+        self.assertEqual(rendition_url(post, "card"), post.image.url)
+
+    def test_source_is_not_upscaled(self) -> None:
+        post = Post.objects.create(
+            title="Photo", content="text", author=self.user,
+            image=image_file(size=(1000, 750)),
+        )
+        manifest = generate_renditions(post)
+
+        widths = [width for width, _ in manifest["detail"]["sources"]["jpeg"]]
+        self.assertEqual(widths, [400, 800])
+
+    def test_create_view_generates_renditions(self) -> None:
+        category = Category.objects.create(name="Photos")
+        self.client.login(username="admin_user", password="Test12345")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("blog:post-create"),
+                {
+                    "title": "New photo",
+                    "content": "text",
+                    "categories": [category.pk],
+                    "image": image_file(),
+                },
+            )
+        post = Post.objects.get(title="New photo")
+
+        self.assertEqual(set(post.renditions), set(RENDITIONS))
+        response = self.client.get(
+            reverse("blog:post-detail", kwargs={"pk": post.pk})
+        )
+        self.assertContains(response, "<picture>")
+        self.assertContains(response, post.renditions["detail"]["src"])
+        if "webp" in available_formats():
+            self.assertContains(response, 'type="image/webp"')
+
+    def test_admin_save_generates_renditions(self) -> None:
+        category = Category.objects.create(name="Photos")
+        self.client.login(username="admin_user", password="Test12345")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("admin:blog_post_add"),
+                {
+                    "title": "Admin photo",
+                    "content": "text",
+                    "author": self.user.pk,
+                    "categories": [category.pk],
+                    "image": image_file("admin.jpg"),
+                },
+            )
+
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get(title="Admin photo")
+        self.assertEqual(set(post.renditions), set(RENDITIONS))
+
+    def test_undecodable_image_is_logged(self) -> None:
+        post = Post.objects.create(
+            title="Photo", content="text", author=self.user,
+            image=image_file(),
+        )
+        generate_renditions(post)
+        post.image = SimpleUploadedFile(
+            "broken.jpg", b"not an image", "image/jpeg"
+        )
+
+        with self.assertLogs("blog.signals", "ERROR") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                post.save()
+
+        self.assertIn("Could not render the image", logs.output[0])
+        post.refresh_from_db()
+        self.assertEqual(post.renditions, {})
+        self.assertEqual(rendition_url(post, "card"), post.image.url)
+
+    @override_settings(IMAGE_RENDITION_WORKERS=1)
+    def test_renditions_are_rendered_in_process_pool(self) -> None:
+        post = Post.objects.create(
+            title="Photo", content="text", author=self.user,
+            image=image_file("pooled.jpg"),
+        )
+
+        manifest = generate_renditions(post)
+        self.assertTrue(all(
+            post.image.storage.exists(name)
+            for rendition in manifest.values()
+            for candidates in rendition["sources"].values()
+            for _, name in candidates
+        ))
@@ -0,0 +1,88 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from blog.models import Category, Comment, ContactMessage, Post
+from blog.pagination import CursorPaginator
+from blog.tests.utils import isolated_cache
+
+# A step of the plan reading a whole table instead of an index
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+
+@isolated_cache
+class HotQueryIndexTests(TestCase):
+    """The hot queries are served by an index, EXPLAIN QUERY PLAN"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user = get_user_model().objects.create_user(username="test_user")
+        cls.category = Category.objects.create(name="Python")
+        cls.post = Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=user
+        )
+        cls.post.categories.add(cls.category)
+        Comment.objects.create(text="Comment", post=cls.post, author=user)
+
+    def plan(self, queryset: QuerySet) -> list[str]:
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(
+        self, queryset: QuerySet, sorted_by_index: bool = True
+    ) -> None:
+        plan = self.plan(queryset)
+        for step in plan:
+            self.assertIsNone(FULL_SCAN.match(step), plan)
+        if sorted_by_index:
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_post_listing(self) -> None:
+        paginator = CursorPaginator(Post.objects.select_related("author"), 4)
+
+        self.assertUsesIndex(paginator.ordered()[:5])
+        self.assertUsesIndex(
+            paginator.after(self.post.created_at, self.post.pk)[:5]
+        )
+
+    def test_posts_of_a_category(self) -> None:
+        paginator = CursorPaginator(
+            Post.objects.filter(categories=self.category), 4
+        )
+        plan = self.plan(paginator.ordered()[:5])
+
+        self.assertIn(
+            "USING COVERING INDEX blog_post_categories_category_post_idx",
+            " ".join(plan),
+        )
+
+    def test_comments_of_a_post(self) -> None:
+        paginator = CursorPaginator(
+            Comment.objects.filter(post=self.post), 4
+        )
+
+        self.assertUsesIndex(paginator.ordered()[:5])
+
+    def test_popular_posts(self) -> None:
+        self.assertUsesIndex(
+            Post.objects.order_by("-comments_count", "-created_at")[:5]
+        )
+        self.assertUsesIndex(
+            Comment.objects.filter(
+                created_at__gte=timezone.now() - timedelta(days=7)
+            )
+            .order_by()
+            .values("post_id")
+            .annotate(comments=Count("id")),
+            sorted_by_index=False,
+        )
+
+    def test_contact_messages(self) -> None:
+        self.assertUsesIndex(ContactMessage.objects.all()[:20])
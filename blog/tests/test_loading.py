@@ -0,0 +1,124 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from blog.loading import deferred_indexes, iter_records, load
+from blog.models import Category, Comment, Post, PostSearchTerm
+from blog.tests.utils import isolated_cache
+
+FIXTURES = [
+    settings.BASE_DIR / "fixtures" / name
+    for name in ("user.json", "category.json", "post.json", "comment.json")
+]
+
+
+class IterRecordsTests(TestCase):
+    def test_array_and_lines_give_the_same_records(self) -> None:
+        records = [{"pk": number, "text": "a, [b]\n"} for number in range(5)]
+        ndjson = "\n".join(json.dumps(record) for record in records) + "\n"
+
+        texts = (json.dumps(records), json.dumps(records, indent=2), ndjson)
+        for text in texts:
+            self.assertEqual(
+                list(iter_records(io.StringIO(text), chunk_size=7)), records
+            )
+
+    def test_truncated_file_raises(self) -> None:
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_records(io.StringIO('[{"pk": 1}, {"pk": ')))
+
+
+class DeferredIndexesTests(TestCase):
+    def indexes(self) -> set:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'blog_comment'"
+            )
+            return {name for name, in cursor.fetchall()}
+
+    def test_indexes_are_recreated(self) -> None:
+        before = self.indexes()
+        with deferred_indexes([Comment]):
+            during = self.indexes()
+
+        self.assertLess(during, before)
+        self.assertEqual(self.indexes(), before)
+
+
+@isolated_cache
+class LoadTests(TestCase):
+    def load_fixtures(self, batch_size: int = 4) -> dict:
+        streams = [open(path, encoding="utf-8") for path in FIXTURES]
+        try:
+            return load(streams, batch_size=batch_size)
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def test_fixtures_are_loaded_like_loaddata(self) -> None:
+        counts = self.load_fixtures()
+
+        post = Post.objects.get(pk=20)
+        self.assertEqual(counts["blog.Post"], Post.objects.count())
+        self.assertEqual(counts["blog.Comment"], Comment.objects.count())
+        self.assertEqual(
+            sorted(post.categories.values_list("pk", flat=True)),
+            [14, 17, 19],
+        )
+        self.assertEqual(
+            post.created_at.isoformat()[:19], "2023-05-29T19:37:55"
+        )
+        self.assertEqual(post.comments_count, post.comments.count())
+        self.assertTrue(PostSearchTerm.objects.filter(post=post).exists())
+
+    def test_loading_twice_updates_the_rows(self) -> None:
+        self.load_fixtures()
+        Post.objects.filter(pk=20).update(title="Changed")
+        self.load_fixtures(batch_size=1000)
+
+        self.assertEqual(
+            Post.objects.get(pk=20).title, "Something about Python"
+        )
+        self.assertEqual(Post.objects.get(pk=20).categories.count(), 3)
+
+    def test_new_rows_get_the_next_primary_keys(self) -> None:
+        self.load_fixtures()
+
+        category = Category.objects.create(name="New category")
+        loaded = Category.objects.exclude(pk=category.pk)
+        self.assertGreater(
+            category.pk, max(loaded.values_list("pk", flat=True))
+        )
+
+    def test_command_reads_jsonl(self) -> None:
+        self.load_fixtures()
+        records = [
+            {
+                "model": "blog.comment",
+                "pk": 10000 + number,
+                "fields": {
+                    "text": "Loaded",
+                    "post": 20,
+                    "author": 1,
+                    "created_at": "2023-06-01T10:00:00Z",
+                },
+            }
+            for number in range(3)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "comments.jsonl"
+            path.write_text(
+                "\n".join(json.dumps(record) for record in records)
+            )
+            call_command("bulk_loaddata", str(path), stdout=io.StringIO())
+
+        post = Post.objects.get(pk=20)
+        self.assertEqual(post.comments.filter(text="Loaded").count(), 3)
+        self.assertEqual(post.comments_count, post.comments.count())
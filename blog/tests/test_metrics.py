@@ -0,0 +1,137 @@
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.metrics import (
+    MetricsStore,
+    Recorder,
+    get_recorder,
+    get_store,
+    render_metrics,
+)
+from blog.models import Post
+from blog.tests.utils import isolated_cache
+
+
+class MetricsStoreTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "metrics.sqlite3"
+
+    def test_processes_add_up_in_the_store(self) -> None:
+        labels = (("view", "blog:index"),)
+        for duration in (0.003, 0.2):
+            # A recorder and a connection per worker process
+            recorder = Recorder()
+            recorder.observe("blog_request_duration_seconds", labels, duration)
+            with override_settings(METRICS_PATH=self.path):
+                recorder.flush()
+
+        text = render_metrics(MetricsStore(self.path).read())
+
+        self.assertIn(
+            'blog_request_duration_seconds_bucket'
+            '{view="blog:index",le="0.005"} 1',
+            text,
+        )
+        self.assertIn(
+            'blog_request_duration_seconds_bucket'
+            '{view="blog:index",le="0.25"} 2',
+            text,
+        )
+        self.assertIn(
+            'blog_request_duration_seconds_count{view="blog:index"} 2', text
+        )
+
+    def test_label_values_are_escaped(self) -> None:
+        text = render_metrics({
+            ("blog_requests_total", (("view", 'a"b\\c'),), "value"): 3.0,
+        })
+
+        self.assertIn('blog_requests_total{view="a\\"b\\\\c"} 3', text)
+
+
+@isolated_cache
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            METRICS_PATH=Path(directory.name) / "metrics.sqlite3"
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # What other tests recorded goes to the store of this test
+        get_recorder().flush()
+        get_store().clear()
+
+        user = get_user_model().objects.create_user(
+            username="test_user", password="Test12345"
+        )
+        Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=user
+        )
+
+    def test_requests_are_recorded_by_view(self) -> None:
+        self.client.get(reverse("blog:index"))
+        self.client.get(reverse("blog:index"))
+        self.client.get("/no-such-page/")
+
+        response = self.client.get(reverse("blog:metrics"))
+        text = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'blog_requests_total{view="blog:index",status="2xx"} 2', text
+        )
+        self.assertIn(
+            'blog_requests_total{view="unresolved",status="4xx"} 1', text
+        )
+        self.assertIn(
+            'blog_response_cache_total{view="blog:index",result="hit"} 1',
+            text,
+        )
+        self.assertIn(
+            'blog_template_render_seconds_count{view="blog:index"} 2', text
+        )
+        values = get_store().read()
+        labels = (("view", "blog:index"),)
+        self.assertGreater(
+            values["blog_template_render_seconds", labels, "sum"], 0
+        )
+        self.assertGreater(values["blog_db_queries", labels, "sum"], 0)
+
+    def test_metrics_are_only_served_to_the_allowed_ips(self) -> None:
+        response = self.client.get(
+            reverse("blog:metrics"), REMOTE_ADDR="203.0.113.7"
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_a_failed_flush_does_not_fail_the_request(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # The store can not be created under a regular file
+        blocker = Path(directory.name) / "file"
+        blocker.write_text("")
+        recorder = get_recorder()
+
+        with override_settings(
+            METRICS_PATH=blocker / "metrics.sqlite3",
+            METRICS_FLUSH_INTERVAL=0,
+        ), self.assertLogs("blog.middleware", "WARNING") as logs:
+            response = self.client.get(reverse("blog:about"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Could not flush the metrics", logs.output[0])
+        # Kept for the next flush
+        labels = (("view", "blog:about"), ("status", "2xx"))
+        self.assertEqual(
+            recorder._values["blog_requests_total", labels, "value"], 1
+        )
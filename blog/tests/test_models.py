@@ -1,9 +1,15 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
 
 from blog.models import Category, Post, Comment, ContactMessage
+from blog.tests.utils import isolated_cache
 
 
+@isolated_cache
 class ModelTests(TestCase):
     def setUp(self) -> None:
         self.user = get_user_model().objects.create_user(
@@ -47,3 +53,66 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(contact_message), contact_message.name)
+
+
+@isolated_cache
+class CommentsCountTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            password="Test12345",
+        )
+        self.post = Post.objects.create(
+            title="Test title",
+            content="Lorem ipsum dolor",
+            author=self.user,
+        )
+
+    def add_comment(self, author=None) -> Comment:
+        return Comment.objects.create(
+            text="Test comment",
+            post=self.post,
+            author=author or self.user,
+        )
+
+    def test_counter_follows_created_and_deleted_comments(self) -> None:
+        first = self.add_comment()
+        self.add_comment()
+        first.delete()
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_counter_follows_cascade_delete_of_author(self) -> None:
+        commenter = get_user_model().objects.create_user(
+            username="commenter",
+            password="Test12345",
+        )
+        self.add_comment(author=commenter)
+        self.add_comment()
+        commenter.delete()
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_comment_delete_view_updates_counter(self) -> None:
+        comment = self.add_comment()
+        self.client.login(username="test_user", password="Test12345")
+        self.client.post(
+            reverse("blog:comment-delete", kwargs={"pk": comment.pk})
+        )
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_reconcile_command_repairs_drifted_counters(self) -> None:
+        Comment.objects.bulk_create(
+            Comment(text="Bulk", post=self.post, author=self.user)
+            for _ in range(3)
+        )
+        out = StringIO()
+        call_command("reconcile_comment_counts", batch_size=1, stdout=out)
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.comments_count, 3)
+        self.assertIn("Repaired 1", out.getvalue())
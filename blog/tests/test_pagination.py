@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from blog.pagination import NEXT, CursorPaginator
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class CursorPaginatorTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            password="Test12345",
+        )
+        Post.objects.bulk_create(
+            Post(title=f"Post {number}", content="text", author=self.user)
+            for number in range(10)
+        )
+        # Two posts share the timestamp to check the id tie breaker
+        now = timezone.now()
+        for number, post in enumerate(Post.objects.order_by("pk")):
+            post.created_at = now - timedelta(minutes=number // 2)
+            post.save(update_fields=["created_at"])
+        self.ordered = list(Post.objects.order_by("-created_at", "-id"))
+
+    def walk_forward(self, paginator: CursorPaginator) -> list:
+        pages = [paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+
+        return pages
+
+    def test_pages_cover_every_object_once(self) -> None:
+        pages = self.walk_forward(CursorPaginator(Post.objects.all(), 4))
+
+        self.assertEqual(
+            [post for page in pages for post in page], self.ordered
+        )
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursor_returns_the_same_page(self) -> None:
+        paginator = CursorPaginator(Post.objects.all(), 4)
+        pages = self.walk_forward(paginator)
+
+        previous = paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        first = paginator.get_page(previous.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous())
+
+    async def test_async_pages_match_the_sync_ones(self) -> None:
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        first = await paginator.aget_page(None)
+        second = await paginator.aget_page(first.next_cursor)
+        back = await paginator.aget_page(second.previous_cursor)
+
+        self.assertEqual(list(second), self.ordered[3:6])
+        self.assertEqual(list(back), list(first))
+
+    def test_malformed_cursor_returns_first_page(self) -> None:
+        page = CursorPaginator(Post.objects.all(), 4).get_page("not-a-cursor")
+
+        self.assertEqual(list(page), self.ordered[:4])
+
+    def test_cursor_out_of_the_integer_range_returns_first_page(
+        self,
+    ) -> None:
+        def cursor(pk) -> str:
+            return base64.urlsafe_b64encode(json.dumps(
+                [NEXT, "2023-01-01T00:00:00+00:00", pk]
+            ).encode()).decode()
+
+        paginator = CursorPaginator(Post.objects.all(), 4)
+        for pk in (10 ** 30, -1, 1e400):
+            with self.subTest(pk=pk):
+                page = paginator.get_page(cursor(pk))
+                self.assertEqual(list(page), self.ordered[:4])
+
+        for url in (
+            reverse("blog:index"),
+            reverse("blog:post-detail", kwargs={"pk": self.ordered[0].pk}),
+        ):
+            response = self.client.get(url, {"cursor": cursor(10 ** 30)})
+            self.assertEqual(response.status_code, 200)
+
+    def test_deep_page_is_a_single_query_without_count(self) -> None:
+        paginator = CursorPaginator(Post.objects.all(), 4)
+        cursor = self.walk_forward(paginator)[1].next_cursor
+
+        with self.assertNumQueries(1):
+            page = paginator.get_page(cursor)
+            list(page)
+
+    def test_index_view_links_next_page_by_cursor(self) -> None:
+        response = self.client.get(reverse("blog:index"))
+        page_obj = response.context["page_obj"]
+
+        self.assertContains(response, f"cursor={page_obj.next_cursor}")
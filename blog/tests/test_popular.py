@@ -0,0 +1,99 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from blog import popular
+from blog.models import Comment, Post
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class PopularPostsTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            password="Test12345",
+        )
+        self.quiet = Post.objects.create(
+            title="Quiet", content="text", author=self.user
+        )
+        self.busy = Post.objects.create(
+            title="Busy", content="text", author=self.user
+        )
+        self.old = Post.objects.create(
+            title="Old", content="text", author=self.user
+        )
+
+    def comment(self, post: Post, days_ago: int = 0) -> None:
+        comment = Comment.objects.create(
+            text="Test comment", post=post, author=self.user
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def test_windows_rank_by_recent_comments(self) -> None:
+        self.comment(self.busy)
+        self.comment(self.busy)
+        self.comment(self.quiet, days_ago=3)
+        for _ in range(3):
+            self.comment(self.old, days_ago=20)
+
+        def ranking(window: str) -> list:
+            return [
+                post["id"]
+                for post in popular.compute_popular_posts(window, 5)
+            ]
+
+        self.assertEqual(ranking("24h"), [self.busy.pk])
+        self.assertEqual(ranking("7d"), [self.busy.pk, self.quiet.pk])
+        self.assertEqual(
+            ranking("all"), [self.old.pk, self.busy.pk, self.quiet.pk]
+        )
+
+    def test_cold_cache_does_not_compute_in_request(self) -> None:
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(0):
+                self.assertEqual(popular.get_popular_posts(), [])
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_stale_snapshot_is_served_while_refreshing(self) -> None:
+        popular.refresh_popular_posts()
+        self.comment(self.busy)
+
+        with mock.patch("time.time", return_value=10 ** 12):
+            with self.captureOnCommitCallbacks() as callbacks:
+                stale = popular.get_popular_posts()
+
+        self.assertEqual(stale[0]["comments"], 0)
+        self.assertTrue(callbacks)
+
+    def test_new_comment_schedules_background_refresh(self) -> None:
+        popular.refresh_popular_posts()
+
+        with mock.patch.object(popular, "_executor") as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.comment(self.busy)
+
+        executor.submit.assert_called_once_with(
+            popular._refresh_in_background
+        )
+
+    def test_refresh_requested_while_refreshing_runs_again(self) -> None:
+        with mock.patch.object(popular, "_executor") as executor:
+            popular._submit_refresh()
+            popular._submit_refresh()
+
+        executor.submit.assert_called_once()
+        with mock.patch.object(popular, "refresh_popular_posts") as refresh:
+            popular._refresh_in_background()
+
+        self.assertEqual(refresh.call_count, 2)
+        self.assertIsNone(cache.get(popular.REFRESH_LOCK_KEY))
+        self.assertIsNone(cache.get(popular.REFRESH_PENDING_KEY))
@@ -0,0 +1,137 @@
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.shortcuts import render
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Post
+from blog.profiling import PROFILE_SUFFIX, read_profile, render_flamegraph
+from blog.tests.utils import isolated_cache
+
+
+def slow_render(*args, **kwargs):
+    time.sleep(0.05)
+    return render(*args, **kwargs)
+
+
+@isolated_cache
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        user = get_user_model().objects.create_user(
+            username="test_user", password="Test12345"
+        )
+        Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=user
+        )
+
+    def profiles(self) -> list[Path]:
+        return sorted(self.directory.glob(f"*{PROFILE_SUFFIX}"))
+
+    def test_slow_requests_are_saved_with_their_tags(self) -> None:
+        with override_settings(
+            PROFILER_DIR=self.directory,
+            PROFILER_SLOW_SECONDS=0.02,
+            PROFILER_INTERVAL=0.001,
+        ), mock.patch("blog.views.render", slow_render):
+            self.client.get(reverse("blog:index"), {"q": "lorem"})
+
+        [path] = self.profiles()
+        tags, stacks = read_profile(path)
+        self.assertEqual(tags["view"], "blog:index")
+        self.assertEqual(tags["query"], "q=lorem")
+        self.assertEqual(tags["trigger"], "slow")
+        self.assertGreaterEqual(float(tags["duration_ms"]), 50)
+        self.assertTrue(
+            any(stack.endswith(":slow_render") for stack in stacks)
+        )
+
+    def test_fast_requests_are_not_saved(self) -> None:
+        with override_settings(
+            PROFILER_DIR=self.directory, PROFILER_SLOW_SECONDS=10
+        ):
+            self.client.get(reverse("blog:index"))
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_sampled_requests_are_saved(self) -> None:
+        with override_settings(
+            PROFILER_DIR=self.directory,
+            PROFILER_SAMPLE_RATE=1,
+            PROFILER_INTERVAL=0.001,
+        ), mock.patch("blog.views.render", slow_render):
+            self.client.get(reverse("blog:index"))
+
+        [path] = self.profiles()
+        self.assertEqual(read_profile(path)[0]["trigger"], "sample")
+
+    def test_profile_that_can_not_be_written_does_not_fail_the_request(
+        self,
+    ) -> None:
+        # The directory can not be created under a regular file
+        blocker = self.directory / "file"
+        blocker.write_text("")
+
+        with override_settings(
+            PROFILER_DIR=blocker / "profiles",
+            PROFILER_SAMPLE_RATE=1,
+            PROFILER_INTERVAL=0.001,
+        ), mock.patch("blog.views.render", slow_render), self.assertLogs(
+            "blog.profiling", "WARNING"
+        ) as logs:
+            response = self.client.get(reverse("blog:index"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "Could not save the profile of blog:index", logs.output[0]
+        )
+
+
+class BuildFlamegraphsTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_profile(self, name: str, view: str, lines: list[str]) -> None:
+        (self.directory / f"{name}{PROFILE_SUFFIX}").write_text(
+            f"# view: {view}\n# path: /\n# query: page=40\n"
+            "# trigger: slow\n# duration_ms: 812.5\n"
+            + "\n".join(lines)
+            + "\n"
+        )
+
+    def test_profiles_are_merged_by_view(self) -> None:
+        self.write_profile("a", "blog:index", ["main;query 3", "main 1"])
+        self.write_profile("b", "blog:index", ["main;query 2"])
+        self.write_profile("c", "blog:about", ["main;render 5"])
+        stdout = StringIO()
+
+        with override_settings(PROFILER_DIR=self.directory):
+            call_command("build_flamegraphs", "--clear", stdout=stdout)
+
+        output = self.directory / "flamegraphs"
+        self.assertEqual(
+            (output / f"blog.index{PROFILE_SUFFIX}").read_text(),
+            "main;query 5\nmain 1\n",
+        )
+        self.assertIn("<svg", (output / "blog.about.svg").read_text())
+        self.assertIn("812.5 ms /?page=40", stdout.getvalue())
+        self.assertEqual(list(self.directory.glob(f"*{PROFILE_SUFFIX}")), [])
+
+    def test_flamegraph_escapes_the_frame_names(self) -> None:
+        svg = render_flamegraph({"main;<lambda>": 4}, "blog:index")
+
+        self.assertIn("&lt;lambda&gt; (4 samples, 100.0%)", svg)
+        self.assertNotIn("<lambda>", svg)
@@ -0,0 +1,140 @@
+import threading
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Category, Comment, Post
+from blog.queries import QueryInspector, query_shape
+from blog.tests.utils import QueryBudgetMixin, isolated_cache
+
+
+class QueryShapeTests(SimpleTestCase):
+    def test_literals_and_in_lists_are_collapsed(self) -> None:
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+            query_shape("SELECT * FROM t WHERE id IN (%s)"),
+        )
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE a = 'x' AND b = 10"),
+            "SELECT * FROM t WHERE a = ? AND b = ?",
+        )
+
+
+@isolated_cache
+class QueryInspectorTests(TestCase):
+    def test_repeated_shapes_are_reported(self) -> None:
+        user = get_user_model().objects.create_user(username="author")
+        for number in range(3):
+            Post.objects.create(title=f"{number}", content="", author=user)
+
+        with QueryInspector() as inspector:
+            for post in Post.objects.all():
+                str(post.author)
+
+        self.assertEqual(inspector.count, 4)
+        self.assertEqual(len(inspector.n_plus_one()), 1)
+        self.assertEqual(list(inspector.duplicates().values()), [3])
+
+    def test_threads_of_the_context_are_followed(self) -> None:
+        def count() -> None:
+            # No table, the one of the test transaction would be locked
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            finally:
+                connection.close()
+
+        with QueryInspector() as inspector:
+            # A new thread, like the ones of the ASGI handler
+            async_to_sync(sync_to_async(count, thread_sensitive=False))()
+            # Runs in an empty context, e.g. another request
+            thread = threading.Thread(target=count)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(inspector.count, 1)
+
+    def test_wrapper_is_removed_on_exit(self) -> None:
+        with QueryInspector():
+            pass
+
+        self.assertEqual(connection.execute_wrappers, [])
+
+
+@isolated_cache
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = get_user_model().objects.create_superuser(
+            username="admin_user",
+            password="Test12345",
+        )
+        categories = [
+            Category.objects.create(name=f"Category {number}")
+            for number in range(3)
+        ]
+        cls.post = None
+        for number in range(6):
+            cls.post = Post.objects.create(
+                title=f"Post {number}", content="text", author=cls.user
+            )
+            cls.post.categories.set(categories)
+        commenters = [
+            get_user_model().objects.create_user(username=f"user{number}")
+            for number in range(4)
+        ]
+        for commenter in commenters:
+            Comment.objects.create(
+                text="comment", post=cls.post, author=commenter
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_anonymous_pages(self) -> None:
+        pages = {
+            "blog:index": reverse("blog:index"),
+            "blog:post-detail": reverse(
+                "blog:post-detail", kwargs={"pk": self.post.pk}
+            ),
+            "blog:about": reverse("blog:about"),
+            "blog:contact": reverse("blog:contact"),
+        }
+        for view_name, url in pages.items():
+            with self.subTest(view_name), self.assertQueryBudget(view_name):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_authenticated_pages(self) -> None:
+        self.client.force_login(self.user)
+        pages = {
+            "blog:index": reverse("blog:index"),
+            "blog:post-detail": reverse(
+                "blog:post-detail", kwargs={"pk": self.post.pk}
+            ),
+            "blog:post-create": reverse("blog:post-create"),
+            "blog:post-update": reverse(
+                "blog:post-update", kwargs={"pk": self.post.pk}
+            ),
+        }
+        for view_name, url in pages.items():
+            with self.subTest(view_name), self.assertQueryBudget(view_name):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(QUERY_INSPECTION=True, QUERY_BUDGETS={"blog:index": 0})
+    def test_middleware_reports_queries(self) -> None:
+        with self.assertLogs("blog.middleware", "WARNING") as logs:
+            response = self.client.get(reverse("blog:index"))
+
+        self.assertIn('queries"', response["Server-Timing"])
+        self.assertIn("over its budget of 0", logs.output[0])
+
+    @override_settings(QUERY_INSPECTION=True)
+    async def test_middleware_runs_in_the_async_chain(self) -> None:
+        response = await self.async_client.get(reverse("blog:about"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Server-Timing", response)
@@ -0,0 +1,84 @@
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from blog.caching import is_replica_stale, invalidate_tags
+from blog.middleware import ReplicaRoutingMiddleware
+from blog.models import Comment
+from blog.routers import PrimaryReplicaRouter, mark_synced, routing
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_outside_a_request_use_the_primary(self) -> None:
+        mark_synced("replica_1", time.time())
+
+        self.assertEqual(self.router.db_for_read(Comment), "default")
+
+    def test_request_reads_the_primary_after_a_write(self) -> None:
+        mark_synced("replica_1", time.time())
+
+        with routing() as state:
+            self.assertEqual(self.router.db_for_read(Comment), "replica_1")
+            self.assertEqual(self.router.db_for_write(Comment), "default")
+            self.assertEqual(self.router.db_for_read(Comment), "default")
+
+        self.assertTrue(state.wrote)
+
+    def test_replica_never_synced_is_not_read(self) -> None:
+        with routing():
+            self.assertEqual(self.router.db_for_read(Comment), "default")
+
+    def test_replica_lagging_behind_is_not_read(self) -> None:
+        mark_synced("replica_1", time.time() - 60)
+
+        with routing():
+            self.assertEqual(self.router.db_for_read(Comment), "default")
+
+    @override_settings(REPLICA_MAX_LAG=60)
+    def test_max_lag_is_capped_by_the_pin_window(self) -> None:
+        mark_synced("replica_1", time.time() - 30)
+
+        with routing():
+            self.assertEqual(self.router.db_for_read(Comment), "default")
+
+    def test_client_that_wrote_is_pinned_to_the_primary(self) -> None:
+        mark_synced("replica_1", time.time())
+        databases = []
+
+        def view(request) -> HttpResponse:
+            databases.append(self.router.db_for_read(Comment))
+            if request.method == "POST":
+                self.router.db_for_write(Comment)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.post("/"))
+        factory.cookies["primary"] = response.cookies["primary"].value
+        middleware(factory.get("/"))
+
+        self.assertEqual(response.cookies["primary"]["max-age"], 5)
+        self.assertEqual(databases, ["replica_1", "default"])
+
+    def test_response_of_a_stale_replica_is_not_cached(self) -> None:
+        mark_synced("replica_1", time.time())
+        invalidate_tags("comments:1")
+
+        with routing() as state:
+            self.assertEqual(state.replica, "replica_1")
+            self.assertTrue(is_replica_stale(["comments:1"]))
+            self.assertFalse(is_replica_stale(["comments:2"]))
+
+        mark_synced("replica_1", time.time())
+        with routing() as state:
+            self.assertEqual(state.replica, "replica_1")
+            self.assertFalse(is_replica_stale(["comments:1"]))
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Post, PostSearchTerm
+from blog.search import search_posts, tokenize
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+class SearchIndexTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            password="Test12345",
+        )
+        self.python_post = Post.objects.create(
+            title="Something about Python",
+            content="<p>Snakes &amp; <strong>pythonic</strong> code</p>",
+            author=self.user,
+        )
+        self.food_post = Post.objects.create(
+            title="Summer food",
+            content="<p>Fresh fruits and a little python</p>",
+            author=self.user,
+        )
+
+    def test_tokenize_strips_html_and_entities(self) -> None:
+        self.assertEqual(
+            tokenize("<p>Snakes &amp; <strong>Pythonic</strong> code</p>"),
+            ["snakes", "pythonic", "code"],
+        )
+
+    def test_index_is_updated_on_save(self) -> None:
+        self.food_post.title = "Winter drinks"
+        self.food_post.save()
+
+        terms = set(
+            self.food_post.search_terms.values_list("term", flat=True)
+        )
+        self.assertIn("winter", terms)
+        self.assertNotIn("summer", terms)
+
+    def test_index_entries_are_removed_with_post(self) -> None:
+        post_pk = self.python_post.pk
+        self.python_post.delete()
+
+        self.assertFalse(PostSearchTerm.objects.filter(post_id=post_pk))
+
+    def test_search_ranks_title_matches_first(self) -> None:
+        results = list(search_posts(Post.objects.all(), "python"))
+
+        self.assertEqual(results, [self.python_post, self.food_post])
+
+    def test_search_requires_every_word(self) -> None:
+        results = list(search_posts(Post.objects.all(), "python fruits"))
+
+        self.assertEqual(results, [self.food_post])
+
+    def test_rebuild_command_restores_index(self) -> None:
+        PostSearchTerm.objects.all().delete()
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(
+            list(search_posts(Post.objects.all(), "summer")),
+            [self.food_post],
+        )
+
+    def test_index_view_reports_no_results(self) -> None:
+        response = self.client.get(
+            reverse("blog:index"), {"search_term": "missing"}
+        )
+
+        self.assertEqual(len(response.context["page_obj"]), 0)
+        self.assertContains(response, "No results found")
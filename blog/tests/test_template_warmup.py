@@ -0,0 +1,81 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase, override_settings
+
+from blog.template_warmup import (
+    build_manifest,
+    compiled_templates,
+    get_engines,
+    warm_templates,
+)
+
+
+class TemplateWarmupTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "templates.json"
+        self.manifest_path = override_settings(
+            TEMPLATE_MANIFEST_PATH=self.path
+        )
+        self.manifest_path.enable()
+        self.addCleanup(self.manifest_path.disable)
+
+    @staticmethod
+    def reset_loaders() -> None:
+        for engine in get_engines().values():
+            for loader in engine.template_loaders:
+                if isinstance(loader, CachedLoader):
+                    loader.reset()
+
+    def test_manifest_lists_the_templates_loaded_by_the_forms(self) -> None:
+        manifest = build_manifest(self.path)
+
+        self.assertIn("base.html", manifest["templates"])
+        self.assertIn("bootstrap5/field.html", manifest["templates"])
+        self.assertIn(
+            "django/forms/widgets/textarea.html", manifest["form_templates"]
+        )
+        self.assertEqual(
+            json.loads(self.path.read_text())["templates"],
+            manifest["templates"],
+        )
+
+    def test_warmup_compiles_the_templates_of_the_manifest(self) -> None:
+        manifest = build_manifest(self.path)
+        self.reset_loaders()
+
+        with self.assertNumQueries(0):
+            warm_templates()
+
+        for section, engine in get_engines().items():
+            self.assertEqual(compiled_templates(engine), manifest[section])
+
+    def test_missing_templates_of_the_manifest_are_skipped(self) -> None:
+        self.path.write_text(json.dumps({
+            "version": 1,
+            "templates": ["base.html", "removed.html"],
+            "form_templates": [],
+        }))
+        self.reset_loaders()
+
+        with self.assertLogs("blog.template_warmup", "INFO"):
+            warm_templates()
+
+        compiled = compiled_templates(get_engines()["templates"])
+        self.assertIn("base.html", compiled)
+        self.assertNotIn("removed.html", compiled)
+
+    def test_without_manifest_the_forms_are_rendered(self) -> None:
+        self.reset_loaders()
+
+        with override_settings(TEMPLATE_MANIFEST_PATH=""):
+            warm_templates()
+
+        self.assertIn(
+            "bootstrap5/field.html",
+            compiled_templates(get_engines()["templates"]),
+        )
@@ -1,12 +1,19 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
 from blog.forms import PostFilterForm, PostSearchForm, SignUpForm
-from blog.models import User, ContactMessage, Post
+from blog.models import Category, Comment, User, ContactMessage, Post
+from blog.tests.utils import isolated_cache
 
 
+@isolated_cache
 class ViewWithoutUserTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
     def test_access_index_view_and_correct_template(self) -> None:
         response = self.client.get(reverse("blog:index"))
 
@@ -60,6 +67,7 @@ class ViewWithoutUserTests(TestCase):
         ).exists())
 
 
+@isolated_cache
 class ViewWithUserTests(TestCase):
     def setUp(self) -> None:
         self.user = get_user_model().objects.create_user(
@@ -108,3 +116,85 @@ class ViewWithUserTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 403)
+
+    def test_ckeditor_is_only_loaded_by_the_post_form(self) -> None:
+        response = self.client.get(reverse("blog:index"))
+
+        self.assertNotContains(response, "ckeditor.js")
+
+        self.user.is_superuser = True
+        self.user.save()
+        response = self.client.get(reverse("blog:post-create"))
+
+        self.assertContains(response, "ckeditor/ckeditor.js")
+
+
+@isolated_cache
+class AsyncViewTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            password="Test12345",
+        )
+        self.post = Post.objects.create(
+            title="Test title",
+            content="Lorem ipsum dolor",
+            author=self.user,
+        )
+        self.post.categories.add(Category.objects.create(name="Travel"))
+        Comment.objects.create(
+            text="First comment", post=self.post, author=self.user
+        )
+        self.pages = [
+            reverse("blog:index"),
+            reverse("blog:about"),
+            reverse("blog:contact"),
+            reverse("blog:post-detail", kwargs={"pk": self.post.pk}),
+        ]
+
+    def test_wsgi_handler_serves_the_sync_views(self) -> None:
+        for url in self.pages:
+            with self.subTest(url):
+                response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(
+                    iscoroutinefunction(response.resolver_match.func)
+                )
+
+    async def test_asgi_handler_serves_the_async_views(self) -> None:
+        for url in self.pages:
+            with self.subTest(url):
+                response = await self.async_client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(
+                    iscoroutinefunction(response.resolver_match.func)
+                )
+
+    async def test_async_post_detail_matches_the_sync_one(self) -> None:
+        url = reverse("blog:post-detail", kwargs={"pk": self.post.pk})
+
+        response = await self.async_client.get(url)
+
+        self.assertContains(response, "Test title")
+        self.assertContains(response, "First comment")
+        self.assertContains(response, "Travel")
+        self.assertEqual(response.asgi_request.response_cache, "miss")
+        response = await self.async_client.get(url)
+        self.assertEqual(response.asgi_request.response_cache, "hit")
+
+        response = await self.async_client.get(
+            reverse("blog:post-detail", kwargs={"pk": self.post.pk + 1})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_post_detail_adds_comments(self) -> None:
+        await sync_to_async(self.async_client.force_login)(self.user)
+        url = reverse("blog:post-detail", kwargs={"pk": self.post.pk})
+
+        response = await self.async_client.post(url, {"text": "Async"})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Comment.objects.filter(text="Async").aexists())
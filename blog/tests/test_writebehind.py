@@ -0,0 +1,142 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog import writebehind
+from blog.forms import CommentForm
+from blog.models import WRITE_TOKEN_LENGTH, Comment, ContactMessage, Post
+from blog.tests.utils import isolated_cache
+
+
+@isolated_cache
+@mock.patch("blog.writebehind.schedule_refresh")
+@mock.patch("blog.signals.schedule_refresh")
+class WriteBehindTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            WRITE_BEHIND=True,
+            WRITE_QUEUE_PATH=Path(directory.name) / "queue.sqlite3",
+            WRITE_QUEUE_MAX_DEPTH=3,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.queue = writebehind.get_queue()
+
+        self.user = get_user_model().objects.create_user(
+            username="test_user", password="Test12345"
+        )
+        self.post = Post.objects.create(
+            title="Test title", content="Lorem ipsum", author=self.user
+        )
+        self.url = reverse("blog:post-detail", kwargs={"pk": self.post.pk})
+
+    def test_comment_is_queued_then_drained(self, *mocks) -> None:
+        self.client.force_login(self.user)
+        data = {"text": "Queued comment", "token": "a" * 32}
+
+        response = self.client.post(self.url, data, follow=True)
+        self.client.post(self.url, data)
+
+        self.assertContains(response, "will appear in a moment")
+        self.assertFalse(Comment.objects.exists())
+        stats = self.queue.stats()
+        self.assertEqual(stats["depth"], 1)
+        self.assertEqual(stats["duplicates"], 1)
+
+        self.assertEqual(writebehind.drain(), 1)
+
+        comment = Comment.objects.get()
+        self.assertEqual(comment.text, "Queued comment")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        stats = self.queue.stats()
+        self.assertEqual((stats["depth"], stats["drained"]), (0, 1))
+
+    def test_token_is_at_most_as_long_as_the_stored_one(self, *mocks) -> None:
+        for length, valid in (
+            (WRITE_TOKEN_LENGTH, True), (WRITE_TOKEN_LENGTH + 1, False)
+        ):
+            form = CommentForm({"text": "Comment", "token": "a" * length})
+            self.assertEqual(form.is_valid(), valid)
+
+    def test_full_queue_refuses_with_retry_after(self, *mocks) -> None:
+        for number in range(3):
+            writebehind.enqueue_comment(
+                self.post.pk, self.user, "Comment", str(number)
+            )
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("blog:api-comments", kwargs={"pk": self.post.pk}),
+            {"text": "One too many"},
+        )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response["Retry-After"], str(writebehind.RETRY_AFTER)
+        )
+        self.assertEqual(self.queue.stats()["rejected"], 1)
+
+    def test_expired_lease_is_inserted_once(self, *mocks) -> None:
+        writebehind.enqueue_contact_message({
+            "name": "Name",
+            "email": "name@example.com",
+            "subject": "Subject",
+            "message": "Message",
+            "token": "token",
+        })
+        # A worker inserted the batch and died before deleting it
+        with mock.patch.object(self.queue, "ack"):
+            writebehind.drain(lease=0)
+        self.assertEqual(self.queue.depth(), 1)
+
+        self.assertEqual(writebehind.drain(), 1)
+
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(self.queue.depth(), 0)
+
+    def test_comments_of_deleted_posts_are_dropped(self, *mocks) -> None:
+        writebehind.enqueue_comment(self.post.pk, self.user, "Comment", "")
+        self.post.delete()
+
+        with self.assertLogs("blog.writebehind", "WARNING") as logs:
+            writebehind.drain()
+
+        self.assertIn(
+            "Dropped 1 comments of deleted posts or users", logs.output[0]
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.queue.stats()["dropped"], 1)
+
+    @override_settings(WRITE_QUEUE_MAX_ATTEMPTS=2)
+    def test_failing_write_is_dead_lettered(self, *mocks) -> None:
+        self.queue.enqueue(
+            writebehind.COMMENT, "poisoned", {"unknown_field": "Comment"}
+        )
+        writebehind.enqueue_comment(self.post.pk, self.user, "Comment", "")
+
+        with self.assertLogs("blog.writebehind", "WARNING"):
+            self.assertEqual(writebehind.drain(lease=0), 2)
+
+        self.assertEqual(Comment.objects.get().text, "Comment")
+        stats = self.queue.stats()
+        self.assertEqual((stats["depth"], stats["dead_writes"]), (1, 0))
+
+        with self.assertLogs("blog.writebehind", "ERROR") as logs:
+            self.assertEqual(writebehind.drain(lease=0), 1)
+
+        self.assertIn("to dead_writes after 2 attempts", logs.output[0])
+        stats = self.queue.stats()
+        self.assertEqual((stats["depth"], stats["dead_writes"]), (0, 1))
+        self.assertEqual(stats["dead"], 1)
+        self.assertEqual(writebehind.drain(), 0)
+
+        self.assertEqual(self.queue.requeue_dead(), 1)
+        stats = self.queue.stats()
+        self.assertEqual((stats["depth"], stats["dead_writes"]), (1, 0))
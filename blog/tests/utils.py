@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+from django.test import override_settings
+
+from blog.queries import QueryInspector, get_query_budget
+
+# The tests must not read or wipe the cache of the development server
+isolated_cache = override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "blog-tests",
+        }
+    }
+)
+
+
+class QueryBudgetMixin:
+    """
+    Assertions on the queries of the views
+
+    A view fails the test when it runs more queries than its
+    QUERY_BUDGETS entry or repeats a query shape (N+1)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, view_name: str):
+        budget = get_query_budget(view_name)
+        if budget is None:
+            self.fail(f"{view_name} has no entry in QUERY_BUDGETS")
+
+        with QueryInspector() as inspector:
+            yield inspector
+
+        self.assertFalse(
+            inspector.n_plus_one(),
+            f"N+1 queries in {view_name}",
+        )
+        self.assertLessEqual(
+            inspector.count,
+            budget,
+            f"{view_name} ran {inspector.count} queries:\n"
+            + "\n".join(query.sql for query in inspector.queries),
+        )
@@ -1,5 +1,7 @@
 from django.urls import path
 
+from blog import async_views
+from blog.api import CommentAPIView, CommentListAPIView
 from blog.views import (
     index,
     PostDetailView,
@@ -10,6 +12,7 @@ from blog.views import (
     CommentDeleteView,
     contact,
     about,
+    metrics,
 )
 
 app_name = "blog"
@@ -19,6 +22,7 @@ urlpatterns = [
     path("signup/", register, name="sign-up"),
     path("contact/", contact, name="contact"),
     path("about/", about, name="about"),
+    path("metrics", metrics, name="metrics"),
     path("post/<int:pk>/", PostDetailView.as_view(), name="post-detail"),
     path("post/create/", PostCreateView.as_view(), name="post-create"),
     path(
@@ -32,4 +36,27 @@ urlpatterns = [
         CommentDeleteView.as_view(),
         name="comment-delete"
     ),
+    path(
+        "api/post/<int:pk>/comments/",
+        CommentListAPIView.as_view(),
+        name="api-comments",
+    ),
+    path(
+        "api/comment/<int:pk>/",
+        CommentAPIView.as_view(),
+        name="api-comment",
+    ),
 ]
+
+# The ASGI entry point serves the main pages with their async variants,
+# see blog.middleware.AsyncViewsMiddleware
+async_urlpatterns = [
+    path("", async_views.index, name="index"),
+    path("contact/", async_views.contact, name="contact"),
+    path("about/", async_views.about, name="about"),
+    path(
+        "post/<int:pk>/",
+        async_views.PostDetailView.as_view(),
+        name="post-detail",
+    ),
+] + urlpatterns
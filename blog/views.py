@@ -1,14 +1,29 @@
 from typing import Optional
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
-from django.db.models import Count, Q, QuerySet
+from django.db.models import QuerySet
 from django.http import HttpResponse
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, redirect
 from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import DetailView, CreateView, UpdateView, DeleteView
 
+from blog.caching import (
+    CATEGORIES_TAG,
+    POPULAR_TAG,
+    POST_LIST_TAG,
+    add_cache_tags,
+    cache_response,
+    comments_tag,
+    post_tag,
+)
+
+from blog.categories import categories_of, with_category_ids
 from blog.forms import (
     PostFilterForm,
     PostSearchForm,
@@ -17,33 +32,40 @@ from blog.forms import (
     PostForm,
     ContactForm,
 )
+from blog.metrics import get_recorder, get_store, render_metrics
 from blog.models import Post, Comment, ContactMessage
+from blog.pagination import CursorPaginator
+from blog.search import search_posts
+from blog import writebehind
 
 
+@cache_response
 def index(request) -> HttpResponse:
     """
     The index home page view
 
     Which contains the processing of two widgets
-    and also contains pagination, prefetch and select related
-    was used to reduce the load on the database
+    and also contains pagination, select related
+    was used to reduce the load on the database.
+    The search goes through the inverted index of the posts
+    and the results are ordered by relevance. The plain listing
+    uses keyset pagination, so deep pages cost the same as the first.
+    Anonymous responses are cached until a post shown on the page,
+    the list of posts, the categories or the popular posts change
 
     :param request: request
     :return: HttpResponse
     """
-    post_list = (
-        Post.objects.select_related("author")
-        .prefetch_related("categories")
-        .annotate(num_comments=Count("comments"))
-        .order_by("-created_at")
-    )
+    post_list = Post.objects.select_related("author").order_by("-created_at")
     filter_form = PostFilterForm()
     search_form = PostSearchForm()
+    search_term = ""
 
     if request.method == "GET":
         filter_form = PostFilterForm(request.GET)
         search_form = PostSearchForm(request.GET)
 
+        # The choice of a category is validated by the category registry
         if filter_form.is_valid():
             category = filter_form.cleaned_data["category"]
             if category:
@@ -52,19 +74,23 @@ def index(request) -> HttpResponse:
         if search_form.is_valid():
             search_term = search_form.cleaned_data["search_term"]
             if search_term:
-                post_list = post_list.filter(
-                    Q(
-                        title__icontains=search_term
-                    ) | Q(
-                        content__icontains=search_term
-                    )
-                )
-                if not post_list.exists():
-                    messages.error(request, "No results found")
+                post_list = search_posts(post_list, search_term)
+
+    if search_term:
+        # Ranked results can not be keyed on the creation date
+        paginator = Paginator(post_list, 4)
+        page_obj = paginator.get_page(request.GET.get("page"))
+    else:
+        paginator = CursorPaginator(post_list, 4)
+        page_obj = paginator.get_page(request.GET.get("cursor"))
+
+    if search_term and not paginator.count:
+        messages.error(request, "No results found")
+
+    add_cache_tags(request, POST_LIST_TAG, CATEGORIES_TAG, POPULAR_TAG)
+    for post in page_obj:
+        add_cache_tags(request, post_tag(post.pk), comments_tag(post.pk))
 
-    paginator = Paginator(post_list, 4)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
     context = {
         "page_obj": page_obj,
         "filter_form": filter_form,
@@ -104,6 +130,50 @@ def page_not_found(request, exception) -> HttpResponse:
     return render(request, "error_pages/error_404.html", status=404)
 
 
+def metrics(request) -> HttpResponse:
+    """
+    Metrics of all the workers in the Prometheus text format
+
+    Only served to the METRICS_ALLOWED_IPS, the metrics of this process
+    are flushed first
+
+    :param request: request
+    :return: HttpResponse
+    """
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", [])
+    if request.META.get("REMOTE_ADDR") not in allowed:
+        raise PermissionDenied
+
+    get_recorder().flush()
+
+    return HttpResponse(
+        render_metrics(get_store().read()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def render_queue_full(
+    request, template_name: str, context: dict
+) -> HttpResponse:
+    """
+    Render the form again with a 503 while the write-behind queue is full
+
+    :param request: request
+    :param template_name: template of the form
+    :param context: context with the bound form, as form or comment_form
+    :return: HttpResponse
+    """
+    form = context.get("form") or context["comment_form"]
+    form.add_error(
+        None, "We are receiving too many messages, please retry shortly."
+    )
+    response = render(request, template_name, context, status=503)
+    response["Retry-After"] = str(writebehind.RETRY_AFTER)
+
+    return response
+
+
+@cache_response
 def about(request) -> HttpResponse:
     """About page view"""
     return render(request, "blog/about.html")
@@ -125,15 +195,20 @@ def contact(request) -> HttpResponse:
     if request.method == "POST":
         form = ContactForm(request.POST)
         if form.is_valid():
-            name = form.cleaned_data["name"]
-            email = form.cleaned_data["email"]
-            subject = form.cleaned_data["subject"]
-            message = form.cleaned_data["message"]
-
-            contact_message = ContactMessage(
-                name=name, email=email, subject=subject, message=message
-            )
-            contact_message.save()
+            if writebehind.is_enabled():
+                try:
+                    writebehind.enqueue_contact_message(form.cleaned_data)
+                except writebehind.QueueFull:
+                    return render_queue_full(
+                        request, "blog/contact.html", {"form": form}
+                    )
+            else:
+                ContactMessage.objects.create(
+                    name=form.cleaned_data["name"],
+                    email=form.cleaned_data["email"],
+                    subject=form.cleaned_data["subject"],
+                    message=form.cleaned_data["message"],
+                )
             messages.success(
                 request, "Your message has been sent successfully!"
             )
@@ -142,28 +217,46 @@ def contact(request) -> HttpResponse:
     return render(request, "blog/contact.html", {"form": form})
 
 
+@method_decorator(cache_response, name="get")
 class PostDetailView(DetailView):
+    """
+    Page of a post with its comments
+
+    The post is read with the ids of its categories, their names come
+    from the category registry
+    """
+
     model = Post
+    queryset = with_category_ids(Post.objects.select_related("author"))
+    template_name = "blog/post_detail.html"
 
     def get_context_data(self, **kwargs) -> dict:
         """
         Processing comments on the selected post
 
         Show comments that belong to the selected post,
-        add a comment form to the context, and add pagination to the
-        page with comments
+        add a comment form to the context, and add keyset pagination
+        to the page with comments
 
         :param kwargs: **kwargs
         :return: dict
         """
         context = super().get_context_data(**kwargs)
-        comments = Comment.objects.filter(post=self.object)
-        paginator = Paginator(comments, 4)
-        page_number = self.request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
-
-        context["comment_form"] = CommentForm()
+        comments = Comment.objects.filter(post=self.object).select_related(
+            "author"
+        )
+        paginator = CursorPaginator(comments, 4)
+        page_obj = paginator.get_page(self.request.GET.get("cursor"))
+
+        context["categories"] = categories_of(self.object)
+        context.setdefault("comment_form", CommentForm())
         context["comments"] = page_obj
+        add_cache_tags(
+            self.request,
+            post_tag(self.object.pk),
+            comments_tag(self.object.pk),
+            CATEGORIES_TAG,
+        )
 
         return context
 
@@ -180,21 +273,40 @@ class PostDetailView(DetailView):
         :param kwargs: **kwargs
         :return: HttpResponse
         """
-        self.object = get_object_or_404(self.model, pk=self.kwargs.get("pk"))
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        self.object = self.get_object()
         form = CommentForm(request.POST)
 
         if form.is_valid():
-            comment = Comment(
-                text=form.cleaned_data["text"],
-                post=self.object,
-                author=request.user
-            )
-            comment.save()
+            if writebehind.is_enabled():
+                try:
+                    writebehind.enqueue_comment(
+                        self.object.pk,
+                        request.user,
+                        form.cleaned_data["text"],
+                        form.cleaned_data["token"],
+                    )
+                except writebehind.QueueFull:
+                    context = self.get_context_data(comment_form=form)
+                    return render_queue_full(
+                        request, self.template_name, context
+                    )
+                messages.info(
+                    request, "Thanks! Your comment will appear in a moment."
+                )
+            else:
+                Comment.objects.create(
+                    text=form.cleaned_data["text"],
+                    post=self.object,
+                    author=request.user,
+                )
 
             url = reverse("blog:post-detail", kwargs={"pk": self.object.pk})
-            return redirect(f"{url}?page=1#comments-section")
+            return redirect(f"{url}#comments-section")
 
-        context = self.get_context_data(form=form)
+        context = self.get_context_data(comment_form=form)
         return self.render_to_response(context)
 
 
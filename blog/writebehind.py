@@ -0,0 +1,443 @@
+import hashlib
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from blog.caching import comments_tag, invalidate_tags
+from blog.dates import historical_dates
+from blog.local_db import LocalDatabase, get_shared
+from blog.models import Comment, ContactMessage, Post, User
+from blog.popular import schedule_refresh
+
+logger = logging.getLogger(__name__)
+
+COMMENT = "comment"
+CONTACT_MESSAGE = "contact_message"
+
+STATS = ("enqueued", "duplicates", "rejected", "drained", "dropped", "dead")
+
+# Seconds a client is asked to wait when the queue is full
+RETRY_AFTER = 30
+
+
+class QueueFull(Exception):
+    """The queue holds WRITE_QUEUE_MAX_DEPTH writes, retry later"""
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "WRITE_BEHIND", False)
+
+
+def write_token(kind: str, owner, client_token: str) -> str:
+    """
+    Deduplication token of a submission
+
+    The form carries a random token, a submission posted twice (double
+    click, retried request) keeps it. It is scoped to the kind and the
+    sender, so a token copied from another page can not drop their rows.
+    Without a token the submission is never deduplicated.
+    """
+    raw = f"{kind}:{owner}:{client_token or uuid4().hex}"
+
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class WriteQueue(LocalDatabase):
+    """
+    Durable queue of validated submissions in a SQLite file in WAL mode
+
+    The request only appends a row, a worker claims batches of rows for
+    a lease, inserts them and deletes them once committed. A worker
+    dying before the delete lets the lease expire and the rows are
+    drained again (at least once), the unique write_token of the target
+    rows skips what was already inserted. Every claim counts as an
+    attempt, a write still failing after WRITE_QUEUE_MAX_ATTEMPTS is
+    moved aside to dead_writes.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS queued_writes ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "token TEXT NOT NULL UNIQUE, "
+        "kind TEXT NOT NULL, "
+        "payload TEXT NOT NULL, "
+        "enqueued_at REAL NOT NULL, "
+        "attempts INTEGER NOT NULL DEFAULT 0, "
+        "claimed_until REAL)",
+        "CREATE TABLE IF NOT EXISTS queue_stats ("
+        "name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS dead_writes ("
+        "id INTEGER PRIMARY KEY, "
+        "token TEXT NOT NULL, "
+        "kind TEXT NOT NULL, "
+        "payload TEXT NOT NULL, "
+        "enqueued_at REAL NOT NULL, "
+        "attempts INTEGER NOT NULL, "
+        "failed_at REAL NOT NULL, "
+        "error TEXT NOT NULL)",
+    )
+
+    def __init__(self, path: Path, max_depth: int = 10000) -> None:
+        super().__init__(path)
+        self.max_depth = max_depth
+
+    def _bump(self, name: str, delta: int = 1) -> None:
+        if delta:
+            self.db.execute(
+                "INSERT INTO queue_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + ?",
+                (name, delta, delta),
+            )
+
+    def depth(self) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM queued_writes"
+        ).fetchone()[0]
+
+    def enqueue(self, kind: str, token: str, payload: dict) -> bool:
+        """
+        Append a write, the depth check and the insert hold the write lock
+
+        :param kind: COMMENT or CONTACT_MESSAGE
+        :param token: deduplication token, see write_token()
+        :param payload: JSON serializable fields of the row
+        :return: False when the token is already queued
+        :raises QueueFull: the queue is at its maximum depth
+        """
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            full = self.depth() >= self.max_depth
+            queued = False
+            if full:
+                self._bump("rejected")
+            else:
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO queued_writes "
+                    "(token, kind, payload, enqueued_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (token, kind, json.dumps(payload), time.time()),
+                )
+                queued = bool(cursor.rowcount)
+                self._bump("enqueued" if queued else "duplicates")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+        if full:
+            raise QueueFull
+        return queued
+
+    def claim(self, batch_size: int, lease: float) -> list[tuple]:
+        """
+        Lease the oldest writes that are not leased by another worker
+
+        :return: list of (id, token, kind, payload, enqueued_at)
+        """
+        now = time.time()
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT id, token, kind, payload, enqueued_at "
+                "FROM queued_writes "
+                "WHERE claimed_until IS NULL OR claimed_until < ? "
+                "ORDER BY id LIMIT ?",
+                (now, batch_size),
+            ).fetchall()
+            db.executemany(
+                "UPDATE queued_writes SET claimed_until = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(now + lease, row[0]) for row in rows],
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+        return [
+            (pk, token, kind, json.loads(payload), enqueued_at)
+            for pk, token, kind, payload, enqueued_at in rows
+        ]
+
+    def ack(self, ids: list[int], drained: int, dropped: int = 0) -> None:
+        """Delete the writes applied to the database"""
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "DELETE FROM queued_writes WHERE id = ?",
+                [(pk,) for pk in ids],
+            )
+            self._bump("drained", drained)
+            self._bump("dropped", dropped)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def fail(self, pk: int, max_attempts: int, error: str) -> bool:
+        """
+        A write that could not be inserted is retried once its lease
+        expires, or moved to dead_writes after max_attempts claims
+
+        :param pk: id of the queued write
+        :param max_attempts: claims before it is moved aside
+        :param error: why it failed, kept with the dead write
+        :return: True when it was moved to dead_writes
+        """
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = db.execute(
+                "INSERT INTO dead_writes (id, token, kind, payload, "
+                "enqueued_at, attempts, failed_at, error) "
+                "SELECT id, token, kind, payload, enqueued_at, attempts, "
+                "?, ? FROM queued_writes WHERE id = ? AND attempts >= ?",
+                (time.time(), error, pk, max_attempts),
+            )
+            dead = bool(cursor.rowcount)
+            if dead:
+                db.execute("DELETE FROM queued_writes WHERE id = ?", (pk,))
+                self._bump("dead")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+        return dead
+
+    def requeue_dead(self) -> int:
+        """
+        Queue the dead writes again with no attempts, e.g. once the
+        cause of their failure is fixed
+
+        :return: number of requeued writes
+        """
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO queued_writes "
+                "(token, kind, payload, enqueued_at) "
+                "SELECT token, kind, payload, enqueued_at FROM dead_writes "
+                "ORDER BY id"
+            )
+            db.execute("DELETE FROM dead_writes")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        Depth, drain lag and counters of the queue
+
+        :return: dict, lag_seconds is the age of the oldest queued write,
+            dead_writes the number of writes moved aside
+        """
+        depth, oldest = self.db.execute(
+            "SELECT COUNT(*), MIN(enqueued_at) FROM queued_writes"
+        ).fetchone()
+        counters = dict(
+            self.db.execute("SELECT name, value FROM queue_stats")
+        )
+        stats = {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "dead_writes": self.db.execute(
+                "SELECT COUNT(*) FROM dead_writes"
+            ).fetchone()[0],
+        }
+        stats.update({name: counters.get(name, 0) for name in STATS})
+
+        return stats
+
+    def clear(self) -> None:
+        self.db.execute("DELETE FROM queued_writes")
+        self.db.execute("DELETE FROM queue_stats")
+        self.db.execute("DELETE FROM dead_writes")
+
+
+def get_queue() -> WriteQueue:
+    """Queue of WRITE_QUEUE_PATH shared by the threads of the process"""
+    path = getattr(
+        settings,
+        "WRITE_QUEUE_PATH",
+        Path(settings.BASE_DIR) / "cache" / "write_queue.sqlite3",
+    )
+
+    return get_shared(
+        WriteQueue, path, getattr(settings, "WRITE_QUEUE_MAX_DEPTH", 10000)
+    )
+
+
+def enqueue_comment(
+    post_id: int, user: User, text: str, token: str
+) -> bool:
+    """
+    :param post_id: primary key of the commented post
+    :param user: author
+    :param text: text of the comment
+    :param token: token of the CommentForm
+    :return: False when the comment is already queued
+    """
+    return get_queue().enqueue(
+        COMMENT,
+        write_token(COMMENT, user.pk, token),
+        {"post_id": post_id, "author_id": user.pk, "text": text},
+    )
+
+
+def enqueue_contact_message(data: dict) -> bool:
+    """
+    :param data: cleaned data of the ContactForm, with its token
+    :return: False when the message is already queued
+    """
+    return get_queue().enqueue(
+        CONTACT_MESSAGE,
+        write_token(CONTACT_MESSAGE, data["email"], data.get("token")),
+        {
+            field: data[field]
+            for field in ("name", "email", "subject", "message")
+        },
+    )
+
+
+def drain(batch_size: int = 500, lease: float = 60) -> int:
+    """
+    Insert one batch of queued writes in one transaction
+
+    A batch that fails is inserted again one write per transaction, so
+    a write that always fails does not hold back the others. It is
+    retried once its lease expires, and moved to dead_writes after
+    WRITE_QUEUE_MAX_ATTEMPTS claims.
+
+    :param batch_size: writes per transaction
+    :param lease: seconds before the writes can be claimed again
+    :return: number of claimed writes, 0 when the queue is empty
+    """
+    queue = get_queue()
+    rows = queue.claim(batch_size, lease)
+    if not rows:
+        return 0
+
+    try:
+        _insert(queue, rows)
+    except Exception as error:
+        if len(rows) == 1:
+            _fail(queue, rows[0], error)
+            return 1
+        logger.warning(
+            "A batch of %d writes failed, inserting them one by one",
+            len(rows),
+            exc_info=True,
+        )
+        for row in rows:
+            try:
+                _insert(queue, [row])
+            except Exception as row_error:
+                _fail(queue, row, row_error)
+
+    return len(rows)
+
+
+def _fail(queue: WriteQueue, row: tuple, error: Exception) -> None:
+    max_attempts = getattr(settings, "WRITE_QUEUE_MAX_ATTEMPTS", 5)
+    if queue.fail(row[0], max_attempts, repr(error)):
+        logger.error(
+            "Moved the %s write %s to dead_writes after %d attempts: %r",
+            row[2],
+            row[0],
+            max_attempts,
+            error,
+        )
+    else:
+        logger.warning(
+            "Could not insert the %s write %s, retried after its lease",
+            row[2],
+            row[0],
+            exc_info=error,
+        )
+
+
+def _insert(queue: WriteQueue, rows: list[tuple]) -> None:
+    """
+    Insert the claimed writes in one transaction and delete them
+
+    bulk_create() sends no signals, so the comment counters, the cached
+    pages of the posts and the popular posts are updated here. Comments
+    of a post or by a user deleted in the meantime are dropped.
+    """
+    comments = []
+    messages = []
+    for _, token, kind, payload, enqueued_at in rows:
+        created_at = datetime.fromtimestamp(enqueued_at, tz=dt_timezone.utc)
+        if kind == COMMENT:
+            comments.append(Comment(
+                write_token=token, created_at=created_at, **payload
+            ))
+        elif kind == CONTACT_MESSAGE:
+            messages.append(ContactMessage(
+                write_token=token, created_at=created_at, **payload
+            ))
+
+    with transaction.atomic(), historical_dates():
+        comments = _new_rows(Comment, comments)
+        posts = set(
+            Post.objects.filter(
+                pk__in={comment.post_id for comment in comments}
+            ).values_list("pk", flat=True)
+        )
+        users = set(
+            User.objects.filter(
+                pk__in={comment.author_id for comment in comments}
+            ).values_list("pk", flat=True)
+        )
+        kept = [
+            comment
+            for comment in comments
+            if comment.post_id in posts and comment.author_id in users
+        ]
+        Comment.objects.bulk_create(kept)
+        for post_id, count in Counter(
+            comment.post_id for comment in kept
+        ).items():
+            Post.objects.filter(pk=post_id).update(
+                comments_count=F("comments_count") + count
+            )
+        messages = _new_rows(ContactMessage, messages)
+        ContactMessage.objects.bulk_create(messages)
+
+    if kept:
+        invalidate_tags(*{comments_tag(comment.post_id) for comment in kept})
+        schedule_refresh()
+    dropped = len(comments) - len(kept)
+    if dropped:
+        logger.warning(
+            "Dropped %d comments of deleted posts or users", dropped
+        )
+    queue.ack([row[0] for row in rows], len(kept) + len(messages), dropped)
+
+
+def _new_rows(model, objects: list) -> list:
+    """The objects whose token was not inserted by a previous drain"""
+    applied = set(
+        model.objects.filter(
+            write_token__in=[obj.write_token for obj in objects]
+        ).values_list("write_token", flat=True)
+    )
+
+    return [obj for obj in objects if obj.write_token not in applied]
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from blog.template_warmup import warm_up
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "personal_blog.settings")
 
 application = get_asgi_application()
+
+# Compile the templates and load the views before the first request
+warm_up()
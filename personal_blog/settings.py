@@ -35,7 +35,6 @@ ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS").split(',')
 
 DEVELOPED_APPS = [
     "blog",
-    "sorl.thumbnail",
     "crispy_forms",
     "crispy_bootstrap5",
     "ckeditor",
@@ -50,9 +49,16 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
 ] + DEVELOPED_APPS
 
+# Installed with DEBUG only, production workers never import them
+DEVELOPMENT_APPS = ["debug_toolbar"]
+
 MIDDLEWARE = [
+    "blog.middleware.MetricsMiddleware",
+    "blog.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "blog.middleware.ReplicaRoutingMiddleware",
+    "blog.middleware.QueryInspectionMiddleware",
+    "blog.middleware.AsyncViewsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -61,11 +67,76 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Every other middleware is async capable, the synchronous debug toolbar
+# would make the ASGI handler run the whole chain through threads
+if DEBUG:
+    INSTALLED_APPS += DEVELOPMENT_APPS
+    MIDDLEWARE.insert(5, "debug_toolbar.middleware.DebugToolbarMiddleware")
+    INTERNAL_IPS = ["127.0.0.1"]
+
 ROOT_URLCONF = "personal_blog.urls"
 
+# URLs of the ASGI handler: the main pages are served by async views,
+# WSGI keeps the sync ones, see blog.middleware.AsyncViewsMiddleware
+ASGI_URLCONF = "personal_blog.urls_asgi"
+
+# Latency histograms of every view (request, template render and
+# database time, queries) and cache hit counters. Each process keeps
+# them in memory and adds them every METRICS_FLUSH_INTERVAL seconds to
+# a SQLite file shared by the workers, served as text by /metrics to
+# the METRICS_ALLOWED_IPS
+METRICS = int(os.getenv("METRICS", default=1))
+
+METRICS_PATH = BASE_DIR / "cache" / "metrics.sqlite3"
+
+METRICS_FLUSH_INTERVAL = 10
+
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+
+# Runs the tests with a temporary METRICS_PATH
+TEST_RUNNER = "blog.tests.runner.TestRunner"
+
+# Sampling profiler of the requests, off by default. A fraction of the
+# requests is profiled, and with PROFILER_SLOW_SECONDS every request is
+# sampled and kept when slower. Stacks are taken every PROFILER_INTERVAL
+# seconds and written in the collapsed format to PROFILER_DIR, at most
+# PROFILER_MAX_PER_MINUTE files per process, build_flamegraphs merges
+# them into a flamegraph per view
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", default=0))
+
+PROFILER_SLOW_SECONDS = float(os.getenv("PROFILER_SLOW_SECONDS", default=0))
+
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", default=0.005))
+
+PROFILER_DIR = BASE_DIR / "cache" / "profiles"
+
+PROFILER_MAX_PER_MINUTE = 20
+
+# Query inspection of every request (Server-Timing header and warnings
+# about N+1 queries), on by default with DEBUG
+QUERY_INSPECTION = bool(DEBUG)
+
+# The same query shape run this many times in one request is an N+1
+QUERY_N_PLUS_ONE_THRESHOLD = 3
+
+# Maximum number of queries per view name, enforced by the tests
+# and logged by the query inspection middleware
+QUERY_BUDGETS = {
+    "blog:index": 4,
+    "blog:post-detail": 5,
+    "blog:about": 2,
+    "blog:contact": 2,
+    "blog:post-create": 3,
+    "blog:post-update": 5,
+    "blog:api-comments": 5,
+    "blog:api-comment": 5,
+}
+
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Django templates, with the render time recorded by the metrics
+        "BACKEND": "blog.template_backends.DjangoTemplates",
+        "NAME": "django",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -79,6 +150,16 @@ TEMPLATES = [
     },
 ]
 
+# Django 4.2 wraps the default template loaders in the cached loader,
+# a worker compiles each template once. New WSGI/ASGI workers compile
+# them before their first request, the ones listed in the manifest of
+# build_template_manifest when it exists. An empty path disables it.
+TEMPLATE_WARMUP = int(os.getenv("TEMPLATE_WARMUP", default=1))
+
+TEMPLATE_MANIFEST_PATH = os.getenv(
+    "TEMPLATE_MANIFEST_PATH", BASE_DIR / "cache" / "templates.json"
+)
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -89,13 +170,72 @@ WSGI_APPLICATION = "personal_blog.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# DATABASE_NAME points the project to another file,
+# e.g. a database seeded for the benchmarks
+DATABASE_NAME = os.getenv("DATABASE_NAME", BASE_DIR / "db.sqlite3")
+
+# DATABASE_PROFILE=production serves the file with the tuned backend of
+# blog.db_backends: WAL, BEGIN IMMEDIATE for the transactions and
+# connections kept open by the threads of the WSGI server.
+# Keep CONN_MAX_AGE at 0 under ASGI, each request runs its queries in
+# a new thread and would leave its connection open.
+DATABASE_PROFILES = {
+    "development": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "NAME": DATABASE_NAME,
+    },
+    "production": {
+        "ENGINE": "blog.db_backends",
+        "NAME": DATABASE_NAME,
+        "CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "pragmas": {
+                "journal_mode": "WAL",
+                # Durable at the checkpoints, not at every commit
+                "synchronous": "NORMAL",
+                # Milliseconds a connection waits for the write lock
+                "busy_timeout": 20000,
+                "mmap_size": 256 * 1024 * 1024,
+                # Negative: in KiB, 64 MiB of page cache per connection
+                "cache_size": -64 * 1024,
+                "temp_store": "MEMORY",
+            },
+        },
+    },
 }
 
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "development")
+
+DATABASES = {"default": DATABASE_PROFILES[DATABASE_PROFILE]}
+
+# DATABASE_REPLICAS=n adds n read replicas: copies of the database file
+# kept in sync by the replicate command, a stand-in for the replication
+# of a database server. The reads of a request go to a replica, the
+# writes and the reads of the clients that just wrote to the primary.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.getenv("DATABASE_REPLICAS", 0)) + 1):
+    primary_name = Path(DATABASE_NAME)
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "NAME": primary_name.with_name(
+            f"{primary_name.stem}.replica_{number}{primary_name.suffix}"
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["blog.routers.PrimaryReplicaRouter"]
+
+# Seconds a client reads from the primary after a write,
+# longer than the replication lag
+REPLICA_PIN_SECONDS = 5
+
+# Seconds since the start of its last sync over which a replica is not
+# read and the primary is, no more than REPLICA_PIN_SECONDS
+REPLICA_MAX_LAG = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -145,6 +285,40 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    # Content hashed names, purged and minified CSS, .gz and .br files
+    "staticfiles": {
+        "BACKEND": "blog.storage.OptimizedStaticFilesStorage",
+    },
+}
+
+# Stylesheets of the project purged of the selectors no template uses
+STATIC_PURGE_CSS = ["css/*.css"]
+
+# Classes added at runtime by the Bootstrap scripts and the views
+STATIC_PURGE_SAFELIST = [
+    "active",
+    "show",
+    "showing",
+    "hide",
+    "hiding",
+    "fade",
+    "collapse",
+    "collapsing",
+    "collapsed",
+    "disabled",
+    "dropdown-menu-*",
+    "navbar-expand-*",
+    "alert-*",
+    "is-valid",
+    "is-invalid",
+    "was-validated",
+]
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -158,15 +332,53 @@ MEDIA_ROOT = BASE_DIR / "media"
 # This variable will be responsible for the path of media files in the browser
 MEDIA_URL = "/media/"
 
-# Enable file caching for the project development period
-# File caching is very slow, in a real project you should use caching in RAM
+# Size of the process pool rendering the post image renditions on save,
+# 0 renders them in the request process
+IMAGE_RENDITION_WORKERS = 2
+
+# Two tier cache without an external server: an in-process LRU bounded
+# by LOCAL_MAX_BYTES in front of a SQLite (WAL) file shared by all the
+# workers, values written by other workers are seen within LOCAL_TIMEOUT
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-        "LOCATION": BASE_DIR / "cache",
+        "BACKEND": "blog.cache_backends.TieredCache",
+        "LOCATION": BASE_DIR / "cache" / "cache.sqlite3",
+        "OPTIONS": {
+            "LOCAL_MAX_BYTES": 32 * 1024 * 1024,
+            "LOCAL_TIMEOUT": 2,
+            "MAX_ENTRIES": 100000,
+        },
     }
 }
 
+# Anonymous responses of the index, post detail and about pages
+# are cached for this many seconds unless invalidated earlier
+RESPONSE_CACHE_TIMEOUT = 600
+
+# Seconds the rendered post cards, post bodies and sidebar widgets
+# are kept, their keys change with what they show (see warm_fragments)
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# The popular posts widget is served from a cached snapshot,
+# which is refreshed in the background once it is older than FRESH_FOR
+# seconds or when comments change, and by refresh_popular_posts
+POPULAR_POSTS_COUNT = 5
+
+POPULAR_POSTS_FRESH_FOR = 300
+
+# Write-behind mode: validated comments and contact messages are
+# appended to a durable queue in a local SQLite file and inserted in
+# batches by drain_write_queue instead of in the request
+WRITE_BEHIND = False
+
+WRITE_QUEUE_PATH = BASE_DIR / "cache" / "write_queue.sqlite3"
+
+# Submissions are refused with a 503 while this many writes are queued
+WRITE_QUEUE_MAX_DEPTH = 10000
+
+# A write still failing after this many drains is moved to dead_writes
+WRITE_QUEUE_MAX_ATTEMPTS = 5
+
 # Add configuration for CKEditor
 CKEDITOR_CONFIGS = {
     "default": {
@@ -14,12 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
 from django.conf.urls.static import static
 from django.conf import settings
-from django.urls import path, include
+from django.urls import path, include, re_path
 
-from blog import views
+from blog import assets, views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -29,5 +31,17 @@ urlpatterns = [
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+# Collected files with far-future caching, the development server
+# keeps serving the source files itself
+urlpatterns += [
+    re_path(
+        r"^%s(?P<path>.+)$" % re.escape(settings.STATIC_URL.lstrip("/")),
+        assets.serve,
+    ),
+]
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    urlpatterns += [path("__debug__/", include("debug_toolbar.urls"))]
+
 handler403 = views.permission_denied
 handler404 = views.page_not_found
@@ -0,0 +1,21 @@
+"""
+URL configuration of the ASGI entry point
+
+The URLs of personal_blog.urls, the main pages of the blog are served
+by their async variants. Selected by blog.middleware.AsyncViewsMiddleware
+with the ASGI_URLCONF setting.
+"""
+from django.urls import include, path
+
+from blog.urls import async_urlpatterns
+from personal_blog import urls
+
+urlpatterns = [
+    path("", include((async_urlpatterns, "blog"), namespace="blog"))
+    if getattr(pattern, "namespace", None) == "blog"
+    else pattern
+    for pattern in urls.urlpatterns
+]
+
+handler403 = urls.handler403
+handler404 = urls.handler404
@@ -0,0 +1,168 @@
+// Comments section of the post page, updated in place through the
+// comments API instead of a form post and a full page reload
+(function () {
+    "use strict";
+
+    const list = document.getElementById("comments-list");
+    if (!list || !window.fetch) {
+        return;
+    }
+    const form = document.getElementById("comment-form");
+    const section = document.getElementById("comments-section");
+
+    function csrfToken() {
+        const input = section.querySelector("[name=csrfmiddlewaretoken]");
+        return input ? input.value : "";
+    }
+
+    function request(url, options) {
+        options = options || {};
+        options.credentials = "same-origin";
+        options.headers = Object.assign(
+            {"X-CSRFToken": csrfToken(), "Accept": "application/json"},
+            options.headers
+        );
+        return fetch(url, options);
+    }
+
+    function toElement(html) {
+        const template = document.createElement("template");
+        template.innerHTML = html.trim();
+        return template.content.firstElementChild;
+    }
+
+    function showErrors(errors) {
+        form.querySelectorAll(".invalid-feedback").forEach(function (node) {
+            node.remove();
+        });
+        const field = form.querySelector("[name=text]");
+        field.classList.toggle("is-invalid", Boolean(errors));
+        if (!errors) {
+            return;
+        }
+        const feedback = document.createElement("div");
+        feedback.className = "invalid-feedback";
+        feedback.textContent = Object.values(errors).flat().join(" ");
+        field.after(feedback);
+    }
+
+    function showNotice(message) {
+        let notice = section.querySelector(".comment-notice");
+        if (!notice) {
+            notice = document.createElement("div");
+            notice.className = "alert alert-info comment-notice";
+            form.before(notice);
+        }
+        notice.textContent = message;
+    }
+
+    function renewToken() {
+        // A new comment must not reuse the token of the previous one,
+        // the write-behind queue would take it for a retry
+        const token = form.querySelector("[name=token]");
+        if (!token) {
+            return;
+        }
+        // Without a token the server never deduplicates the comment
+        token.value = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID().replace(/-/g, "")
+            : "";
+        token.defaultValue = token.value;
+    }
+
+    function showEmpty() {
+        if (!list.querySelector(".comment")) {
+            list.innerHTML = '<p class="no-comments">No comments yet</p>';
+        }
+    }
+
+    if (form) {
+        form.addEventListener("submit", async function (event) {
+            event.preventDefault();
+            const response = await request(list.dataset.apiUrl, {
+                method: "POST",
+                body: new FormData(form),
+            });
+            const data = await response.json();
+            if (response.status === 400) {
+                showErrors(data.errors);
+                return;
+            }
+            if (!response.ok) {
+                showErrors({text: [data.error]});
+                return;
+            }
+            showErrors(null);
+            form.reset();
+            renewToken();
+            if (response.status === 202) {
+                showNotice(data.message);
+                return;
+            }
+            const empty = list.querySelector(".no-comments");
+            if (empty) {
+                empty.remove();
+            }
+            list.prepend(toElement(data.html));
+        });
+    }
+
+    list.addEventListener("submit", async function (event) {
+        const deleteForm = event.target.closest(".comment-delete-form");
+        if (!deleteForm) {
+            return;
+        }
+        event.preventDefault();
+        const response = await request(deleteForm.dataset.apiUrl, {
+            method: "DELETE",
+        });
+        if (response.ok) {
+            deleteForm.closest(".comment").remove();
+            showEmpty();
+        }
+    });
+
+    function renderPagination(nav, data) {
+        const links = [
+            ["Prev", data.previous_cursor],
+            ["Next", data.next_cursor],
+        ].filter(function (link) {
+            return link[1];
+        });
+        nav.querySelector(".pagination").innerHTML = links.map(
+            function (link) {
+                return (
+                    '<li class="page-item"><a class="page-link" ' +
+                    'href="?cursor=' + encodeURIComponent(link[1]) +
+                    '#comments-section">' + link[0] + "</a></li>"
+                );
+            }
+        ).join("");
+    }
+
+    section.addEventListener("click", async function (event) {
+        const link = event.target.closest(".pagination a");
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        const cursor = new URL(link.href).searchParams.get("cursor");
+        const url = new URL(list.dataset.apiUrl, window.location.href);
+        url.searchParams.set("cursor", cursor);
+        const response = await request(url, {method: "GET"});
+        if (!response.ok) {
+            window.location.href = link.href;
+            return;
+        }
+        const data = await response.json();
+        list.replaceChildren.apply(
+            list,
+            data.comments.map(function (comment) {
+                return toElement(comment.html);
+            })
+        );
+        showEmpty();
+        renderPagination(link.closest("nav"), data);
+        history.replaceState(null, "", link.href);
+    });
+}());